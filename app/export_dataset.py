@@ -0,0 +1,22 @@
+"""Writes self-play training dataset, see modules/dataset.py for the format"""
+import argparse
+import pathlib
+import time
+
+from modules.dataset import DatasetReader, export_self_play
+from modules.logger import configure_logging
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('path', type=pathlib.Path, help='Dataset directory')
+    parser.add_argument('--records', default=1_000_000, type=int, help='How many records to write, default - 1000000')
+    parser.add_argument('--seed', default=0, type=int, help='Random seed of figures and actions, default - 0')
+    args = parser.parse_args()
+    configure_logging()
+
+    start = time.perf_counter()
+    games = export_self_play(args.path, args.records, args.seed)
+    elapsed = time.perf_counter() - start
+    dataset = DatasetReader(args.path)
+    print(f'{len(dataset)} records of {games} games in {elapsed:.1f} s, {len(dataset) / elapsed:.0f} records/s')
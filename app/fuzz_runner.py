@@ -0,0 +1,25 @@
+"""Differential fuzzing of a Field backend against the reference rules, see modules/fuzz.py"""
+import argparse
+import sys
+
+from modules.fuzz import BACKENDS, CASE_LENGTH, fuzz
+from modules.logger import configure_logging
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--backend', default='field', choices=sorted(BACKENDS),
+                        help='Backend to check, default - field')
+    parser.add_argument('--minutes', default=1, type=float, help='How long to run, default - 1')
+    parser.add_argument('--cases', default=None, type=int, help='Stop after this number of cases')
+    parser.add_argument('--length', default=CASE_LENGTH, type=int,
+                        help=f'Commands in one random case, default - {CASE_LENGTH}')
+    parser.add_argument('--seed', default=0, type=int, help='Seed of the first case, default - 0')
+    parser.add_argument('--workers', default=None, type=int, help='Processes number, default - CPU count')
+    args = parser.parse_args()
+    configure_logging()
+
+    result = fuzz(args.backend, seed=args.seed, duration_sec=args.minutes * 60, max_cases=args.cases,
+                  length=args.length, workers=args.workers)
+    print(result.format_report())
+    sys.exit(0 if result.failure is None else 1)
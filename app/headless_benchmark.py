@@ -0,0 +1,46 @@
+"""Runs the real game orchestration without display and sound device and reports throughput"""
+import argparse
+import random
+import time
+import types
+
+from modules.controls_handler import ControlsHandler
+from modules.game import Game
+from modules.headless_ui import RecordingGUI
+from modules.logger import configure_logging
+
+KEYCODES = [37, 38, 39, 40]  # arrows
+
+
+def main(seconds: float, keys_per_second: float, seed: int):
+    """
+    Plays random keys for given time and prints how many GUI calls were made
+    """
+    rng = random.Random(seed)
+    controls_handler = ControlsHandler()
+    gui = RecordingGUI()
+    game = Game(controls_handler=controls_handler, gui=gui)
+
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds and not game.is_over:
+        event = types.SimpleNamespace(keycode=rng.choice(KEYCODES))
+        controls_handler.on_key_press(event)
+        controls_handler.on_key_release(event)
+        time.sleep(1 / keys_per_second)
+    elapsed = time.perf_counter() - start
+    game.stop()
+    controls_handler.stop()
+
+    print(f'{elapsed:.1f} s, {game.tick_count} ticks, score {gui.score}, game over: {game.is_over}')
+    for name, stats in sorted(gui.calls.items()):
+        print(f'  {name:<20} {stats.count:>8} calls {stats.count / elapsed:>10.1f}/s')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', default=10, type=float, help='How long to play, default - 10')
+    parser.add_argument('--keys-per-second', default=20, type=float, help='Random key presses rate, default - 20')
+    parser.add_argument('--seed', default=0, type=int, help='Random seed for key presses, default - 0')
+    args = parser.parse_args()
+    configure_logging()
+    main(args.seconds, args.keys_per_second, args.seed)
@@ -2,8 +2,8 @@
 import typing as t
 from abc import ABC, abstractmethod
 
+from .audio import Sounds
 from .figures import Point
-from .skin import Sounds
 from .field import CellState
 
 
@@ -11,9 +11,12 @@ class AbstractGUI(ABC):
     """Interface-like class to describe what abstract UI should have"""
 
     @abstractmethod
-    def apply_field_change(self, changed_points: t.OrderedDict[CellState, t.Set[Point]]) -> int:
+    def apply_field_change(self, changed_points: t.OrderedDict[CellState, t.Set[Point]],
+                           trace: list[float] | None = None) -> int:
         """
         Paints filled cell on game field
+        :param trace: - latency trace of input event caused the change, GUI passes it to latency_tracker.finish()
+                        when the change is really painted
         """
 
     @abstractmethod
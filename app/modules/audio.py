@@ -0,0 +1,107 @@
+"""Limits simultaneously playing sounds and merges repeated triggers"""
+import collections
+import dataclasses
+import threading
+import time
+import typing as t
+
+if t.TYPE_CHECKING:
+    import simpleaudio as sa
+
+MAX_VOICES = 8  # all sounds together
+COALESCE_WINDOW_SEC = 1 / 60  # same sound triggered again within one frame is played once
+
+
+class Voice:  # pylint: disable=too-few-public-methods
+    """
+    One sound bound to a pool. Wave object keeps pre-decoded PCM, it's shared by all playbacks
+    """
+
+    def __init__(self, pool: 'VoicePool', wave_object: 'sa.WaveObject', max_concurrent: int):
+        self.pool = pool
+        self.wave_object = wave_object
+        self.max_concurrent = max_concurrent
+        self.last_trigger_time: float | None = None
+
+    def play(self):
+        """Plays the sound if pool limits allow it"""
+        self.pool.play(self)
+
+
+@dataclasses.dataclass
+class Sounds:
+    """
+    Contains all required sounds as voices of the pool
+    """
+    move: Voice
+    rotate: Voice
+    row_delete: Voice
+    tick: Voice
+    fix_figure: Voice
+    game_over: Voice
+    startup: Voice
+
+
+class VoicePool:
+    """
+    Fixed amount of voices shared by all sounds.
+    If a sound or the whole pool is out of voices the oldest playback is stopped to free one
+    """
+
+    def __init__(self, max_voices=MAX_VOICES, coalesce_window_sec=COALESCE_WINDOW_SEC, time_func=time.monotonic):
+        self.max_voices = max_voices
+        self.coalesce_window_sec = coalesce_window_sec
+        self._time_func = time_func
+        self._lock = threading.Lock()  # sounds are triggered from different game threads
+        self._playing: t.Deque[tuple[Voice, 'sa.PlayObject']] = collections.deque()  # oldest first
+        self.coalesced_count = 0
+        self.stolen_count = 0
+
+    def voice(self, wave_object: 'sa.WaveObject', max_concurrent=1) -> Voice:
+        """Creates a voice which plays given wave object through this pool"""
+        return Voice(self, wave_object, max_concurrent)
+
+    def play(self, voice: Voice):
+        """Plays the voice or merges it with the same one triggered in current frame"""
+        with self._lock:
+            now = self._time_func()
+            if voice.last_trigger_time is not None and now - voice.last_trigger_time < self.coalesce_window_sec:
+                self.coalesced_count += 1
+                return
+            voice.last_trigger_time = now
+
+            self._drop_finished()
+            if sum(1 for playing_voice, _ in self._playing if playing_voice is voice) >= voice.max_concurrent:
+                self._steal(voice)
+            if len(self._playing) >= self.max_voices:
+                self._steal()
+            self._playing.append((voice, voice.wave_object.play()))
+
+    def stop_all(self):
+        """Stops everything that is playing now"""
+        with self._lock:
+            for _, play_object in self._playing:
+                play_object.stop()
+            self._playing.clear()
+
+    @property
+    def active_count(self) -> int:
+        """How many voices are playing now"""
+        with self._lock:
+            self._drop_finished()
+            return len(self._playing)
+
+    def _drop_finished(self):
+        self._playing = collections.deque(item for item in self._playing if item[1].is_playing())
+
+    def _steal(self, voice: Voice | None = None):
+        """Stops the oldest playback of given voice or the oldest one at all"""
+        for item in self._playing:
+            if voice is None or item[0] is voice:
+                item[1].stop()
+                self._playing.remove(item)
+                self.stolen_count += 1
+                return
+
+
+voice_pool = VoicePool()
@@ -0,0 +1,184 @@
+"""
+Many boards stepped at once with NumPy - environment for reinforcement learning.
+Requires numpy, which the game itself doesn't need
+"""
+import enum
+import random
+
+import numpy as np
+
+from .field import CellState, FIELD_HIDDEN_TOP_ROWS_NUMBER
+from .figures import Rotation, all_figures
+from .game import FIELD_HEIGHT, FIELD_WIDTH
+from .rotation import CLASSIC_KICKS
+
+ROW_SCORE = 10  # the same as Game gives
+ROTATION_KICKS = tuple(x for x, _ in CLASSIC_KICKS[None][Rotation.NORTH])  # Field's default kicks, x only
+
+
+class Action(enum.IntEnum):
+    """What agent can do on one step, gravity moves the figure one cell down after the action"""
+    NOOP = 0
+    LEFT = 1
+    RIGHT = 2
+    ROTATE = 3
+    DOWN = 4
+    DROP = 5
+
+
+def figure_shapes() -> np.ndarray:
+    """Cells of every figure in every rotation taken from figures.py, shape (figures, rotations, 4 cells, x/y)"""
+    shapes = np.zeros((len(all_figures), len(Rotation), 4, 2), dtype=np.intp)
+    for kind, figure_class in enumerate(all_figures):
+        figure = figure_class(random.Random(0))
+        for rotation in Rotation:
+            shapes[kind, rotation] = sorted(figure[rotation])
+    return shapes
+
+
+class BatchEnv:  # pylint: disable=too-many-instance-attributes, too-many-arguments
+    """
+    N independent games in arrays: boards (N, height, width) with 1 for filled cells, figure kind, rotation and
+    position (N,). Every step() call is a fixed number of vectorized operations whatever N is.
+    Rules follow Field: the same figures, spawn point, random initial rotation and rotation kicks.
+    Unlike Field, all full rows are removed at once when a figure is fixed.
+
+    Observations, rewards and done flags are written to preallocated buffers, step() returns the buffers
+    themselves - copy them if they are needed after the next step
+    """
+
+    def __init__(self, num_envs: int, *, width=FIELD_WIDTH, height=FIELD_HEIGHT,
+                 hidden_rows=FIELD_HIDDEN_TOP_ROWS_NUMBER, seed: int | None = None, autoreset=True):
+        """
+        :param height: - visible rows, hidden_rows more are on top of them like in the game
+        :param autoreset: - games which are over are started again by the next step()
+        """
+        self.num_envs = num_envs
+        self.width = width
+        self.height = height + hidden_rows
+        self.hidden_rows = hidden_rows
+        self.autoreset = autoreset
+        self._rng = np.random.default_rng(seed)
+        self._shapes = figure_shapes()
+        self._env_index = np.arange(num_envs)[:, None]  # for fancy indexing of cells
+
+        self.boards = np.zeros((num_envs, self.height, width), dtype=np.uint8)
+        self.kind = np.zeros(num_envs, dtype=np.intp)
+        self.next_kind = np.zeros(num_envs, dtype=np.intp)
+        self.rotation = np.zeros(num_envs, dtype=np.intp)
+        self.x = np.zeros(num_envs, dtype=np.intp)
+        self.y = np.zeros(num_envs, dtype=np.intp)
+        self.scores = np.zeros(num_envs, dtype=np.int64)
+
+        # Buffers given to the caller
+        self.observations = np.zeros((num_envs, height, width), dtype=np.uint8)  # CellState values
+        self.rewards = np.zeros(num_envs, dtype=np.float32)
+        self.dones = np.zeros(num_envs, dtype=bool)
+        self.reset()
+
+    def reset(self, mask: np.ndarray | None = None) -> np.ndarray:
+        """Starts new games in all or masked boards, returns observations buffer"""
+        mask = np.ones(self.num_envs, dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+        self.boards[mask] = 0
+        self.scores[mask] = 0
+        self.next_kind[mask] = self._rng.integers(len(self._shapes), size=int(mask.sum()))
+        self.dones[mask] = False
+        self._spawn(mask)
+        self._observe()
+        return self.observations
+
+    def step(self, actions) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Applies one action per board, then gravity
+        :return: - observations (N, height, width), rewards (N,) and done flags (N,) buffers
+        """
+        actions = np.asarray(actions)
+        if self.autoreset and self.dones.any():
+            self.reset(self.dones.copy())
+        active = ~self.dones
+
+        for action, x_diff in ((Action.LEFT, -1), (Action.RIGHT, 1)):
+            moving = active & (actions == action)
+            self.x += x_diff * (moving & self._fits(self.rotation, self.x + x_diff, self.y))
+
+        self._rotate(active & (actions == Action.ROTATE))
+        self.y += active & (actions == Action.DOWN) & self._fits(self.rotation, self.x, self.y + 1)
+        dropping = active & (actions == Action.DROP)
+        if dropping.any():
+            self.y += dropping * self._drop_distance()
+
+        # Gravity, the figure which can't fall is fixed
+        falls = self._fits(self.rotation, self.x, self.y + 1)
+        self.y += active & falls
+        fixed = active & ~falls
+        self.rewards[:] = 0
+        if fixed.any():
+            self._fix(fixed)
+            self._spawn(fixed)
+        self._observe()
+        return self.observations, self.rewards, self.dones
+
+    def _cells(self, rotation: np.ndarray, x: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Figure cells coordinates, shape (N, 4) each"""
+        cells = self._shapes[self.kind, rotation]
+        return x[:, None] + cells[..., 0], y[:, None] + cells[..., 1]
+
+    def _fits(self, rotation: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """For every board - whether its figure could be placed in given rotation and position"""
+        xs, ys = self._cells(rotation, x, y)
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        filled = self.boards[self._env_index, ys % self.height, xs % self.width]  # cells outside don't matter
+        return (inside & (filled == 0)).all(axis=1)
+
+    def _drop_distance(self) -> np.ndarray:
+        """How many cells every figure could fall - distance to the nearest filled cell under any of its cells"""
+        xs, ys = self._cells(self.rotation, self.x, self.y)
+        rows = np.arange(self.height)
+        columns = self.boards[self._env_index[:, :, None], rows, xs[:, :, None]]  # (N, 4 cells, height)
+        obstacles = (columns != 0) & (rows > ys[:, :, None])
+        first_obstacle = np.where(obstacles.any(axis=2), obstacles.argmax(axis=2), self.height)
+        return (first_obstacle - ys - 1).min(axis=1)
+
+    def _rotate(self, rotating: np.ndarray):
+        next_rotation = (self.rotation + 1) % len(Rotation)
+        for kick in ROTATION_KICKS:
+            kicked = rotating & self._fits(next_rotation, self.x + kick, self.y)
+            self.x += kicked * kick
+            self.rotation[kicked] = next_rotation[kicked]
+            rotating &= ~kicked
+
+    def _fix(self, fixed: np.ndarray):
+        """Writes fixed figures to boards, removes full rows"""
+        xs, ys = self._cells(self.rotation, self.x, self.y)
+        self.boards[self._env_index[fixed], ys[fixed], xs[fixed]] = 1
+
+        boards = self.boards[fixed]
+        full = boards.all(axis=2)  # (M, height)
+        rows_removed = full.sum(axis=1)
+        if rows_removed.any():
+            # Stable sort puts full rows on top keeping order of the rest, then they are cleared
+            order = np.argsort(~full, axis=1, kind='stable')
+            boards = np.take_along_axis(boards, order[:, :, None], axis=1)
+            boards[np.arange(self.height)[None, :] < rows_removed[:, None]] = 0
+            self.boards[fixed] = boards
+        self.scores[fixed] += rows_removed * ROW_SCORE
+        self.rewards[fixed] = rows_removed * ROW_SCORE
+
+    def _spawn(self, mask: np.ndarray):
+        """New figure in masked boards, board is done if the figure doesn't fit"""
+        count = int(mask.sum())
+        self.kind[mask] = self.next_kind[mask]
+        self.next_kind[mask] = self._rng.integers(len(self._shapes), size=count)
+        self.rotation[mask] = self._rng.integers(len(Rotation), size=count)
+        self.x[mask] = self.width // 2 - 1
+        self.y[mask] = 0
+        self.dones |= mask & ~self._fits(self.rotation, self.x, self.y)
+
+    def _observe(self):
+        """Fills observations buffer - visible rows with falling figure"""
+        np.copyto(self.observations, self.boards[:, self.hidden_rows:])
+        xs, ys = self._cells(self.rotation, self.x, self.y)
+        ys = ys - self.hidden_rows
+        visible = (ys >= 0) & ~self.dones[:, None]
+        self.observations[np.broadcast_to(self._env_index, ys.shape)[visible], ys[visible], xs[visible]] = \
+            CellState.FALLING
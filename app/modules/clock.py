@@ -0,0 +1,106 @@
+"""
+Time source of the game logic. Real clock is the wall (monotonic) time.
+Virtual clock moves only when asked, so a game could run much faster than real time and always the same way
+"""
+import heapq
+import itertools
+import time
+import typing as t
+
+
+class Clock:
+    """Real time, threads may sleep and block on queues"""
+    blocking = True  # False - nothing may wait, work is driven by clock callbacks
+
+    def now(self) -> float:
+        """Current time, seconds"""
+        return time.monotonic()
+
+    def sleep(self, seconds: float):
+        """Waits given time"""
+        time.sleep(seconds)
+
+
+class _VirtualTimer:  # pylint: disable=too-few-public-methods
+    """Callback scheduled on virtual clock"""
+
+    def __init__(self, deadline: float, callback: t.Callable[[], None]):
+        self.deadline = deadline
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        """Callback won't be called"""
+        self.cancelled = True
+
+
+class VirtualClock(Clock):
+    """
+    Time moves only in advance(). Timers scheduled on the clock are called in deadline order (equal deadlines -
+    in order of scheduling), after every timer step hooks are called to process what the timer produced.
+    Everything runs in the thread which calls advance(), so the clock should be driven by one thread
+    """
+    blocking = False
+
+    def __init__(self, start_time=0.0):
+        self._now = start_time
+        self._timers: list[tuple[float, int, _VirtualTimer]] = []  # heap
+        self._sequence = itertools.count()
+        self._step_hooks: list[t.Callable[[], None]] = []
+        self.steps_count = 0
+
+    def now(self) -> float:
+        return self._now
+
+    def sleep(self, seconds: float):
+        """Nobody waits for virtual time - sleep is the same as advance()"""
+        self.advance(seconds)
+
+    def call_at(self, deadline: float, callback: t.Callable[[], None]) -> _VirtualTimer:
+        """Calls callback when the clock reaches deadline"""
+        timer = _VirtualTimer(max(deadline, self._now), callback)
+        heapq.heappush(self._timers, (timer.deadline, next(self._sequence), timer))
+        return timer
+
+    def call_later(self, delay: float, callback: t.Callable[[], None]) -> _VirtualTimer:
+        """Calls callback after given delay"""
+        return self.call_at(self._now + delay, callback)
+
+    def add_step_hook(self, hook: t.Callable[[], None]):
+        """Hook is called after every timer and at the beginning of advance()"""
+        self._step_hooks.append(hook)
+
+    def remove_step_hook(self, hook: t.Callable[[], None]):
+        """Stops calling the hook"""
+        if hook in self._step_hooks:
+            self._step_hooks.remove(hook)
+
+    def advance(self, seconds: float, until: t.Callable[[], bool] | None = None) -> bool:
+        """
+        Moves time forward calling all timers on the way
+        :param until: - stop as soon as it returns True, checked after every step
+        :return: - True if stopped by until
+        """
+        target = self._now + seconds
+        self._run_step_hooks()
+        if until is not None and until():
+            return True
+        while self._timers and self._timers[0][0] <= target:
+            deadline, _, timer = heapq.heappop(self._timers)
+            if timer.cancelled:
+                continue
+            self._now = deadline
+            timer.callback()
+            self.steps_count += 1
+            self._run_step_hooks()
+            if until is not None and until():
+                return True
+        self._now = target
+        return False
+
+    def _run_step_hooks(self):
+        for hook in list(self._step_hooks):
+            hook()
+
+
+real_clock = Clock()
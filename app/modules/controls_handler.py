@@ -1,12 +1,15 @@
 """Interface between UI, user and logic"""
+import argparse
 import collections
 import dataclasses
 import enum
+import threading
 import time
 import typing as t
 from queue import Queue
 
-from .tick_thread import TickThread
+from .clock import Clock, VirtualClock, real_clock
+from .latency import latency_tracker
 
 
 class _Keycodes(enum.IntEnum):
@@ -19,15 +22,23 @@ class _Keycodes(enum.IntEnum):
     ENTER = 13  # Enter
 
 
-TICK_INTERVAL = 0.08
-TICK_DELAY = 0.2
+DAS_SEC = 0.2  # Delayed auto shift - how long to hold a key before auto-repeat starts
+ARR_SEC = 0.08  # Auto repeat rate - interval between repeats, 0 means shift to the wall at once
+
+
+def add_key_repeat_arguments(parser: argparse.ArgumentParser):
+    """Adds --das and --arr command line arguments, both in milliseconds"""
+    parser.add_argument('--das', default=DAS_SEC * 1000, type=float,
+                        help=f'Delayed auto shift - key hold time before auto-repeat, ms, default - {DAS_SEC * 1000:g}')
+    parser.add_argument('--arr', default=ARR_SEC * 1000, type=float,
+                        help=f'Auto repeat rate - interval between repeats, ms, 0 to shift to the wall at once, '
+                             f'default - {ARR_SEC * 1000:g}')
 
 
 @dataclasses.dataclass
 class _KeyEventParams:
     """Stores info about pressed key"""
     is_pressed: bool = False
-    press_time: float | None = None
     has_been_processed_once: bool = False
 
 
@@ -40,6 +51,8 @@ class Commands(enum.StrEnum):
     """Commands"""
     MOVE_LEFT = enum.auto()  # Left arrow
     MOVE_RIGHT = enum.auto()  # Right arrow
+    SHIFT_LEFT = enum.auto()  # Left arrow held with zero ARR - move to the wall
+    SHIFT_RIGHT = enum.auto()  # Right arrow held with zero ARR - move to the wall
     ROTATE = enum.auto()  # Up arrow
     FORCE_DOWN = enum.auto()  # Down arrow
     FORCE_DOWN_CANCEL = enum.auto()  # Down arrow
@@ -52,6 +65,94 @@ class ControlEvent:
     """Stores control event e.g. move key press, skin change, new game etc."""
     event_type: ControlEventType
     payload: t.Any = None
+    # perf_counter timestamps, the first one is when event happened, see latency.py. None if tracing is off
+    trace: list[float] | None = dataclasses.field(
+        default_factory=lambda: [time.perf_counter()] if latency_tracker.enabled else None)
+
+
+class _RepeatScheduler(threading.Thread):
+    """
+    Calls callback on clock deadlines. Sleeps without any polling while there is no deadline
+    """
+
+    def __init__(self, callback: t.Callable[[t.Any, float], float | None], clock: Clock = real_clock):
+        """
+        :param callback: - called with payload and deadline, returns next deadline or None to disarm
+        """
+        super().__init__(daemon=True)
+        self._callback = callback
+        self._clock = clock
+        self._condition = threading.Condition()
+        self._deadline: float | None = None
+        self._payload: t.Any = None
+        self._stopped = False
+
+    def arm(self, deadline: float, payload: t.Any):
+        """Schedule callback call with given payload on deadline, replaces previous one"""
+        with self._condition:
+            self._deadline = deadline
+            self._payload = payload
+            self._condition.notify()
+
+    def disarm(self):
+        """Cancel scheduled call"""
+        with self._condition:
+            self._deadline = None
+            self._payload = None
+            self._condition.notify()
+
+    def stop(self):
+        """Ends the thread, scheduled call is cancelled"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self.is_alive():
+            self.join()
+
+    def run(self):
+        with self._condition:
+            while not self._stopped:
+                if self._deadline is None:
+                    self._condition.wait()
+                    continue
+                timeout = self._deadline - self._clock.now()
+                if timeout > 0:
+                    self._condition.wait(timeout)
+                    continue
+                self._deadline = self._callback(self._payload, self._deadline)
+
+
+class _VirtualRepeatScheduler:
+    """The same as _RepeatScheduler, but deadlines are timers of virtual clock"""
+
+    def __init__(self, callback: t.Callable[[t.Any, float], float | None], clock: VirtualClock):
+        self._callback = callback
+        self._clock = clock
+        self._timer = None
+
+    def start(self):
+        """Nothing to start - the clock calls timers"""
+
+    def arm(self, deadline: float, payload: t.Any):
+        """Schedule callback call with given payload on deadline, replaces previous one"""
+        self.disarm()
+
+        def on_deadline():
+            self._timer = None
+            next_deadline = self._callback(payload, deadline)
+            if next_deadline is not None:
+                self.arm(next_deadline, payload)
+        self._timer = self._clock.call_at(deadline, on_deadline)
+
+    def disarm(self):
+        """Cancel scheduled call"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def stop(self):
+        """Nothing to stop but the scheduled call"""
+        self.disarm()
 
 
 class ControlsHandler:
@@ -61,8 +162,19 @@ class ControlsHandler:
     # auto-repeat until key release only this commands, other keys processed once per press
     REPEAT_COMMAND = {Commands.MOVE_RIGHT,
                       Commands.MOVE_LEFT}
-
-    def __init__(self):
+    # what to do after DAS if ARR is zero
+    SHIFT_COMMAND = {Commands.MOVE_LEFT: Commands.SHIFT_LEFT,
+                     Commands.MOVE_RIGHT: Commands.SHIFT_RIGHT}
+
+    def __init__(self, das_sec=DAS_SEC, arr_sec=ARR_SEC, clock: Clock = real_clock):
+        """
+        :param das_sec: - delay before auto-repeat starts
+        :param arr_sec: - interval between repeats, 0 to shift to the wall right after DAS
+        :param clock: - time source of key auto-repeat
+        """
+        self.das_sec = das_sec
+        self.arr_sec = arr_sec
+        self._clock = clock
 
         self._keycode_to_command_map = {
             _Keycodes.LEFT_ARROW: Commands.MOVE_LEFT,
@@ -77,8 +189,13 @@ class ControlsHandler:
 
         self._keys_pressed = collections.defaultdict(_KeyEventParams)
 
-        self.tick_thread = TickThread(self._process_pressed_keys, TICK_INTERVAL)
-        self.tick_thread.start()
+        self._repeat_scheduler = _RepeatScheduler(self._on_repeat_deadline, clock) if clock.blocking \
+            else _VirtualRepeatScheduler(self._on_repeat_deadline, clock)
+        self._repeat_scheduler.start()
+
+    def stop(self):
+        """Stops key auto-repeat thread"""
+        self._repeat_scheduler.stop()
 
     def on_key_press(self, event):
         """Callback for pressed key, should be bound to GUI class"""
@@ -87,10 +204,10 @@ class ControlsHandler:
             return
         pressed_key = self._keys_pressed[command]
         pressed_key.is_pressed = True
-        if pressed_key.press_time is None:
-            pressed_key.press_time = time.time()
-        if not pressed_key.has_been_processed_once:
+        if not pressed_key.has_been_processed_once:  # OS key repeat is ignored, we have own one
             self.events_q.put(ControlEvent(ControlEventType.KEY_PRESS, command))
+            if command in self.REPEAT_COMMAND:
+                self._repeat_scheduler.arm(self._clock.now() + self.das_sec, command)
         pressed_key.has_been_processed_once = True
 
     def on_key_release(self, event):
@@ -100,17 +217,24 @@ class ControlsHandler:
             return
         released_key = self._keys_pressed[command]
         released_key.is_pressed = False
-        released_key.press_time = None
         released_key.has_been_processed_once = False
 
+        if command in self.REPEAT_COMMAND:
+            # If opposite direction is still held it takes over auto-repeat
+            held_commands = [c for c in self.REPEAT_COMMAND if self._keys_pressed[c].is_pressed]
+            if held_commands:
+                self._repeat_scheduler.arm(self._clock.now() + self.das_sec, held_commands[0])
+            else:
+                self._repeat_scheduler.disarm()
+
         if command == Commands.FORCE_DOWN:
             self.events_q.put(ControlEvent(ControlEventType.KEY_PRESS, Commands.FORCE_DOWN_CANCEL))
 
-    def _process_pressed_keys(self):
-        # Make a decision what should we do with this key
-        for command, pressed_key in self._keys_pressed.items():
-            if command not in self.REPEAT_COMMAND or \
-                    not pressed_key.is_pressed or \
-                    time.time() - pressed_key.press_time < TICK_DELAY or not pressed_key.has_been_processed_once:
-                continue
-            self.events_q.put(ControlEvent(ControlEventType.KEY_PRESS, command))
+    def _on_repeat_deadline(self, command: Commands, deadline: float) -> float | None:
+        """Repeats held key, returns next deadline"""
+        if self.arr_sec <= 0:
+            self.events_q.put(ControlEvent(ControlEventType.KEY_PRESS, self.SHIFT_COMMAND[command]))
+            return None
+        self.events_q.put(ControlEvent(ControlEventType.KEY_PRESS, command))
+        # Next deadline counts from previous one so repeats don't drift, but don't try to catch up after a stall
+        return max(deadline + self.arr_sec, self._clock.now())
@@ -0,0 +1,211 @@
+"""
+Training dataset - (board, falling figure, next figure, action, reward) records in memory-mapped files.
+Boards are rebuilt from field events and packed as bits. Requires numpy, which the game itself doesn't need.
+
+Directory layout: one raw file per column, row i of every file is record i, and index.json which says
+how many records are valid and what shape and type the columns have
+"""
+import json
+import pathlib
+import random
+import typing as t
+
+import numpy as np
+
+from .batch_env import Action, ROW_SCORE
+from .field import CellState, Field, FieldEvent, FieldEventType, FIELD_HIDDEN_TOP_ROWS_NUMBER
+from .game import FIELD_HEIGHT, FIELD_WIDTH
+
+INDEX_FILE_NAME = 'index.json'
+CHUNK_RECORDS = 64 * 1024  # files grow by this number of records
+READ_BATCH_RECORDS = 4096
+NEXT_FIGURE_SIZE = 4  # next figure preview is 4x4 cells
+
+
+def _columns(width: int, height: int) -> dict[str, tuple[str, tuple[int, ...]]]:
+    """Column name -> (dtype, shape of one record)"""
+    packed_board_bytes = (width * height + 7) // 8
+    return {
+        'board': ('u1', (packed_board_bytes,)),  # FILLED cells, row by row
+        'figure': ('u1', (packed_board_bytes,)),  # FALLING cells
+        'next_figure': ('<u2', ()),  # bit y * 4 + x for every cell of 4x4 preview
+        'action': ('u1', ()),
+        'reward': ('<f4', ()),
+    }
+
+
+class BoardModel:
+    """Visible board rebuilt from field events, the same GUI sees"""
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.cells = np.zeros(width * height, dtype=np.uint8)  # CellState values, index is y * width + x
+        self.next_figure_mask = 0
+        self.rows_removed = 0
+        self.is_game_over = False
+
+    def on_field_event(self, event: FieldEvent):
+        """Game field listener, see Game.add_field_listener()"""
+        match event.event_type:
+            case FieldEventType.CELL_STATE_CHANGE:
+                for cell_state, cells in event.payload:
+                    self.cells[list(cells)] = cell_state
+            case FieldEventType.NEW_FIGURE:
+                self.next_figure_mask = sum(1 << (y * NEXT_FIGURE_SIZE + x) for x, y in event.payload)
+            case FieldEventType.ROW_REMOVED:
+                self.rows_removed += 1
+            case FieldEventType.GAME_OVER:
+                self.is_game_over = True
+
+    def snapshot(self) -> tuple[np.ndarray, np.ndarray, int]:
+        """Filled cells and falling figure cells as bits, next figure mask"""
+        return (np.packbits(self.cells == CellState.FILLED), np.packbits(self.cells == CellState.FALLING),
+                self.next_figure_mask)
+
+
+class DatasetWriter:  # pylint: disable=too-many-instance-attributes
+    """
+    Appends records to memory-mapped column files. Files are preallocated for a chunk of records and
+    grow by chunks, the index is rewritten on flush() and close()
+    """
+
+    def __init__(self, path: pathlib.Path, width=FIELD_WIDTH, height=FIELD_HEIGHT, chunk_records=CHUNK_RECORDS):
+        self.path = pathlib.Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.width = width
+        self.height = height
+        self.count = 0
+        self._chunk_records = chunk_records
+        self._columns = _columns(width, height)
+        self._capacity = 0
+        self._arrays: dict[str, np.memmap] = {}
+        self._grow()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def append(self, state: tuple[np.ndarray, np.ndarray, int], action: int, reward: float):
+        """
+        Adds a record
+        :param state: - BoardModel.snapshot() taken before the action
+        """
+        if self.count == self._capacity:
+            self._grow()
+        self._arrays['board'][self.count], self._arrays['figure'][self.count], \
+            self._arrays['next_figure'][self.count] = state
+        self._arrays['action'][self.count] = action
+        self._arrays['reward'][self.count] = reward
+        self.count += 1
+
+    def flush(self):
+        """Writes data and index to disk"""
+        for array in self._arrays.values():
+            array.flush()
+        index = {'count': self.count, 'width': self.width, 'height': self.height,
+                 'columns': {name: {'dtype': dtype, 'shape': list(shape)}
+                             for name, (dtype, shape) in self._columns.items()}}
+        (self.path / INDEX_FILE_NAME).write_text(json.dumps(index, indent=2), encoding='utf-8')
+
+    def close(self):
+        """Flushes and cuts preallocated tail of files"""
+        self.flush()
+        arrays, self._arrays = self._arrays, {}
+        del arrays  # memory maps must be closed before truncate
+        for name, (dtype, shape) in self._columns.items():
+            with open(self.path / name, 'r+b') as column_file:
+                column_file.truncate(self.count * np.dtype(dtype).itemsize * int(np.prod(shape)))
+
+    def _grow(self):
+        """Extends every column file by a chunk and maps it again"""
+        if self._arrays:
+            self.flush()
+        self._arrays = {}
+        self._capacity += self._chunk_records
+        for name, (dtype, shape) in self._columns.items():
+            file_path = self.path / name
+            with open(file_path, 'ab') as column_file:  # creates the file if needed
+                column_file.truncate(self._capacity * np.dtype(dtype).itemsize * int(np.prod(shape)))
+            self._arrays[name] = np.memmap(file_path, dtype=dtype, mode='r+', shape=(self._capacity, *shape))
+
+
+class DatasetReader:
+    """Read-only view of a dataset, nothing is loaded to memory until it's accessed"""
+
+    def __init__(self, path: pathlib.Path):
+        self.path = pathlib.Path(path)
+        index = json.loads((self.path / INDEX_FILE_NAME).read_text(encoding='utf-8'))
+        self.width = index['width']
+        self.height = index['height']
+        self.count = index['count']
+        self.columns: dict[str, np.ndarray] = {}
+        for name, column in index['columns'].items():
+            if self.count == 0:
+                self.columns[name] = np.zeros((0, *column['shape']), dtype=column['dtype'])
+                continue
+            self.columns[name] = np.memmap(self.path / name, dtype=column['dtype'], mode='r',
+                                           shape=(self.count, *column['shape']))
+
+    def __len__(self):
+        return self.count
+
+    def iter_batches(self, batch_size=READ_BATCH_RECORDS) -> t.Iterator[dict[str, np.ndarray]]:
+        """Yields column slices of batch_size records, they are views of memory maps"""
+        for start in range(0, self.count, batch_size):
+            yield {name: array[start:start + batch_size] for name, array in self.columns.items()}
+
+    def unpack(self, packed: np.ndarray) -> np.ndarray:
+        """Packed board or figure column slice to (records, height, width) array of 0 and 1"""
+        cells = self.width * self.height
+        return np.unpackbits(packed, axis=-1, count=cells).reshape(*packed.shape[:-1], self.height, self.width)
+
+
+def export_self_play(path: pathlib.Path, records: int, seed=0, chunk_records=CHUNK_RECORDS) -> int:
+    """
+    Plays random actions on Field and writes a record per action: state before the action, the action and
+    reward for rows completed by the action and the following gravity step. New game starts after game over.
+    Returns the number of games played
+    """
+    rng = random.Random(seed)
+    games = 0
+    with DatasetWriter(path, chunk_records=chunk_records) as writer:
+        while writer.count < records:
+            _play_game(writer, records, rng)
+            games += 1
+    return games
+
+
+def _play_game(writer: DatasetWriter, records: int, rng: random.Random):
+    field = Field(FIELD_WIDTH, FIELD_HEIGHT + FIELD_HIDDEN_TOP_ROWS_NUMBER, random.Random(rng.random()))
+    model = BoardModel(FIELD_WIDTH, FIELD_HEIGHT)
+    commands = {Action.NOOP: lambda: None, Action.LEFT: field.move_left, Action.RIGHT: field.move_right,
+                Action.ROTATE: field.rotate, Action.DOWN: field.move_down, Action.DROP: lambda: _drop(field)}
+
+    _step(field, model, commands[Action.NOOP])  # spawn the first figure
+    while writer.count < records and not model.is_game_over:
+        state = model.snapshot()
+        action = rng.choice(list(Action))
+        rows_removed = _step(field, model, commands[action])
+        writer.append(state, action, rows_removed * ROW_SCORE)
+
+
+def _step(field: Field, model: BoardModel, command: t.Callable) -> int:
+    """
+    Runs the action and a gravity step, returns the number of rows they completed. Game removes full rows
+    on the next tick, here they are removed at once - the reward and the next state belong to the right action
+    """
+    rows_removed = model.rows_removed
+    command()
+    field.tick()
+    field.remove_full_rows()
+    for event in field.events_q.drain(timeout=0):
+        model.on_field_event(event)
+    return model.rows_removed - rows_removed
+
+
+def _drop(field: Field):
+    while field.move_down():
+        pass
@@ -0,0 +1,101 @@
+"""Bounded single-producer/single-consumer event channel"""
+import threading
+import time
+import typing as t
+from queue import Empty
+
+EVENT_RING_CAPACITY = 1024
+
+
+class EventRing:  # pylint: disable=too-many-instance-attributes
+    """
+    Fixed size ring of preallocated slots. Producer blocks while the ring is full so memory stays bounded.
+    Only one thread may put and only one thread may get at a time (producer calls could be serialized by a lock).
+    Indexes are changed by one side only, so no lock is taken unless one side has to wait for another
+    """
+
+    def __init__(self, capacity=EVENT_RING_CAPACITY):
+        self.capacity = capacity
+        self._slots: list[t.Any] = [None] * capacity
+        self._head = 0  # next slot to read, changed by consumer only
+        self._tail = 0  # next slot to write, changed by producer only
+        self._not_empty = threading.Event()
+        self._not_full = threading.Event()
+
+        # Statistics
+        self.put_count = 0
+        self.high_water_mark = 0
+        self.overflow_count = 0  # how many times producer found the ring full
+        self.dropped_count = 0  # how many items were not put because of timeout
+
+    def __len__(self):
+        return self._tail - self._head
+
+    def put(self, item: t.Any, timeout: float | None = None) -> bool:
+        """
+        Puts item, waits for a free slot if the ring is full
+        :param timeout: - how long to wait for a free slot, None - forever
+        :returns: False if item was dropped by timeout
+        """
+        if self._tail - self._head >= self.capacity:
+            self.overflow_count += 1
+            if not self._wait(self._not_full, lambda: self._tail - self._head < self.capacity, timeout):
+                self.dropped_count += 1
+                return False
+
+        self._slots[self._tail % self.capacity] = item
+        self._tail += 1
+        self.put_count += 1
+        self.high_water_mark = max(self.high_water_mark, self._tail - self._head)
+        if not self._not_empty.is_set():
+            self._not_empty.set()
+        return True
+
+    def get(self, block=True, timeout: float | None = None) -> t.Any:
+        """Same as Queue.get - returns one item, raises queue.Empty if there is nothing"""
+        items = self.drain(max_items=1, timeout=timeout if block else 0)
+        if not items:
+            raise Empty
+        return items[0]
+
+    def drain(self, max_items: int | None = None, timeout: float | None = None) -> list[t.Any]:
+        """
+        Returns all available items (but not more than max_items), waits if there is nothing
+        :param timeout: - how long to wait for the first item, None - forever
+        """
+        if not self._wait(self._not_empty, lambda: self._tail != self._head, timeout):
+            return []
+
+        count = self._tail - self._head if max_items is None else min(self._tail - self._head, max_items)
+        items = []
+        for _ in range(count):
+            index = self._head % self.capacity
+            items.append(self._slots[index])
+            self._slots[index] = None  # don't keep references to consumed items
+            self._head += 1
+        if not self._not_full.is_set():
+            self._not_full.set()
+        return items
+
+    def stats(self) -> dict:
+        """Ring usage statistics"""
+        return {'capacity': self.capacity,
+                'depth': len(self),
+                'high_water_mark': self.high_water_mark,
+                'put_count': self.put_count,
+                'overflow_count': self.overflow_count,
+                'dropped_count': self.dropped_count}
+
+    @staticmethod
+    def _wait(event: threading.Event, is_ready: t.Callable[[], bool], timeout: float | None) -> bool:
+        """Waits until is_ready() is True, the other side sets the event after each change"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not is_ready():
+            event.clear()
+            if is_ready():  # the other side could change the ring before clear()
+                break
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            event.wait(remaining)
+        return True
@@ -1,17 +1,22 @@
 """Game field logic"""
-import dataclasses
+import contextlib
 import enum
+import itertools
 import random
 import threading
+import time
 import typing as t
 from collections import OrderedDict
-from queue import Queue
 
-from .logger import logger
+from .event_ring import EventRing
+from .logger import get_logger
 from .figures import Point, Figure, all_figures
+from .rotation import KickTable, RotationEngine
 
 FIELD_HIDDEN_TOP_ROWS_NUMBER = 4
 
+logger = get_logger('field')
+
 
 class CellState(enum.IntEnum):
     """
@@ -34,26 +39,57 @@ class FieldEventType(enum.StrEnum):
     NEW_FIGURE = enum.auto()
 
 
-@dataclasses.dataclass
-class FieldEvent:
-    """Event data"""
+class FieldEvent(t.NamedTuple):
+    """
+    Event data. For CELL_STATE_CHANGE payload is a packed cell delta: ((state, (cell index, ...)), ...),
+    where cell index is y * width + x of visible field part, see unpack_cell_delta
+    """
     event_type: FieldEventType
     payload: t.Any = None
+    trace: list[float] | None = None  # latency trace of input event caused this one, see latency.py
+
 
+CellDelta = tuple[tuple[CellState, tuple[int, ...]], ...]
 
-class Field:
+
+def unpack_cell_delta(payload: CellDelta, width: int) -> t.OrderedDict[CellState, set[Point]]:
+    """Converts packed CELL_STATE_CHANGE payload to points, order of states is kept"""
+    return OrderedDict((cell_state, {Point(index % width, index // width) for index in cells})
+                       for cell_state, cells in payload)
+
+
+class Field:  # pylint: disable=too-many-instance-attributes
     """
     Game field - provides methods to manipulate figures and queue to monitor changes
     """
 
-    def __init__(self, width: int, height: int):
+    def __init__(self, width: int, height: int, rng: random.Random | None = None,
+                 kick_table: KickTable | None = None):
+        """
+        :param rng: - random generator for figures, pass seeded one to get the same figures sequence
+        :param kick_table: - where to try to put rotated figure, see rotation.py, CLASSIC_KICKS by default
+        """
         self.width = width
         self.height = height
+        self._rng = rng or random.Random()
         self._cell_states = [[CellState.EMPTY for _ in range(height)] for _ in range(width)]
+        self._filled_rows = [0] * height  # bit x is set if cell x of the row is FILLED
+        self._rotation_engine = RotationEngine(kick_table)
         self._field_lock = threading.RLock()  # block simultaneous changes
         self._figure: Figure | None = None  # Current falling figure
-        self._next_figure: Figure | None = random.choice(all_figures)()  # Next figure to spawn
-        self.events_q: "Queue[FieldEvent]" = Queue()  # cells events
+        self._next_figure: Figure | None = self._rng.choice(all_figures)(self._rng)  # Next figure to spawn
+        self.events_q: EventRing = EventRing()  # FieldEvent-s
+        self._input_trace: list[float] | None = None  # trace of input event which is being processed now
+
+    @contextlib.contextmanager
+    def input_trace(self, trace: list[float] | None):
+        """Cell changes made inside 'with' block continue given input latency trace"""
+        with self._field_lock:
+            self._input_trace = trace
+            try:
+                yield
+            finally:
+                self._input_trace = None
 
     def _move(self, x_diff=0, y_diff=0) -> bool:
         """Move current figure"""
@@ -76,32 +112,30 @@ class Field:
 
     def tick(self) -> bool:
         """What to do on each step"""
-        # Check if there is some row to destroy
-        self._destroy_full_row()
+        with self._field_lock:  # events_q takes one producer at a time, moves come from another thread
+            # Check if there is some row to destroy
+            self._destroy_full_row()
 
-        # Spawn figure if needed (on startup)
-        if self._figure is None:
-            self._new_figure()
+            # Spawn figure if needed (on startup)
+            if self._figure is None:
+                self._new_figure()
 
-        # Try to move current fig down
-        if not self.move_down():
-            return self._new_figure()  # try spawn new figure if we cannot move current
+            # Try to move current fig down
+            if not self.move_down():
+                return self._new_figure()  # try spawn new figure if we cannot move current
 
-        return True
+            return True
 
     def rotate(self) -> bool:
         """Rotate current figure clockwise"""
-        if self._figure.position is None:
-            return False
         with self._field_lock:
-            for position in [self._figure.position,
-                             (Point(self._figure.position.x - 1, self._figure.position.y)),
-                             (Point(self._figure.position.x + 1, self._figure.position.y)),
-                             (Point(self._figure.position.x - 2, self._figure.position.y)),
-                             (Point(self._figure.position.x + 2, self._figure.position.y))]:
-                if self._try_place(position, next_rotation=True):
-                    return True
-            return False
+            if self._figure is None or self._figure.position is None:  # Figure isn't spawned yet
+                return False
+            position = self._rotation_engine.find_position(self._figure, self._filled_rows, self.width)
+            if position is None:
+                return False
+            self._place(position, next_rotation=True)
+            return True
 
     def _fix_figure(self):
         result = OrderedDict()
@@ -118,7 +152,7 @@ class Field:
                 self._fix_figure()
 
             self._figure = self._next_figure
-            self._next_figure = random.choice(all_figures)()
+            self._next_figure = self._rng.choice(all_figures)(self._rng)
             self.events_q.put(FieldEvent(FieldEventType.NEW_FIGURE,
                                          self._next_figure.get_points(position=Point(0, 0))))
             if not self._try_place(Point(int(self.width / 2) - 1, 0)):  # if it's False - game over
@@ -138,11 +172,28 @@ class Field:
         assert 0 <= y < self.height
         with self._field_lock:
             self._cell_states[x][y] = cell
+            if cell == CellState.FILLED:
+                self._filled_rows[y] |= 1 << x
+            else:
+                self._filled_rows[y] &= ~(1 << x)
+
+    def cell_states(self) -> tuple[CellState, ...]:
+        """States of all cells including hidden rows, column by column - index is x * height + y"""
+        with self._field_lock:
+            return tuple(itertools.chain.from_iterable(self._cell_states))
+
+    def remove_full_rows(self) -> int:
+        """Removes all full rows right now, tick() removes one per call. Returns how many were removed"""
+        removed = 0
+        with self._field_lock:
+            while self._destroy_full_row():
+                removed += 1
+        return removed
 
-    def _destroy_full_row(self):
+    def _destroy_full_row(self) -> bool:
         row_index = self._get_full_row()
         if row_index is None:
-            return
+            return False
 
         cells_to_destroy = {Point(x, row_index) for x in range(self.width)}
         cells_to_move_down = set()
@@ -155,6 +206,7 @@ class Field:
         self._apply_changes(OrderedDict({CellState.EMPTY: cells_to_destroy,
                                          CellState.FILLED: cells_to_move_down}))
         self.events_q.put(FieldEvent(FieldEventType.ROW_REMOVED))
+        return True
 
     def _get_full_row(self) -> int | None:
         with self._field_lock:
@@ -179,17 +231,20 @@ class Field:
             return True
 
     def _apply_changes(self, changed_points: t.OrderedDict[CellState, set[Point]]):
-        """Apply a bunch of changes to the field"""
+        """Apply a bunch of changes to the field, all of them go to one event"""
         with self._field_lock:
+            graphics_patch = []
             for cell_state, points in changed_points.items():
-                graphics_patch = {cell_state: set()}
+                cells = []
                 for point in points:
                     self._set(point.x, point.y, cell_state)
                     # make conversions to hide top cells from graphics - virtually move field up and ignore top rows
                     fake_y = point.y - FIELD_HIDDEN_TOP_ROWS_NUMBER
                     if fake_y >= 0:
-                        graphics_patch[cell_state].add(Point(point.x, fake_y))
-                self.events_q.put(FieldEvent(FieldEventType.CELL_STATE_CHANGE, graphics_patch))
+                        cells.append(fake_y * self.width + point.x)
+                graphics_patch.append((cell_state, tuple(cells)))
+            trace = None if self._input_trace is None else self._input_trace + [time.perf_counter()]
+            self.events_q.put(FieldEvent(FieldEventType.CELL_STATE_CHANGE, tuple(graphics_patch), trace))
             # logger.debug('Field after _apply_changes: %s', self)
 
     def _try_place(self, new_position: Point, next_rotation=False) -> bool:
@@ -199,13 +254,19 @@ class Field:
         """
         with self._field_lock:
             # Check if we can place figure into new position
-            points_to_clear = self._figure.get_points()
             target_points = self._figure.get_points(new_position, next_rotation)
             if not self._can_place(target_points):
-                # logger.debug(f'Cannot place figure to {new_position}{" with next rotation" if next_rotation else ""}')
+                # logger.debug('Cannot place figure to %s, next rotation: %s', new_position, next_rotation)
                 return False
+            self._place(new_position, next_rotation, target_points)
+            return True
 
-            # Can place figure, now clear its old points and fill new
+    def _place(self, new_position: Point, next_rotation=False, target_points: set[Point] | None = None):
+        """Moves figure to the position which is known to be free"""
+        with self._field_lock:
+            points_to_clear = self._figure.get_points()
+            if target_points is None:
+                target_points = self._figure.get_points(new_position, next_rotation)
             self._figure.position = new_position
             if next_rotation:
                 self._figure.rotate()
@@ -214,7 +275,6 @@ class Field:
             result[CellState.EMPTY] = points_to_clear
             result[CellState.FALLING] = target_points
             self._apply_changes(result)
-            return True
 
     def __str__(self):
         header = '   ' + ''.join([f' {i} ' for i in range(self.width)]) + '  \n'
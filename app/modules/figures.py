@@ -24,14 +24,27 @@ class Figure(dict[Rotation, set[tuple[int, int]]]):
     Saves a set of figure points and rules of rotation
     """
 
-    def __init__(self):
+    def __init__(self, rng: random.Random | None = None):
+        """
+        :param rng: - random generator for initial rotation, module one if None
+        """
         super().__init__()
         self.position: Point | None = None  # Stores position on field
         self._rotation_generator = itertools.cycle(Rotation)
-        for _ in range(random.randint(1, 4)):
+        for _ in range((rng or random).randint(1, 4)):
             self._rotation = next(self._rotation_generator)
         self._next_rotation = next(self._rotation_generator)
 
+    @property
+    def rotation(self) -> Rotation:
+        """Current rotation"""
+        return self._rotation
+
+    @property
+    def next_rotation(self) -> Rotation:
+        """Rotation after rotate()"""
+        return self._next_rotation
+
     def _rotation_matrix(self, rotation=None) -> set[Point]:
         """Return rotation matrix"""
         return {Point(x, y) for x, y in self.get(rotation if rotation is not None else self._rotation, set())}
@@ -60,8 +73,8 @@ class Figure(dict[Rotation, set[tuple[int, int]]]):
 class ZFigure(Figure):
     """Represents "Z" figure """
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, rng: random.Random | None = None):
+        super().__init__(rng)
         self[Rotation.NORTH] = self[Rotation.SOUTH] = {(0, 2), (0, 3), (1, 1), (1, 2)}
         self[Rotation.EAST] = self[Rotation.WEST] = {(0, 2), (1, 2), (1, 3), (2, 3)}
 
@@ -69,8 +82,8 @@ class ZFigure(Figure):
 class SFigure(Figure):
     """Represents "S" figure"""
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, rng: random.Random | None = None):
+        super().__init__(rng)
         self[Rotation.NORTH] = self[Rotation.SOUTH] = {(0, 1), (0, 2), (1, 2), (1, 3)}
         self[Rotation.EAST] = self[Rotation.WEST] = {(0, 3), (1, 2), (1, 3), (2, 2)}
 
@@ -78,8 +91,8 @@ class SFigure(Figure):
 class TFigure(Figure):
     """Represents "T" figure"""
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, rng: random.Random | None = None):
+        super().__init__(rng)
         self[Rotation.NORTH] = {(0, 3), (1, 2), (1, 3), (2, 3)}
         self[Rotation.EAST] = {(0, 1), (0, 2), (0, 3), (1, 2)}
         self[Rotation.SOUTH] = {(0, 2), (1, 2), (2, 2), (1, 3)}
@@ -89,8 +102,8 @@ class TFigure(Figure):
 class IFigure(Figure):
     """Represents "I" figure"""
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, rng: random.Random | None = None):
+        super().__init__(rng)
         self[Rotation.NORTH] = self[Rotation.SOUTH] = {(1, 0), (1, 1), (1, 2), (1, 3)}
         self[Rotation.EAST] = self[Rotation.WEST] = {(0, 3), (1, 3), (2, 3), (3, 3)}
 
@@ -98,8 +111,8 @@ class IFigure(Figure):
 class OFigure(Figure):
     """Represents "O" figure"""
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, rng: random.Random | None = None):
+        super().__init__(rng)
         self[Rotation.NORTH] = self[Rotation.SOUTH] = self[Rotation.WEST] = self[Rotation.EAST] \
             = {(0, 2), (0, 3), (1, 2), (1, 3)}
 
@@ -107,8 +120,8 @@ class OFigure(Figure):
 class LFigure(Figure):
     """Represents "L" figure"""
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, rng: random.Random | None = None):
+        super().__init__(rng)
         self[Rotation.NORTH] = {(0, 1), (0, 2), (0, 3), (1, 3)}
         self[Rotation.EAST] = {(0, 2), (0, 3), (1, 2), (2, 2)}
         self[Rotation.SOUTH] = {(0, 1), (1, 1), (1, 2), (1, 3)}
@@ -118,8 +131,8 @@ class LFigure(Figure):
 class RLFigure(Figure):
     """Represents "Reversed L" figure"""
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, rng: random.Random | None = None):
+        super().__init__(rng)
         self[Rotation.NORTH] = {(0, 3), (1, 1), (1, 2), (1, 3)}
         self[Rotation.EAST] = {(0, 2), (0, 3), (1, 3), (2, 3)}
         self[Rotation.SOUTH] = {(0, 1), (0, 2), (0, 3), (1, 1)}
@@ -0,0 +1,410 @@
+"""
+Differential fuzzing of Field backends. Random seeded command sequences are played on the reference field
+with the original list-based rules and on a candidate backend, after every command both must return the same
+result, emit the same events and have the same cells, score and game-over state.
+A failing sequence is shrunk to a minimal one which still fails
+"""
+# pylint: disable=duplicate-code  # reference rules are copied from Field on purpose, they must not be shared
+import concurrent.futures
+import dataclasses
+import enum
+import itertools
+import os
+import random
+import time
+import typing as t
+from collections import OrderedDict
+
+from .field import CellState, Field, FieldEvent, FieldEventType, FIELD_HIDDEN_TOP_ROWS_NUMBER
+from .figures import Figure, Point, all_figures
+from .game import FIELD_HEIGHT, FIELD_WIDTH
+
+ROW_SCORE = 10  # the same as Game gives
+CASE_LENGTH = 2000  # commands in one random sequence
+CASES_PER_TASK = 20  # cases one worker process runs at once
+
+
+class Command(enum.IntEnum):
+    """What a sequence could do with the field"""
+    LEFT = 0
+    RIGHT = 1
+    ROTATE = 2
+    DOWN = 3  # force down by player
+    TICK = 4  # gravity
+
+
+# Ticks are more frequent so figures reach the bottom and rows are filled
+COMMAND_WEIGHTS = {Command.LEFT: 3, Command.RIGHT: 3, Command.ROTATE: 2, Command.DOWN: 2, Command.TICK: 4}
+
+
+class Backend(t.Protocol):
+    """Field implementation under test"""
+
+    def execute(self, command: Command) -> bool:
+        """Applies the command, returns what the field method returned"""
+
+    def drain_events(self) -> list[FieldEvent]:
+        """Events emitted since the last call"""
+
+    def cell_states(self) -> tuple[int, ...]:
+        """States of all cells including hidden rows, see Field.cell_states()"""
+
+
+BackendFactory = t.Callable[[int], Backend]  # gets field seed, figures must follow random.Random(seed)
+
+
+class FieldBackend:
+    """Any Field-like class as a backend"""
+
+    def __init__(self, field: 'Field | ReferenceField'):
+        self.field = field
+        self._commands = {Command.LEFT: field.move_left, Command.RIGHT: field.move_right,
+                          Command.ROTATE: field.rotate, Command.DOWN: field.move_down, Command.TICK: field.tick}
+
+    def execute(self, command: Command) -> bool:
+        """Calls the field method"""
+        return self._commands[command]()
+
+    def drain_events(self) -> list[FieldEvent]:
+        """Empties events ring of the field"""
+        return self.field.events_q.drain(timeout=0)
+
+    def cell_states(self) -> tuple[int, ...]:
+        """Cells of the field"""
+        return self.field.cell_states()
+
+
+class ReferenceField:  # pylint: disable=too-many-instance-attributes
+    """
+    Rules of the list-based Field as it was first written, kept apart from Field so optimizations of Field
+    can't change them: cells are a list of columns, every check scans cells one by one, rotation tries
+    the same place, then one and two cells left and right. Events follow today's FieldEvent format
+    """
+
+    def __init__(self, width: int, height: int, rng: random.Random):
+        self.width = width
+        self.height = height
+        self._rng = rng
+        self._cell_states = [[CellState.EMPTY for _ in range(height)] for _ in range(width)]
+        self._figure: Figure | None = None
+        self._next_figure: Figure = self._rng.choice(all_figures)(self._rng)
+        self.events: list[FieldEvent] = []
+
+    def cell_states(self) -> tuple[CellState, ...]:
+        """The same as Field.cell_states()"""
+        return tuple(state for column in self._cell_states for state in column)
+
+    def _move(self, x_diff=0, y_diff=0) -> bool:
+        if self._figure is None or self._figure.position is None:
+            return False
+        return self._try_place(Point(self._figure.position.x + x_diff, self._figure.position.y + y_diff))
+
+    def move_left(self) -> bool:
+        """Move current figure one cell left"""
+        return self._move(x_diff=-1)
+
+    def move_right(self) -> bool:
+        """Move current figure one cell right"""
+        return self._move(x_diff=1)
+
+    def move_down(self) -> bool:
+        """Move current figure one cell down"""
+        return self._move(y_diff=1)
+
+    def tick(self) -> bool:
+        """Removes a full row, spawns the first figure, moves the figure down or fixes it and spawns the next"""
+        self._destroy_full_row()
+        if self._figure is None:
+            self._new_figure()
+        if not self.move_down():
+            return self._new_figure()
+        return True
+
+    def rotate(self) -> bool:
+        """Rotate current figure clockwise"""
+        if self._figure is None or self._figure.position is None:
+            return False
+        for x_offset in (0, -1, 1, -2, 2):
+            if self._try_place(Point(self._figure.position.x + x_offset, self._figure.position.y),
+                               next_rotation=True):
+                return True
+        return False
+
+    def _fix_figure(self):
+        points = self._figure.get_points()
+        self._apply_changes(OrderedDict({CellState.EMPTY: points, CellState.FILLED: points}))
+        self.events.append(FieldEvent(FieldEventType.FIGURE_FIXED))
+
+    def _new_figure(self) -> bool:
+        if self._figure is not None:
+            self._fix_figure()
+        self._figure = self._next_figure
+        self._next_figure = self._rng.choice(all_figures)(self._rng)
+        self.events.append(FieldEvent(FieldEventType.NEW_FIGURE, self._next_figure.get_points(position=Point(0, 0))))
+        if not self._try_place(Point(int(self.width / 2) - 1, 0)):
+            self.events.append(FieldEvent(FieldEventType.GAME_OVER))
+            return False
+        return True
+
+    def _destroy_full_row(self):
+        row_index = self._get_full_row()
+        if row_index is None:
+            return
+        cells_to_destroy = {Point(x, row_index) for x in range(self.width)}
+        cells_to_move_down = set()
+        for x in range(self.width):
+            for y in range(0, row_index):
+                if self._cell_states[x][y] == CellState.FILLED:
+                    cells_to_move_down.add(Point(x, y + 1))
+                    cells_to_destroy.add(Point(x, y))
+        self._apply_changes(OrderedDict({CellState.EMPTY: cells_to_destroy, CellState.FILLED: cells_to_move_down}))
+        self.events.append(FieldEvent(FieldEventType.ROW_REMOVED))
+
+    def _get_full_row(self) -> int | None:
+        for y in range(self.height - 1, -1, -1):
+            if all(self._cell_states[x][y] == CellState.FILLED for x in range(self.width)):
+                return y
+        return None
+
+    def _can_place(self, points: set[Point]) -> bool:
+        return all(0 <= x < self.width and 0 <= y < self.height and self._cell_states[x][y] != CellState.FILLED
+                   for x, y in points)
+
+    def _apply_changes(self, changed_points: t.OrderedDict[CellState, set[Point]]):
+        graphics_patch = []
+        for cell_state, points in changed_points.items():
+            cells = []
+            for x, y in points:
+                self._cell_states[x][y] = cell_state
+                if y >= FIELD_HIDDEN_TOP_ROWS_NUMBER:
+                    cells.append((y - FIELD_HIDDEN_TOP_ROWS_NUMBER) * self.width + x)
+            graphics_patch.append((cell_state, tuple(cells)))
+        self.events.append(FieldEvent(FieldEventType.CELL_STATE_CHANGE, tuple(graphics_patch)))
+
+    def _try_place(self, new_position: Point, next_rotation=False) -> bool:
+        points_to_clear = self._figure.get_points()
+        target_points = self._figure.get_points(new_position, next_rotation)
+        if not self._can_place(target_points):
+            return False
+        self._figure.position = new_position
+        if next_rotation:
+            self._figure.rotate()
+        self._apply_changes(OrderedDict({CellState.EMPTY: points_to_clear, CellState.FALLING: target_points}))
+        return True
+
+
+class ReferenceBackend(FieldBackend):
+    """ReferenceField as a backend"""
+
+    def drain_events(self) -> list[FieldEvent]:
+        """Takes events the field has collected"""
+        events, self.field.events = self.field.events, []
+        return events
+
+
+def _new_field(field_class: type[Field] | type[ReferenceField], seed: int, **kwargs) -> Field | ReferenceField:
+    return field_class(FIELD_WIDTH, FIELD_HEIGHT + FIELD_HIDDEN_TOP_ROWS_NUMBER, random.Random(seed), **kwargs)
+
+
+def reference_backend(seed: int) -> Backend:
+    """The rules every backend must follow"""
+    return ReferenceBackend(_new_field(ReferenceField, seed))
+
+
+def field_backend(seed: int) -> Backend:
+    """Field of the game: rotation by kick table over bitmask rows"""
+    return FieldBackend(_new_field(Field, seed))
+
+
+# Name -> factory, names are given to worker processes and command line
+BACKENDS: dict[str, BackendFactory] = {
+    'field': field_backend,
+}
+
+
+@dataclasses.dataclass(frozen=True)
+class Case:
+    """Field seed and commands played from the start of a game"""
+    seed: int
+    commands: tuple[Command, ...]
+
+    def format(self) -> str:
+        """Short text to reproduce the case"""
+        return f'seed={self.seed} commands={" ".join(command.name for command in self.commands)}'
+
+
+@dataclasses.dataclass(frozen=True)
+class Divergence:
+    """First difference between the reference and the candidate"""
+    step: int  # index of the command after which the difference was seen
+    what: str  # result, events, cells, score or game_over
+    expected: t.Any
+    actual: t.Any
+
+
+def random_case(case_seed: int, length=CASE_LENGTH) -> Case:
+    """Commands and field seed made from the case seed only"""
+    rng = random.Random(case_seed)
+    commands = rng.choices(list(COMMAND_WEIGHTS), weights=list(COMMAND_WEIGHTS.values()), k=length)
+    return Case(rng.getrandbits(32), tuple(commands))
+
+
+def _normalize(events: list[FieldEvent]) -> tuple:
+    """Events without latency traces, cells of one change are sorted - they come from sets"""
+    return tuple((event.event_type, tuple((state, tuple(sorted(cells))) for state, cells in event.payload)
+                  if event.event_type == FieldEventType.CELL_STATE_CHANGE else event.payload)
+                 for event in events)
+
+
+class _Observer:  # pylint: disable=too-few-public-methods
+    """Keeps score and game-over state of a backend from its events"""
+
+    def __init__(self, backend: Backend):
+        self.backend = backend
+        self.score = 0
+        self.is_game_over = False
+
+    def observe(self, command: Command) -> dict[str, t.Any]:
+        """Executes the command, returns everything which is compared"""
+        result = self.backend.execute(command)
+        events = _normalize(self.backend.drain_events())
+        for event_type, _ in events:
+            if event_type == FieldEventType.ROW_REMOVED:
+                self.score += ROW_SCORE
+            elif event_type == FieldEventType.GAME_OVER:
+                self.is_game_over = True
+        return {'result': result, 'events': events, 'cells': self.backend.cell_states(),
+                'score': self.score, 'game_over': self.is_game_over}
+
+
+def run_case(case: Case, candidate: BackendFactory, reference: BackendFactory = reference_backend) -> \
+        tuple[Divergence | None, int]:
+    """
+    Plays the case on both backends until the first difference or game over
+    :return: - the difference or None, number of steps played
+    """
+    expected_observer, actual_observer = _Observer(reference(case.seed)), _Observer(candidate(case.seed))
+    for step, command in enumerate(case.commands):
+        expected, actual = expected_observer.observe(command), actual_observer.observe(command)
+        if expected != actual:
+            what = next(name for name, value in expected.items() if value != actual[name])
+            return Divergence(step, what, expected[what], actual[what]), step + 1
+        if expected['game_over']:
+            return None, step + 1
+    return None, len(case.commands)
+
+
+def shrink(case: Case, candidate: BackendFactory, reference: BackendFactory = reference_backend) -> Case:
+    """
+    Removes commands while the case still fails - the tail after the divergence first, then chunks
+    of halving size down to single commands (delta debugging). No single command could be removed from the result
+    """
+    divergence, _ = run_case(case, candidate, reference)
+    if divergence is None:
+        return case
+    commands = list(case.commands[:divergence.step + 1])
+    shrunk = True
+    while shrunk:  # a removal could make other commands removable, repeat until nothing goes
+        shrunk = False
+        chunk = len(commands) // 2
+        while chunk >= 1:
+            start = 0
+            while start < len(commands):
+                shorter = Case(case.seed, tuple(commands[:start] + commands[start + chunk:]))
+                divergence, _ = run_case(shorter, candidate, reference)
+                if divergence is not None:
+                    commands = list(shorter.commands[:divergence.step + 1])
+                    shrunk = True
+                else:
+                    start += chunk
+            chunk //= 2
+    return Case(case.seed, tuple(commands))
+
+
+@dataclasses.dataclass
+class FuzzResult:
+    """What fuzz() has done"""
+    cases: int
+    steps: int
+    elapsed_sec: float
+    failure: Case | None = None  # shrunk
+    divergence: Divergence | None = None  # of the shrunk case
+
+    def format_report(self) -> str:
+        """Human-readable summary"""
+        lines = [f'{self.cases} cases, {self.steps} steps in {self.elapsed_sec:.1f} s, '
+                 f'{self.steps / max(self.elapsed_sec, 1e-9) * 60:.0f} steps/min, '
+                 f'{"FAILED" if self.failure else "PASSED"}']
+        if self.failure is not None:
+            lines.append(f'  Minimal case ({len(self.failure.commands)} commands): {self.failure.format()}')
+            lines.append(f'  Step {self.divergence.step}: {self.divergence.what} differ')
+            lines.append(f'    expected: {self.divergence.expected}')
+            lines.append(f'    actual:   {self.divergence.actual}')
+        return '\n'.join(lines)
+
+
+def _run_cases(backend_name: str, case_seeds: range, length: int) -> tuple[int, int | None]:
+    """Worker task: returns steps played and seed of the first failing case"""
+    steps = 0
+    for case_seed in case_seeds:
+        divergence, case_steps = run_case(random_case(case_seed, length), BACKENDS[backend_name])
+        steps += case_steps
+        if divergence is not None:
+            return steps, case_seed
+    return steps, None
+
+
+def _task_seeds(seed: int, max_cases: int | None) -> t.Iterator[range]:
+    """Case seeds split into worker tasks"""
+    for task_start in itertools.count(seed, CASES_PER_TASK):
+        count = CASES_PER_TASK if max_cases is None else min(CASES_PER_TASK, seed + max_cases - task_start)
+        if count <= 0:
+            return
+        yield range(task_start, task_start + count)
+
+
+def _run_on_pool(backend_name: str, tasks: t.Iterator[range], length: int, workers: int,
+                 end_time: float | None) -> tuple[int, int, list[int]]:
+    """Runs tasks until they or time are over or a case fails, returns cases, steps and seeds of failed cases"""
+    cases, steps, failing_seeds = 0, 0, []
+    pending: dict[concurrent.futures.Future, int] = {}  # task -> cases in it
+
+    def submit(pool: concurrent.futures.Executor):
+        task = next(tasks, None)
+        if task is not None and (end_time is None or time.perf_counter() < end_time):
+            pending[pool.submit(_run_cases, backend_name, task, length)] = len(task)
+
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        for _ in range(workers * 2):  # keep workers busy while results are collected
+            submit(pool)
+        while pending:
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                task_steps, failing_seed = future.result()
+                steps += task_steps
+                cases += pending.pop(future)
+                if failing_seed is not None:
+                    failing_seeds.append(failing_seed)
+                elif not failing_seeds:
+                    submit(pool)
+    return cases, steps, failing_seeds
+
+
+def fuzz(backend_name: str, *, seed=0, duration_sec: float | None = None,  # pylint: disable=too-many-arguments
+         max_cases: int | None = None, length=CASE_LENGTH, workers: int | None = None) -> FuzzResult:
+    """
+    Runs random cases on a process pool until time or cases are over or a case fails, the failing case is shrunk
+    :param backend_name: - key of BACKENDS
+    :param workers: - processes number, CPU count by default
+    """
+    if backend_name not in BACKENDS:
+        raise KeyError(f'Unknown backend "{backend_name}", known: {", ".join(BACKENDS)}')
+    start = time.perf_counter()
+    cases, steps, failing_seeds = _run_on_pool(backend_name, _task_seeds(seed, max_cases), length,
+                                               workers or os.cpu_count() or 1,
+                                               None if duration_sec is None else start + duration_sec)
+    result = FuzzResult(cases, steps, time.perf_counter() - start)
+    if failing_seeds:
+        result.failure = shrink(random_case(min(failing_seeds), length), BACKENDS[backend_name])
+        result.divergence, _ = run_case(result.failure, BACKENDS[backend_name])
+    return result
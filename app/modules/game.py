@@ -1,14 +1,23 @@
 """Main place for game logic"""
-from functools import lru_cache
-
+import random
+import threading
+import time
+import typing as t
+from functools import lru_cache, partial
+from queue import Empty
+
+from .clock import Clock, real_clock
 from .tick_thread import TickThread
-from .field import FieldEventType, Field
+from .field import FieldEvent, FieldEventType, Field, unpack_cell_delta
 from .controls_handler import ControlEventType, ControlsHandler, Commands
 from .abstract_ui import AbstractGUI
-from .logger import logger
+from .logger import get_logger
 
 TICK_INTERVAL = 0.8
 LEVEL_DECREASE = 0.025
+POLL_TIMEOUT_SEC = 0.05  # pollers wait for events not longer than this, so they notice stop()
+
+logger = get_logger('game')
 
 # Default field parameters
 FIELD_HIDDEN_TOP_ROWS_NUMBER = 4
@@ -16,101 +25,183 @@ FIELD_HEIGHT = 20  # In cells
 FIELD_WIDTH = 10  # In cells
 
 
-class Game:  # pylint: disable=too-few-public-methods, too-many-instance-attributes
+class Game:  # pylint: disable=too-few-public-methods, too-many-instance-attributes, too-many-arguments
     """
     Contains information about game logic
     """
 
     def __init__(self, *, width=FIELD_WIDTH, height=FIELD_HEIGHT + FIELD_HIDDEN_TOP_ROWS_NUMBER,
-                 controls_handler: ControlsHandler, gui: AbstractGUI):
+                 controls_handler: ControlsHandler, gui: AbstractGUI, clock: Clock = real_clock,
+                 rng: random.Random | None = None):
         """
         :param width: How many cells one horizontal row contains
         :param height: How many cells one vertical column contains
+        :param clock: Time source, with VirtualClock the game runs only when the clock is advanced
+        :param rng: Random generator of figures, seeded one with VirtualClock makes the game reproducible
         """
         self._controls_handler = controls_handler
         self.gui = gui
-        self._field = Field(width, height)  # An internal structure to store field state (two-dimensional list)
+        self._clock = clock
+        self._field = Field(width, height, rng)  # An internal structure to store field state (two-dimensional list)
 
         self._current_tick = TICK_INTERVAL
         self.paused = False
         self._game_over = False
         self._forcing_speed = False
         self._score = 0
-
-        self._controls_poller_thread = TickThread(self._poll_next_control_event, tick_interval_sec=0.001,
-                                                  startup_sleep_sec=0)
-        self._controls_poller_thread.start()
-
-        self.tick_thread = TickThread(self._tick, TICK_INTERVAL)
-        self.tick_thread.start()
-
-        self._cell_updater_thread = TickThread(self._poll_next_field_event, tick_interval_sec=0.001,
-                                               startup_sleep_sec=0)
-        self._cell_updater_thread.start()
-
-    def _poll_next_control_event(self):
-        event = self._controls_handler.events_q.get()
-        logger.debug(f'Control event: {event}')
+        self.tick_count = 0  # logic ticks since start
+        self._field_listeners: list[t.Callable[[FieldEvent], None]] = []
+
+        self._poller_threads: list[TickThread] = []
+        if clock.blocking:
+            self._poller_threads = [TickThread(self._poll_next_control_event, tick_interval_sec=0.001,
+                                               startup_sleep_sec=0),
+                                    TickThread(partial(self._poll_next_field_event, POLL_TIMEOUT_SEC),
+                                               tick_interval_sec=0.001, startup_sleep_sec=0)]
+        else:
+            # Nothing may block in virtual time - queues are emptied after every clock step instead of polling
+            clock.add_step_hook(self._process_pending_events)
+
+        self.tick_thread = TickThread(self._tick, TICK_INTERVAL, clock=clock)
+        for thread in (*self._poller_threads, self.tick_thread):
+            thread.start()
+
+    def stop(self):
+        """Stops game threads and waits for them, controls handler should be stopped by its owner"""
+        threads = (*self._poller_threads, self.tick_thread)
+        for thread in threads:
+            thread.stop()
+        for thread in threads:
+            if thread.is_alive() and thread is not threading.current_thread():
+                thread.join()
+        if not self._clock.blocking:
+            self._clock.remove_step_hook(self._process_pending_events)
+
+    def add_field_listener(self, listener: t.Callable[[FieldEvent], None]):
+        """
+        Listener gets every field event after GUI, in the field events thread.
+        Add it right after the game is created, so it doesn't miss the first figure
+        """
+        self._field_listeners.append(listener)
+
+    @property
+    def is_over(self) -> bool:
+        """True when a new figure cannot be spawned"""
+        return self._game_over
+
+    @property
+    def field_events_depth(self) -> int:
+        """How many field events are waiting for the GUI"""
+        return len(self._field.events_q)
+
+    def _process_pending_events(self):
+        """Processes everything queued, without waiting - for virtual clock"""
+        while self._poll_next_control_event(block=False):
+            pass
+        self._poll_next_field_event(timeout=0)
+
+    def _poll_next_control_event(self, block=True) -> bool:
+        try:
+            event = self._controls_handler.events_q.get(block=block, timeout=POLL_TIMEOUT_SEC)
+        except Empty:
+            return False
+        if event.trace is not None:
+            event.trace.append(time.perf_counter())
+        logger.debug('Control event: %s', event)
         if event.event_type == ControlEventType.KEY_PRESS:
-            {
-                Commands.MOVE_LEFT: self._on_move_left,
-                Commands.MOVE_RIGHT: self._on_move_right,
-                Commands.ROTATE: self._on_rotate,
-                Commands.FORCE_DOWN: self._on_force_down,
-                Commands.FORCE_DOWN_CANCEL: self._on_force_down_cancel,
-                Commands.PAUSE: self._on_pause,
-                Commands.NEW_GAME: self._on_new_game
-            }[event.payload]()
-
-    def _poll_next_field_event(self):
+            with self._field.input_trace(event.trace):
+                {
+                    Commands.MOVE_LEFT: self._on_move_left,
+                    Commands.MOVE_RIGHT: self._on_move_right,
+                    Commands.SHIFT_LEFT: self._on_shift_left,
+                    Commands.SHIFT_RIGHT: self._on_shift_right,
+                    Commands.ROTATE: self._on_rotate,
+                    Commands.FORCE_DOWN: self._on_force_down,
+                    Commands.FORCE_DOWN_CANCEL: self._on_force_down_cancel,
+                    Commands.PAUSE: self._on_pause,
+                    Commands.NEW_GAME: self._on_new_game
+                }[event.payload]()
+        return True
+
+    def _poll_next_field_event(self, timeout: float | None = None):
         if not self._game_over:
-            event = self._field.events_q.get()
-            # logger.debug(f'Event received, type={event.event_type}')
-
-            # Apply changes on the game field
-            match event.event_type:
-                case FieldEventType.CELL_STATE_CHANGE:
-                    self.gui.apply_field_change(event.payload)
-
-                # We got full row here
-                case FieldEventType.ROW_REMOVED:
-                    self.gui.sounds.row_delete.play()
-                    self._current_tick = self._current_tick \
-                        if self._current_tick <= LEVEL_DECREASE else self._current_tick - LEVEL_DECREASE
-                    if not self._forcing_speed:
-                        self.tick_thread.set_tick(self._current_tick)
-                    self._score += 10
-                    self.gui.show_score(self._score)
-
-                # Figure hit the bottom
-                case FieldEventType.FIGURE_FIXED:
-                    self.gui.sounds.fix_figure.play()
-
-                # Game over
-                case FieldEventType.GAME_OVER:
-                    self._game_over = True
-                    self.tick_thread.stop()
-                    self.gui.sounds.game_over.play()
-
-                # Next figure known
-                case FieldEventType.NEW_FIGURE:
-                    self.gui.show_next_figure(event.payload)
+            self._dispatch_field_events(self._field.events_q.drain(timeout=timeout))
+
+    def _dispatch_field_events(self, events: list[FieldEvent]):
+        for event in events:
+            # logger.debug('Event received, type=%s', event.event_type)
+            self._dispatch_field_event(event)
+            for listener in self._field_listeners:
+                listener(event)
+            if self._game_over:
+                return
+
+    def _dispatch_field_event(self, event: FieldEvent):
+        # Apply changes on the game field
+        match event.event_type:
+            case FieldEventType.CELL_STATE_CHANGE:
+                if event.trace is not None:
+                    event.trace.append(time.perf_counter())
+                self.gui.apply_field_change(unpack_cell_delta(event.payload, self._field.width), event.trace)
+
+            # We got full row here
+            case FieldEventType.ROW_REMOVED:
+                self.gui.sounds.row_delete.play()
+                self._current_tick = self._current_tick \
+                    if self._current_tick <= LEVEL_DECREASE else self._current_tick - LEVEL_DECREASE
+                if not self._forcing_speed:
+                    self.tick_thread.set_tick(self._current_tick)
+                self._score += 10
+                self.gui.show_score(self._score)
+
+            # Figure hit the bottom
+            case FieldEventType.FIGURE_FIXED:
+                self.gui.sounds.fix_figure.play()
+
+            # Game over
+            case FieldEventType.GAME_OVER:
+                self._game_over = True
+                self.tick_thread.stop()
+                self.gui.sounds.game_over.play()
+                self.gui.game_over()
+
+            # Next figure known
+            case FieldEventType.NEW_FIGURE:
+                self.gui.show_next_figure(event.payload)
 
     def _on_new_game(self):
         pass
 
     def _on_move_left(self):
+        if self.paused or self._game_over:
+            return
         self._field.move_left()
         self.gui.sounds.move.play()
 
     def _on_move_right(self):
+        if self.paused or self._game_over:
+            return
         self._field.move_right()
         self.gui.sounds.move.play()
 
+    def _on_shift_left(self):
+        if self.paused or self._game_over:
+            return
+        while self._field.move_left():
+            pass
+        self.gui.sounds.move.play()
+
+    def _on_shift_right(self):
+        if self.paused or self._game_over:
+            return
+        while self._field.move_right():
+            pass
+        self.gui.sounds.move.play()
+
     def _on_force_down(self):
         self._forcing_speed = True
         new_tick = _calc_force_down_tick(self._current_tick)
-        # logger.debug(f'SPEEDUP: {self._current_tick} => {new_tick}')
+        # logger.debug('SPEEDUP: %s => %s', self._current_tick, new_tick)
         self.tick_thread.set_tick(new_tick)
 
     def _on_force_down_cancel(self):
@@ -132,6 +223,7 @@ class Game:  # pylint: disable=too-few-public-methods, too-many-instance-attribu
             return
 
         self._field.tick()
+        self.tick_count += 1
         self.gui.sounds.tick.play()
 
 
@@ -0,0 +1,229 @@
+"""
+Many game sessions in one asyncio process, gravity of all sessions is driven by one timing wheel.
+
+Line protocol, one message per line.
+Client -> server commands:
+    L - move left, R - move right, U - rotate, D - move down, X - drop to the bottom, P - pause
+Server -> client messages:
+    C <state>:<cell>,<cell>... [<state>:...]  - cells changed, state is CellState value,
+        cell is y * width + x of visible field
+    N <cell>,<cell>...  - next figure, cell is y * 4 + x in 4x4 preview
+    F - figure fixed
+    S <score> - row removed, new score
+    G - game over
+    E <text> - error, e.g. unknown command
+"""
+import asyncio
+import itertools
+import math
+import random
+import typing as t
+
+from .field import Field, FieldEventType
+from .game import FIELD_HEIGHT, FIELD_HIDDEN_TOP_ROWS_NUMBER, FIELD_WIDTH, LEVEL_DECREASE, TICK_INTERVAL
+from .logger import get_logger
+
+WHEEL_TICK_SEC = 0.01
+WHEEL_SLOTS = 512
+MAX_SESSIONS = 1000
+MAX_OUTPUT_BUFFER = 64 * 1024  # client which doesn't read its diffs is disconnected
+NEXT_FIGURE_PREVIEW_WIDTH = 4
+
+logger = get_logger('server')
+
+
+class _Timer:  # pylint: disable=too-few-public-methods
+    """Scheduled callback of timing wheel"""
+
+    def __init__(self, expires_tick: int, callback: t.Callable[[], None]):
+        self.expires_tick = expires_tick
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        """Callback won't be called"""
+        self.cancelled = True
+
+
+class TimingWheel:
+    """
+    Hashed timing wheel - scheduling and cancelling are O(1), one clock drives any number of timers.
+    Timer resolution is one wheel tick
+    """
+
+    def __init__(self, tick_sec=WHEEL_TICK_SEC, slots=WHEEL_SLOTS):
+        self.tick_sec = tick_sec
+        self._slots: list[list[_Timer]] = [[] for _ in range(slots)]
+        self.current_tick = 0
+
+    def schedule(self, delay_sec: float, callback: t.Callable[[], None]) -> _Timer:
+        """Calls callback after given delay, rounded up to wheel ticks (at least one tick)"""
+        ticks = math.ceil(delay_sec / self.tick_sec - 1e-9)  # 0.8 / 0.01 is a bit more than 80 in floats
+        timer = _Timer(self.current_tick + max(1, ticks), callback)
+        self._slots[timer.expires_tick % len(self._slots)].append(timer)
+        return timer
+
+    def advance(self, ticks=1):
+        """Moves the wheel forward calling all expired timers"""
+        for _ in range(ticks):
+            self.current_tick += 1
+            slot_index = self.current_tick % len(self._slots)
+            slot = self._slots[slot_index]
+            if not slot:
+                continue
+            # timers scheduled during callbacks go to the new slot list
+            self._slots[slot_index] = []
+            for timer in slot:
+                if timer.cancelled:
+                    continue
+                if timer.expires_tick > self.current_tick:  # not this round of the wheel
+                    self._slots[slot_index].append(timer)
+                    continue
+                timer.callback()
+
+    async def run(self):
+        """Advances the wheel in real time, catches up if the loop was busy"""
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        while True:
+            await asyncio.sleep(max(start + (self.current_tick + 1) * self.tick_sec - loop.time(), 0))
+            self.advance(max(int((loop.time() - start) / self.tick_sec) - self.current_tick, 1))
+
+
+class GameSession:  # pylint: disable=too-many-instance-attributes
+    """One game: field, gravity timer and encoder of field events to protocol lines"""
+
+    def __init__(self, wheel: TimingWheel, send: t.Callable[[str], None], rng: random.Random | None = None):
+        """
+        :param send: - called with protocol text (one or more lines)
+        """
+        self._wheel = wheel
+        self._send = send
+        self._field = Field(FIELD_WIDTH, FIELD_HEIGHT + FIELD_HIDDEN_TOP_ROWS_NUMBER, rng)
+        self._tick_interval = TICK_INTERVAL
+        self._score = 0
+        self.paused = False
+        self.game_over = False
+        self.closed = False
+        self._commands = {
+            'L': self._field.move_left,
+            'R': self._field.move_right,
+            'U': self._field.rotate,
+            'D': self._field.move_down,
+            'X': self._drop,
+        }
+        self._timer = wheel.schedule(self._tick_interval, self._on_gravity)
+
+    def handle_command(self, command: str):
+        """Applies client command and sends resulting diffs"""
+        if command == 'P':
+            self.paused = not self.paused
+            return
+        action = self._commands.get(command)
+        if action is None:
+            self._send(f'E unknown command {command!r}\n')
+            return
+        if not self.paused and not self.game_over and not self.closed:
+            action()
+            self._flush()
+
+    def close(self):
+        """Stops gravity, nothing is sent after that"""
+        self.closed = True
+        self._timer.cancel()
+
+    def _drop(self):
+        while self._field.move_down():
+            pass
+
+    def _on_gravity(self):
+        if not self.paused:
+            self._field.tick()
+            self._flush()
+        if not self.game_over and not self.closed:  # could be closed by send()
+            self._timer = self._wheel.schedule(self._tick_interval, self._on_gravity)
+
+    def _flush(self):
+        """Encodes all pending field events, sends them at once"""
+        lines = []
+        for event in self._field.events_q.drain(timeout=0):
+            match event.event_type:
+                case FieldEventType.CELL_STATE_CHANGE:
+                    lines.append('C ' + ' '.join(f'{int(state)}:' + ','.join(map(str, cells))
+                                                 for state, cells in event.payload if cells))
+                case FieldEventType.NEW_FIGURE:
+                    lines.append('N ' + ','.join(str(y * NEXT_FIGURE_PREVIEW_WIDTH + x) for x, y in event.payload))
+                case FieldEventType.FIGURE_FIXED:
+                    lines.append('F')
+                case FieldEventType.ROW_REMOVED:
+                    self._score += 10
+                    if self._tick_interval > LEVEL_DECREASE:
+                        self._tick_interval -= LEVEL_DECREASE
+                    lines.append(f'S {self._score}')
+                case FieldEventType.GAME_OVER:
+                    self.game_over = True
+                    self._timer.cancel()
+                    lines.append('G')
+        if lines and not self.closed:
+            self._send('\n'.join(lines) + '\n')
+
+
+class GameServer:
+    """Accepts clients, each connection plays its own session"""
+
+    def __init__(self, seed: int | None = None, max_sessions=MAX_SESSIONS):
+        """
+        :param seed: - if given every session gets the same figures sequence (e.g. for tournaments)
+        """
+        self.wheel = TimingWheel()
+        self.sessions: set[GameSession] = set()
+        self._seed = seed
+        self._max_sessions = max_sessions
+        self._session_ids = itertools.count()
+
+    async def serve_tcp(self, host: str, port: int):
+        """Runs the server on TCP socket forever"""
+        server = await asyncio.start_server(self._on_client, host, port)
+        await self._serve(server)
+
+    async def serve_unix(self, path: str):
+        """Runs the server on Unix socket forever"""
+        server = await asyncio.start_unix_server(self._on_client, path)
+        await self._serve(server)
+
+    async def _serve(self, server: asyncio.Server):
+        logger.info('Listening on %s', ', '.join(str(s.getsockname()) for s in server.sockets))
+        async with server:
+            await asyncio.gather(server.serve_forever(), self.wheel.run())
+
+    async def _on_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        if len(self.sessions) >= self._max_sessions:
+            writer.write(b'E server is full\n')
+            writer.close()
+            return
+
+        session_id = next(self._session_ids)
+
+        def send(text: str):
+            if writer.transport.get_write_buffer_size() > MAX_OUTPUT_BUFFER:
+                logger.warning('Session %d is too slow to read, disconnecting', session_id)
+                session.close()
+                writer.transport.abort()
+                return
+            writer.write(text.encode('ascii'))
+
+        rng = None if self._seed is None else random.Random(self._seed)
+        session = GameSession(self.wheel, send, rng)
+        self.sessions.add(session)
+        logger.info('Session %d started, %d sessions', session_id, len(self.sessions))
+        try:
+            while line := await reader.readline():
+                for command in line.decode('ascii', errors='replace').split():
+                    session.handle_command(command.upper())
+        except ConnectionError:
+            pass
+        finally:
+            session.close()
+            self.sessions.discard(session)
+            writer.close()
+            logger.info('Session %d finished, %d sessions', session_id, len(self.sessions))
@@ -0,0 +1,118 @@
+"""GUI implementations without display and sound device - for benchmarks, soak tests and bots"""
+import collections
+import dataclasses
+import time
+import typing as t
+
+from .abstract_ui import AbstractGUI
+from .audio import Sounds
+from .field import CellState
+from .figures import Point
+from .latency import latency_tracker
+
+RECENT_CALLS_LIMIT = 1000  # timestamps of this many last calls are kept for each method
+
+
+class _SilentSound:  # pylint: disable=too-few-public-methods
+    """Sound that plays nothing, but counts how many times it was played"""
+
+    def __init__(self):
+        self.play_count = 0
+
+    def play(self):
+        """Same as Voice.play"""
+        self.play_count += 1
+
+
+def silent_sounds() -> Sounds:
+    """Sounds dataclass filled with silent sounds"""
+    return Sounds(**{field.name: _SilentSound() for field in dataclasses.fields(Sounds)})
+
+
+class NullGUI(AbstractGUI):
+    """Throws all output away"""
+
+    def __init__(self):
+        self._sounds = silent_sounds()
+
+    def apply_field_change(self, changed_points: t.OrderedDict[CellState, t.Set[Point]],
+                           trace: list[float] | None = None):
+        latency_tracker.finish(trace)  # nothing to paint
+
+    def toggle_pause(self):
+        pass
+
+    def game_over(self):
+        pass
+
+    def new_game(self):
+        pass
+
+    def show_next_figure(self, points: set[Point]):
+        pass
+
+    def show_score(self, score: int):
+        pass
+
+    @property
+    def sounds(self) -> Sounds:
+        return self._sounds
+
+
+@dataclasses.dataclass
+class CallStats:
+    """How many times a GUI method was called and when"""
+    count: int = 0
+    first_time: float | None = None
+    last_time: float | None = None
+    recent_times: t.Deque[float] = dataclasses.field(
+        default_factory=lambda: collections.deque(maxlen=RECENT_CALLS_LIMIT))
+
+    def add(self, timestamp: float):
+        """Registers one call"""
+        self.count += 1
+        if self.first_time is None:
+            self.first_time = timestamp
+        self.last_time = timestamp
+        self.recent_times.append(timestamp)
+
+
+class RecordingGUI(NullGUI):
+    """
+    Counts and timestamps (perf_counter) every call, keeps the last shown values.
+    Memory doesn't grow with the number of calls, so it's fine for long runs
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.calls: t.DefaultDict[str, CallStats] = collections.defaultdict(CallStats)
+        self.changed_cells_count = 0
+        self.score = 0
+        self.next_figure_points: set[Point] = set()
+        self.is_paused = False
+        self.is_game_over = False
+
+    def apply_field_change(self, changed_points: t.OrderedDict[CellState, t.Set[Point]],
+                           trace: list[float] | None = None):
+        self.calls['apply_field_change'].add(time.perf_counter())
+        self.changed_cells_count += sum(len(points) for points in changed_points.values())
+        latency_tracker.finish(trace)
+
+    def toggle_pause(self):
+        self.calls['toggle_pause'].add(time.perf_counter())
+        self.is_paused = not self.is_paused
+
+    def game_over(self):
+        self.calls['game_over'].add(time.perf_counter())
+        self.is_game_over = True
+
+    def new_game(self):
+        self.calls['new_game'].add(time.perf_counter())
+
+    def show_next_figure(self, points: set[Point]):
+        self.calls['show_next_figure'].add(time.perf_counter())
+        self.next_figure_points = points
+
+    def show_score(self, score: int):
+        self.calls['show_score'].add(time.perf_counter())
+        self.score = score
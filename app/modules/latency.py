@@ -0,0 +1,100 @@
+"""Input latency histograms: key press -> queue -> game logic -> field events queue -> painted"""
+import json
+import pathlib
+import threading
+import time
+
+BUCKET_SEC = 0.0001  # histogram resolution
+MAX_LATENCY_SEC = 2.0  # everything above goes into the last bucket
+PERCENTILES = (50, 95, 99)
+
+# Names of intervals between neighbour timestamps of a trace. 'paint' lasts from the field event dispatch
+# till the change is on screen, so it includes waiting in GUI thread queue, see AbstractGUI.apply_field_change()
+STAGES = ('control queue', 'game logic', 'field events queue', 'paint')
+
+
+class LatencyHistogram:
+    """Fixed size histogram - memory doesn't depend on number of samples"""
+
+    def __init__(self):
+        self._buckets = [0] * (int(MAX_LATENCY_SEC / BUCKET_SEC) + 1)
+        self.count = 0
+        self.max = 0.0
+
+    def add(self, latency_sec: float):
+        """Adds one sample"""
+        self._buckets[min(max(int(latency_sec / BUCKET_SEC), 0), len(self._buckets) - 1)] += 1
+        self.count += 1
+        self.max = max(self.max, latency_sec)
+
+    def percentile(self, percent: float) -> float:
+        """Returns upper bound of the bucket where given percentile falls (but not above max), seconds"""
+        if not self.count:
+            return 0.0
+        rank = self.count * percent / 100
+        seen = 0
+        for index, bucket_count in enumerate(self._buckets):
+            seen += bucket_count
+            if seen >= rank and index < len(self._buckets) - 1:
+                return min((index + 1) * BUCKET_SEC, self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        """Percentiles and max in milliseconds"""
+        result = {'count': self.count, 'max_ms': round(self.max * 1000, 3)}
+        for percent in PERCENTILES:
+            result[f'p{percent}_ms'] = round(self.percentile(percent) * 1000, 3)
+        return result
+
+
+class LatencyTracker:
+    """
+    Collects traces - lists of perf_counter timestamps which follow input event through the game.
+    Does nothing until enabled
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.report_path: pathlib.Path | None = None
+        self.last_total_sec: float | None = None
+        self._lock = threading.Lock()
+        self._histograms = {stage: LatencyHistogram() for stage in STAGES + ('total',)}
+
+    def record(self, trace: list[float]):
+        """Adds complete trace: one timestamp per stage border"""
+        if not self.enabled or len(trace) != len(STAGES) + 1:
+            return
+        with self._lock:
+            for stage, start, end in zip(STAGES, trace, trace[1:]):
+                self._histograms[stage].add(end - start)
+            self.last_total_sec = trace[-1] - trace[0]
+            self._histograms['total'].add(self.last_total_sec)
+
+    def finish(self, trace: list[float] | None):
+        """Adds the last timestamp - the change is painted - and records the trace, None is ignored"""
+        if trace is not None:
+            trace.append(time.perf_counter())
+            self.record(trace)
+
+    def report(self) -> dict:
+        """Percentiles for each stage"""
+        with self._lock:
+            return {stage: histogram.summary() for stage, histogram in self._histograms.items()}
+
+    def format_report(self) -> str:
+        """Human-readable report"""
+        lines = ['Input latency, ms:',
+                 f'  {"stage":<20} {"count":>8}' + ''.join(f' {"p" + str(p):>8}' for p in PERCENTILES) + f' {"max":>8}']
+        for stage, summary in self.report().items():
+            lines.append(f'  {stage:<20} {summary["count"]:>8}' +
+                         ''.join(f' {summary[f"p{p}_ms"]:>8.1f}' for p in PERCENTILES) + f' {summary["max_ms"]:>8.1f}')
+        return '\n'.join(lines)
+
+    def dump(self):
+        """Prints the report and writes it as JSON if path is set"""
+        print(self.format_report())
+        if self.report_path is not None:
+            self.report_path.write_text(json.dumps(self.report(), indent=2), encoding='utf-8')
+
+
+latency_tracker = LatencyTracker()
@@ -1,25 +1,165 @@
-"""Logger module that provides basic logger"""
+"""Logger module that provides non-blocking loggers - records are written by a separate thread"""
+import atexit
 import logging
+import logging.handlers
+import pathlib
+import queue
 import sys
+import threading
+import time
 
+ROOT_LOGGER_NAME = 'Tetris'
+LOG_FORMAT = '%(asctime)s %(name)s [%(levelname)s]: %(message)s'
+DEFAULT_LEVEL = logging.WARNING
 
-class Logger(logging.Logger):
-    """Pre-formatted logger"""
-    def __init__(self, name: str, level):
-        super().__init__(name)
-        stream_handler = logging.StreamHandler(sys.stdout)
-        stream_handler.setLevel(level)
-        formatter = logging.Formatter('%(asctime)s %(name)s [%(levelname)s]: %(message)s')
-        stream_handler.setFormatter(formatter)
-        self.addHandler(stream_handler)
+RATE_LIMIT_WINDOW_SEC = 1.0
+RATE_LIMIT_MAX_MESSAGES = 5  # the same message is written not more than this number of times per window
 
+LOG_FILE_MAX_BYTES = 1024 * 1024
+LOG_FILE_BACKUP_COUNT = 3
+# Records waiting for the listener thread. Until configure_logging() starts it (library use, tests, worker
+# processes) nobody takes them, so the queue is bounded and records which don't fit are dropped
+LOG_QUEUE_SIZE = 10000
 
-def __get_logger():
-    """Generator to made logger initialized once"""
-    one_logger = Logger('Tetris', logging.DEBUG)
-    while True:
-        yield one_logger
+_IMMUTABLE_ARG_TYPES = (str, bytes, int, float, complex, type(None))
 
 
-__get_logger_gen = __get_logger()
-logger = next(__get_logger_gen)
+class _Formatter(logging.Formatter):  # pylint: disable=too-few-public-methods
+    """Mentions how many similar messages were dropped by rate limiter"""
+
+    def format(self, record):
+        text = super().format(record)
+        suppressed = getattr(record, 'suppressed_count', 0)
+        return f'{text} [{suppressed} similar messages suppressed]' if suppressed else text
+
+
+class RateLimitFilter(logging.Filter):  # pylint: disable=too-few-public-methods
+    """
+    Drops repeated messages - same logger, level and message template.
+    The first message after the drop says how many messages were dropped
+    """
+
+    def __init__(self, window_sec=RATE_LIMIT_WINDOW_SEC, max_messages=RATE_LIMIT_MAX_MESSAGES):
+        super().__init__()
+        self.window_sec = window_sec
+        self.max_messages = max_messages
+        self._lock = threading.Lock()
+        self._windows: dict[tuple, list] = {}  # key -> [window start, messages in window, suppressed]
+
+    def filter(self, record):
+        key = (record.name, record.levelno, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.window_sec:
+                suppressed = 0 if window is None else window[2]
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed_count = suppressed
+                return True
+            if window[1] >= self.max_messages:
+                window[2] += 1
+                return False
+            window[1] += 1
+            return True
+
+
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    Standard QueueHandler formats the whole record in the calling thread,
+    this one leaves formatting to the listener thread - game threads only put the record.
+    The message is still built at once if some argument is mutable (e.g. event trace list),
+    otherwise the listener would log its value from a later time. Records are dropped if the queue is full
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped_count = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped_count += 1
+
+    def prepare(self, record):
+        if record.args and not (isinstance(record.args, tuple)
+                                and all(isinstance(arg, _IMMUTABLE_ARG_TYPES) for arg in record.args)):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+class _LoggingPipeline:
+    """
+    Queue + listener thread which writes records to stdout and optional rotating file.
+    The thread is started by configure_logging(), records logged before that wait in the queue
+    if there is room for them
+    """
+
+    def __init__(self):
+        self._queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        self.queue_handler = _LazyQueueHandler(self._queue)
+        self.queue_handler.addFilter(RateLimitFilter())
+        self._listener: logging.handlers.QueueListener | None = None
+        atexit.register(self.stop)
+
+    def set_outputs(self, log_file: pathlib.Path | None = None):
+        """(Re)starts listener with stdout handler and, if given, rotating file handler"""
+        self.stop()
+        formatter = _Formatter(LOG_FORMAT)
+        handlers = [logging.StreamHandler(sys.stdout)]
+        if log_file is not None:
+            handlers.append(logging.handlers.RotatingFileHandler(log_file, maxBytes=LOG_FILE_MAX_BYTES,
+                                                                 backupCount=LOG_FILE_BACKUP_COUNT,
+                                                                 encoding='utf-8'))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+        self._listener = logging.handlers.QueueListener(self._queue, *handlers)
+        self._listener.start()
+        dropped, self.queue_handler.dropped_count = self.queue_handler.dropped_count, 0
+        if dropped:
+            logger.warning('%d log records were dropped, the queue was full', dropped)
+
+    def stop(self):
+        """Writes remaining records and stops listener thread"""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+
+
+def get_logger(module_name: str) -> logging.Logger:
+    """Returns logger of game module, its level could be set separately, see configure_logging()"""
+    return logger.getChild(module_name)
+
+
+def parse_module_levels(specs: list[str]) -> dict[str, str]:
+    """Converts ['game=DEBUG', 'field=INFO'] to {'game': 'DEBUG', 'field': 'INFO'}"""
+    levels = {}
+    for spec in specs:
+        module_name, _, level = spec.partition('=')
+        if not module_name or not level:
+            raise ValueError(f'Module log level should look like "module=LEVEL", got "{spec}"')
+        levels[module_name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(level: str | int = DEFAULT_LEVEL, module_levels: dict[str, str] | None = None,
+                      log_file: pathlib.Path | None = None):
+    """
+    Sets logging levels and outputs, starts the thread which writes records
+    :param level: - level of all game loggers
+    :param module_levels: - levels of particular module loggers, e.g. {'game': 'DEBUG'}
+    :param log_file: - also write logs to this file, it's rotated when becomes too big
+    """
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    for module_name, module_level in (module_levels or {}).items():
+        get_logger(module_name).setLevel(module_level)
+    _pipeline.set_outputs(log_file)
+
+
+logger = logging.getLogger(ROOT_LOGGER_NAME)
+logger.propagate = False  # don't duplicate records if somebody configures root logger
+logger.setLevel(DEFAULT_LEVEL)
+_pipeline = _LoggingPipeline()
+logger.addHandler(_pipeline.queue_handler)
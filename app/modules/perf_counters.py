@@ -0,0 +1,131 @@
+"""Opt-in call counters and timers for hot path methods"""
+import dataclasses
+import functools
+import json
+import pathlib
+import threading
+import time
+import typing as t
+
+from .field import Field
+from .game import Game
+
+PERF_COUNTERS_ENV_VAR = 'TKTETRIS_PERF_COUNTERS'  # path to JSON report, enables counters
+
+
+@dataclasses.dataclass
+class _Stat:
+    """Aggregated values of one counter"""
+    count: int = 0
+    total: float = 0.0
+    min: float = float('inf')
+    max: float = 0.0
+
+    def add(self, value: float):
+        """Adds one measurement"""
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def summary(self, scale: float) -> dict:
+        """Values multiplied by scale, e.g. 1000 to get ms from seconds"""
+        if not self.count:
+            return {'count': 0}
+        return {'count': self.count, 'total': round(self.total * scale, 3),
+                'mean': round(self.total / self.count * scale, 3),
+                'min': round(self.min * scale, 3), 'max': round(self.max * scale, 3)}
+
+
+class PerfCounters:
+    """
+    Wraps methods of given classes with counting timers. Nothing is wrapped until instrument() is called,
+    so disabled counters cost nothing
+    """
+
+    def __init__(self):
+        self.report_path: pathlib.Path | None = None
+        self._lock = threading.Lock()
+        self._timers: dict[str, _Stat] = {}
+        self._gauges: dict[str, _Stat] = {}
+        self._originals: list[tuple[type, str, t.Callable]] = []
+
+    @property
+    def enabled(self) -> bool:
+        """True if something is instrumented"""
+        return bool(self._originals)
+
+    def instrument(self, cls: type, method_names: t.Iterable[str],
+                   gauge: tuple[str, t.Callable[..., float]] | None = None):
+        """
+        Replaces methods of the class with timed ones
+        :param gauge: - (name, function) - function is called with method arguments, its result is sampled
+        """
+        for method_name in method_names:
+            original = getattr(cls, method_name)
+            self._originals.append((cls, method_name, original))
+            setattr(cls, method_name, self._timed(f'{cls.__name__}.{method_name}', original, gauge))
+
+    def restore(self):
+        """Puts original methods back"""
+        for cls, method_name, original in reversed(self._originals):
+            setattr(cls, method_name, original)
+        self._originals.clear()
+
+    def record(self, name: str, duration_sec: float):
+        """Adds timer measurement"""
+        with self._lock:
+            self._timers.setdefault(name, _Stat()).add(duration_sec)
+
+    def sample(self, name: str, value: float):
+        """Adds gauge value, e.g. queue depth"""
+        with self._lock:
+            self._gauges.setdefault(name, _Stat()).add(value)
+
+    def report(self) -> dict:
+        """Timers in milliseconds and gauges as is"""
+        with self._lock:
+            return {'timers_ms': {name: stat.summary(1000) for name, stat in sorted(self._timers.items())},
+                    'gauges': {name: stat.summary(1) for name, stat in sorted(self._gauges.items())}}
+
+    def format_report(self) -> str:
+        """Human-readable table"""
+        report = self.report()
+        header = f'  {"name":<40} {"count":>9} {"total":>10} {"mean":>9} {"min":>9} {"max":>9}'
+        lines = []
+        for title, stats in (('Timers, ms:', report['timers_ms']), ('Gauges:', report['gauges'])):
+            lines += [title, header]
+            for name, stat in stats.items():
+                lines.append(f'  {name:<40} {stat["count"]:>9} {stat["total"]:>10.1f} {stat["mean"]:>9.3f} '
+                             f'{stat["min"]:>9.3f} {stat["max"]:>9.3f}')
+        return '\n'.join(lines)
+
+    def dump(self):
+        """Prints the table and writes JSON if path is set"""
+        print(self.format_report())
+        if self.report_path is not None:
+            self.report_path.write_text(json.dumps(self.report(), indent=2), encoding='utf-8')
+
+    def _timed(self, name: str, method: t.Callable, gauge: tuple[str, t.Callable[..., float]] | None):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            if gauge is not None:
+                self.sample(gauge[0], gauge[1](*args, **kwargs))
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - start)
+
+        return wrapper
+
+
+def instrument_hot_path(counters: PerfCounters):
+    """Instruments game logic hot path"""
+    counters.instrument(Field, ('tick', '_try_place', '_can_place', '_destroy_full_row', '_apply_changes'))
+    counters.instrument(Game, ('_dispatch_field_events',),
+                        gauge=('field events queue depth', lambda _, events: len(events)))
+    counters.instrument(Game, ('_dispatch_field_event',))
+
+
+perf_counters = PerfCounters()
@@ -0,0 +1,94 @@
+"""Performance overlay on top of the game canvas"""
+import time
+import tkinter as tk
+import typing as t
+
+UPDATE_INTERVAL_MS = 250
+HUD_TAG = 'perf_hud'
+HUD_FONT = ('Courier', 9, 'bold')
+HUD_COLOR = 'yellow'
+LINE_HEIGHT = 13
+
+
+class HudMetrics(t.NamedTuple):
+    """Counters HUD is made of, counters are totals since start - HUD calculates rates by itself"""
+    frames: int
+    ticks: int
+    queue_depth: int
+    last_frame_ops: int
+    latency_sec: float | None
+
+
+class PerfHud:  # pylint: disable=too-many-instance-attributes
+    """
+    Shows live metrics a few times per second. Text items are created once and changed only if text differs
+    """
+
+    def __init__(self, widget: tk.Misc, metrics_source: t.Callable[[], HudMetrics]):
+        self._widget = widget
+        self._metrics_source = metrics_source
+        self._canvas: tk.Canvas | None = None
+        self._text_ids: list[int] = []
+        self._texts: list[str] = []
+        self._after_id: str | None = None
+        self._previous: tuple[float, HudMetrics] | None = None
+        self.visible = False
+
+    def attach(self, canvas: tk.Canvas):
+        """Moves HUD to given canvas, e.g. after skin change"""
+        self._canvas = canvas
+        self._text_ids = []
+        self._texts = []
+        if self.visible:
+            self._update()
+
+    def toggle(self):
+        """Shows/hides HUD"""
+        self.visible = not self.visible
+        if self.visible:
+            self._previous = None
+            self._update()
+            return
+        if self._after_id is not None:
+            self._widget.after_cancel(self._after_id)
+            self._after_id = None
+        if self._canvas is not None:
+            self._canvas.delete(HUD_TAG)
+        self._text_ids = []
+        self._texts = []
+
+    def _update(self):
+        if self._after_id is not None:
+            self._widget.after_cancel(self._after_id)
+        self._after_id = self._widget.after(UPDATE_INTERVAL_MS, self._update)
+        if self._canvas is None:
+            return
+
+        now = time.perf_counter()
+        metrics = self._metrics_source()
+        fps = tps = 0.0
+        if self._previous is not None:
+            previous_time, previous = self._previous
+            elapsed = now - previous_time
+            fps = (metrics.frames - previous.frames) / elapsed
+            tps = (metrics.ticks - previous.ticks) / elapsed
+        self._previous = now, metrics
+
+        latency = 'n/a' if metrics.latency_sec is None else f'{metrics.latency_sec * 1000:.1f} ms'
+        self._show([f'FPS     {fps:6.1f}',
+                    f'TPS     {tps:6.1f}',
+                    f'queue   {metrics.queue_depth:6d}',
+                    f'ops     {metrics.last_frame_ops:6d}',
+                    f'latency {latency}'])
+
+    def _show(self, texts: list[str]):
+        if not self._text_ids:
+            self._text_ids = [self._canvas.create_text(5, 5 + i * LINE_HEIGHT, anchor=tk.NW, font=HUD_FONT,
+                                                       fill=HUD_COLOR, tags=HUD_TAG)
+                              for i in range(len(texts))]
+            self._texts = [''] * len(texts)
+        for i, text in enumerate(texts):
+            if text != self._texts[i]:
+                self._canvas.itemconfigure(self._text_ids[i], text=text)
+                self._texts[i] = text
+        self._canvas.tag_raise(HUD_TAG)  # cells painted later shouldn't cover HUD
@@ -0,0 +1,104 @@
+"""Packs skin resources into one indexed file and reads them back via mmap"""
+import json
+import mmap
+import os
+import pathlib
+import struct
+import wave
+
+MAGIC = b'TKRP'
+FORMAT_VERSION = 1
+PACK_FILE_NAME = 'skins.pack'
+
+# magic, format version, size of JSON index which follows the header
+_HEADER = struct.Struct('<4sHI')
+
+
+class ResourcePackError(Exception):
+    """Pack file is broken or has unsupported format"""
+
+
+def _iter_skin_files(res_path: pathlib.Path):
+    """Yields (resource name, file path) for all files skins are made of"""
+    for skin_path in sorted(p for p in res_path.iterdir() if p.is_dir()):
+        for pattern in ('gfx/*.png', 'gfx/*.yaml', 'sound/*.wav'):
+            for file_path in sorted(skin_path.glob(pattern)):
+                yield file_path.relative_to(res_path).as_posix(), file_path
+
+
+def pack_resources(res_path: pathlib.Path, pack_path: pathlib.Path) -> int:
+    """
+    Writes all skins from res_path into one pack file.
+    WAV files are stored as raw PCM with audio params in the index, so they don't need decoding at startup.
+    YAML configs are parsed here and stored in the index too, so yaml isn't needed at startup
+    :returns: number of packed resources
+    """
+    index = {}
+    blobs = []
+    offset = 0
+    for name, file_path in _iter_skin_files(res_path):
+        entry = {}
+        if file_path.suffix == '.wav':
+            with wave.open(str(file_path), 'rb') as wave_file:
+                data = wave_file.readframes(wave_file.getnframes())
+                entry.update(channels=wave_file.getnchannels(),
+                             sample_width=wave_file.getsampwidth(),
+                             sample_rate=wave_file.getframerate())
+        else:
+            data = file_path.read_bytes()
+        if file_path.suffix == '.yaml':
+            import yaml  # pylint: disable=import-outside-toplevel  # build step only
+            entry['config'] = yaml.safe_load(data)
+        entry.update(offset=offset, size=len(data))
+        index[name] = entry
+        blobs.append(data)
+        offset += len(data)
+
+    index_data = json.dumps(index, separators=(',', ':')).encode('utf-8')
+    with pack_path.open('wb') as pack_file:
+        pack_file.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(index_data)))
+        pack_file.write(index_data)
+        for data in blobs:
+            pack_file.write(data)
+    return len(index)
+
+
+class ResourcePack:
+    """
+    Read-only view of a pack file. The file is mapped once and all resources are slices of that mapping
+    """
+
+    def __init__(self, pack_path: pathlib.Path):
+        with pack_path.open('rb') as pack_file:
+            if os.fstat(pack_file.fileno()).st_size < _HEADER.size:  # empty file can't be mapped at all
+                raise ResourcePackError(f'{pack_path} is too short')
+            self._mmap = mmap.mmap(pack_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        magic, version, index_size = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ResourcePackError(f'{pack_path} has unsupported format')
+        if len(self._mmap) < _HEADER.size + index_size:
+            raise ResourcePackError(f'{pack_path} is truncated')
+        self._index: dict[str, dict] = json.loads(bytes(self._view[_HEADER.size:_HEADER.size + index_size]))
+        self._data_offset = _HEADER.size + index_size
+        data_size = max((entry['offset'] + entry['size'] for entry in self._index.values()), default=0)
+        if len(self._mmap) < self._data_offset + data_size:
+            raise ResourcePackError(f'{pack_path} is truncated')
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._index
+
+    def read(self, name: str) -> memoryview:
+        """Returns resource content without copying it"""
+        entry = self._index[name]
+        start = self._data_offset + entry['offset']
+        return self._view[start:start + entry['size']]
+
+    def config(self, name: str) -> dict | None:
+        """Returns parsed config, None if the pack was made without it"""
+        return self._index[name].get('config')
+
+    def audio_params(self, name: str) -> tuple[int, int, int]:
+        """Returns (channels, sample width in bytes, sample rate) of packed PCM"""
+        entry = self._index[name]
+        return entry['channels'], entry['sample_width'], entry['sample_rate']
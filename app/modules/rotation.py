@@ -0,0 +1,91 @@
+"""
+Rotation with wall kicks driven by tables. Field keeps a bitmask of filled cells per row,
+figures are bitmasks per rotation, so every kick try is a few integer operations
+"""
+import typing as t
+
+from .figures import Figure, IFigure, OFigure, Point, Rotation
+
+Kicks = tuple[tuple[int, int], ...]  # (x, y) offsets tried in order, y goes down like field rows
+# figure class (None - any other figure) -> rotation the figure rotates from (clockwise) -> kicks
+KickTable = dict[type[Figure] | None, dict[Rotation, Kicks]]
+
+# What Field always did: the same place, then one and two cells left and right
+CLASSIC_KICKS: KickTable = {None: {rotation: ((0, 0), (-1, 0), (1, 0), (-2, 0), (2, 0)) for rotation in Rotation}}
+
+
+def _y_down(kicks: dict[Rotation, Kicks]) -> dict[Rotation, Kicks]:
+    """SRS tables are written with y going up"""
+    return {rotation: tuple((x, -y) for x, y in offsets) for rotation, offsets in kicks.items()}
+
+
+# Super Rotation System, clockwise transitions
+SRS_KICKS: KickTable = {
+    None: _y_down({
+        Rotation.NORTH: ((0, 0), (-1, 0), (-1, 1), (0, -2), (-1, -2)),
+        Rotation.EAST: ((0, 0), (1, 0), (1, -1), (0, 2), (1, 2)),
+        Rotation.SOUTH: ((0, 0), (1, 0), (1, 1), (0, -2), (1, -2)),
+        Rotation.WEST: ((0, 0), (-1, 0), (-1, -1), (0, 2), (-1, 2)),
+    }),
+    IFigure: _y_down({
+        Rotation.NORTH: ((0, 0), (-2, 0), (1, 0), (-2, -1), (1, 2)),
+        Rotation.EAST: ((0, 0), (-1, 0), (2, 0), (-1, 2), (2, -1)),
+        Rotation.SOUTH: ((0, 0), (2, 0), (-1, 0), (2, 1), (-1, -2)),
+        Rotation.WEST: ((0, 0), (1, 0), (-2, 0), (1, -2), (-2, 1)),
+    }),
+    OFigure: {rotation: ((0, 0),) for rotation in Rotation},
+}
+
+RowMasks = tuple[tuple[int, int], ...]  # (row offset, bitmask of cells in the row) for non-empty rows
+
+_row_masks_cache: dict[tuple[type[Figure], Rotation], RowMasks] = {}
+
+
+def figure_row_masks(figure: Figure, rotation: Rotation) -> RowMasks:
+    """Figure cells as row bitmasks, bit x is set for cell x. Cached per figure class"""
+    key = type(figure), rotation
+    masks = _row_masks_cache.get(key)
+    if masks is None:
+        rows: dict[int, int] = {}
+        for x, y in figure[rotation]:
+            rows[y] = rows.get(y, 0) | 1 << x
+        masks = _row_masks_cache[key] = tuple(sorted(rows.items()))
+    return masks
+
+
+def fits(masks: RowMasks, x: int, y: int, filled_rows: t.Sequence[int], width: int) -> bool:
+    """Whether figure row masks placed at x, y are inside the field and don't overlap filled cells"""
+    for row_offset, bits in masks:
+        row = y + row_offset
+        if not 0 <= row < len(filled_rows):
+            return False
+        if x < 0:
+            if bits & ((1 << -x) - 1):  # some cells are left of the field
+                return False
+            bits >>= -x
+        else:
+            bits <<= x
+        if bits >> width or bits & filled_rows[row]:
+            return False
+    return True
+
+
+class RotationEngine:  # pylint: disable=too-few-public-methods
+    """Finds where a figure goes after rotation using kick table"""
+
+    def __init__(self, kick_table: KickTable | None = None):
+        self._kick_table = CLASSIC_KICKS if kick_table is None else kick_table
+        self._default_kicks = self._kick_table.get(None, {})
+
+    def find_position(self, figure: Figure, filled_rows: t.Sequence[int], width: int) -> Point | None:
+        """
+        Position of the rotated figure - the first kick where it fits, None if it can't be rotated
+        :param filled_rows: - bitmask of filled cells for every field row
+        """
+        position = figure.position
+        masks = figure_row_masks(figure, figure.next_rotation)
+        for x_offset, y_offset in self._kick_table.get(type(figure), self._default_kicks)[figure.rotation]:
+            x, y = position.x + x_offset, position.y + y_offset
+            if fits(masks, x, y, filled_rows, width):
+                return Point(x, y)
+        return None
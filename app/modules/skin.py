@@ -1,25 +1,18 @@
 """Module to read skin files, configs and prepare data for use"""
+import collections
 import dataclasses
+import fractions
+import functools
 import pathlib
 import sys
 import tkinter as tk
 
-import simpleaudio as sa
-import yaml
+from .audio import Sounds, Voice, VoicePool, voice_pool
+from .resource_pack import PACK_FILE_NAME, ResourcePack
 
-
-@dataclasses.dataclass
-class Sounds:
-    """
-    Contains all required sounds in WaveObject format
-    """
-    move: sa.WaveObject
-    rotate: sa.WaveObject
-    row_delete: sa.WaveObject
-    tick: sa.WaveObject
-    fix_figure: sa.WaveObject
-    game_over: sa.WaveObject
-    startup: sa.WaveObject
+# Scale factors are multiples of this step, so an image is scaled by integer zoom and subsample of Tk
+SCALE_STEP = fractions.Fraction(1, 2)
+SCALED_SKINS_CACHE_SIZE = 4  # scaled copies of a skin kept for reuse
 
 
 @dataclasses.dataclass
@@ -66,34 +59,72 @@ def _get_resources_path() -> pathlib.Path:
     return base_path / 'res'
 
 
-def _get_sounds(skin_name) -> Sounds:
+@functools.lru_cache(maxsize=None)
+def _get_resource_pack() -> ResourcePack | None:
+    """Returns packed resources if there is a pack file (see pack_skins.py), all skins share one mapping"""
+    pack_path = _get_resources_path() / PACK_FILE_NAME
+    return ResourcePack(pack_path) if pack_path.is_file() else None
+
+
+def _get_image(skin_name: str, image_name: str) -> tk.PhotoImage:
+    pack = _get_resource_pack()
+    if pack is None:
+        return tk.PhotoImage(file=str(_get_resources_path() / skin_name / 'gfx' / image_name))
+    # tkinter accepts only bytes here, so the slice is copied once to the Tcl side
+    return tk.PhotoImage(data=bytes(pack.read(f'{skin_name}/gfx/{image_name}')))
+
+
+def _get_cfg(skin_name: str) -> dict:
+    pack = _get_resource_pack()
+    if pack is not None:
+        cfg = pack.config(f'{skin_name}/gfx/cfg.yaml')
+        if cfg is not None:  # parsed by pack_skins.py
+            return cfg
+
+    import yaml  # pylint: disable=import-outside-toplevel  # heavy, imported on first use
+    if pack is None:
+        with (_get_resources_path() / skin_name / 'gfx' / 'cfg.yaml').open() as yaml_file:
+            return yaml.safe_load(yaml_file)
+    return yaml.safe_load(bytes(pack.read(f'{skin_name}/gfx/cfg.yaml')))
+
+
+def _get_sounds(skin_name, pool: VoicePool) -> Sounds:
     """Returns initialized sounds"""
+    import simpleaudio as sa  # pylint: disable=import-outside-toplevel  # heavy, imported on first use
+
+    pack = _get_resource_pack()
 
-    def get_wav(wav_name: str):
-        return sa.WaveObject.from_wave_file(
-            str(_get_resources_path() / skin_name / 'sound' / f'{wav_name}.wav'))
+    def get_wav(wav_name: str, max_concurrent: int) -> Voice:
+        if pack is None:
+            wave_object = sa.WaveObject.from_wave_file(
+                str(_get_resources_path() / skin_name / 'sound' / f'{wav_name}.wav'))
+        else:
+            resource_name = f'{skin_name}/sound/{wav_name}.wav'
+            # PCM is played right from the mapped file
+            wave_object = sa.WaveObject(pack.read(resource_name), *pack.audio_params(resource_name))
+        return pool.voice(wave_object, max_concurrent)
 
     return Sounds(
-        move=get_wav('move'),
-        rotate=get_wav('rotate'),
-        row_delete=get_wav('row_delete'),
-        tick=get_wav('tick'),
-        fix_figure=get_wav('fix_figure'),
-        game_over=get_wav('game_over'),
-        startup=get_wav('startup')
+        move=get_wav('move', max_concurrent=2),
+        rotate=get_wav('rotate', max_concurrent=2),
+        row_delete=get_wav('row_delete', max_concurrent=2),
+        tick=get_wav('tick', max_concurrent=1),
+        fix_figure=get_wav('fix_figure', max_concurrent=2),
+        game_over=get_wav('game_over', max_concurrent=1),
+        startup=get_wav('startup', max_concurrent=1)
     )
 
 
-def get_skin(skin_name) -> Skin:
-    """Returns initialized skin"""
-    gfx_resources_path = _get_resources_path() / f'{skin_name}' / 'gfx'
-
-    with (gfx_resources_path / "cfg.yaml").open() as yaml_file:
-        cfg = yaml.safe_load(yaml_file)
+def get_skin(skin_name, pool: VoicePool = voice_pool) -> Skin:
+    """
+    Returns initialized skin
+    :param pool: - voices pool to play skin sounds through
+    """
+    cfg = _get_cfg(skin_name)
 
     return Skin(
 
-        base_image=tk.PhotoImage(file=str(gfx_resources_path / "base.png")),
+        base_image=_get_image(skin_name, 'base.png'),
 
         cell_size=cfg['cell_size'],
         game_field_offset_x=cfg['game_field_nw']['x'],
@@ -105,10 +136,10 @@ def get_skin(skin_name) -> Skin:
         cell_anchor_offset_x=cfg['cell_anchor_nw']['x'],
         cell_anchor_offset_y=cfg['cell_anchor_nw']['y'],
 
-        cell_falling_image=tk.PhotoImage(file=str(gfx_resources_path / "cell_falling.png")),
-        cell_filled_image=tk.PhotoImage(file=str(gfx_resources_path / "cell_filled.png")),
+        cell_falling_image=_get_image(skin_name, 'cell_falling.png'),
+        cell_filled_image=_get_image(skin_name, 'cell_filled.png'),
 
-        pause_image=tk.PhotoImage(file=str(gfx_resources_path / "pause.png")),
+        pause_image=_get_image(skin_name, 'pause.png'),
         pause_image_offset_x=cfg['pause_nw']['x'],
         pause_image_offset_y=cfg['pause_nw']['y'],
 
@@ -117,8 +148,64 @@ def get_skin(skin_name) -> Skin:
         score_digit_offset_y=cfg['score_digit_nw']['y'],
         digit_width=cfg['digit_size']['width'],
         digit_height=cfg['digit_size']['height'],
-        digit_images={str(digit): tk.PhotoImage(file=str(gfx_resources_path / f"{digit}.png"))
-                      for digit in range(10)},
+        digit_images={str(digit): _get_image(skin_name, f'{digit}.png') for digit in range(10)},
 
-        sounds=_get_sounds(skin_name)
+        sounds=_get_sounds(skin_name, pool)
     )
+
+
+def fit_scale(width: int, height: int, skin: Skin) -> fractions.Fraction:
+    """The biggest scale factor step which fits skin base image into width x height, at least one step"""
+    scale = min(fractions.Fraction(width, skin.base_image.width()),
+                fractions.Fraction(height, skin.base_image.height()))
+    return max(SCALE_STEP, scale // SCALE_STEP * SCALE_STEP)
+
+
+def _scale_image(image: tk.PhotoImage, scale: fractions.Fraction) -> tk.PhotoImage:
+    if scale.numerator != 1:
+        image = image.zoom(scale.numerator)
+    if scale.denominator != 1:
+        image = image.subsample(scale.denominator)
+    return image
+
+
+def scale_skin(skin: Skin, scale: fractions.Fraction) -> Skin:
+    """
+    Copy of the skin with all images scaled, sounds are shared. Offsets and sizes stay in skin pixels:
+    a canvas coordinate is summed from them and then scaled, see to_canvas(), so rounding doesn't add up
+    along the field
+    """
+    if scale == 1:
+        return skin
+    scaled = {skin_field.name: _scale_image(getattr(skin, skin_field.name), scale)
+              for skin_field in dataclasses.fields(skin) if isinstance(getattr(skin, skin_field.name), tk.PhotoImage)}
+    scaled['digit_images'] = {digit: _scale_image(image, scale) for digit, image in skin.digit_images.items()}
+    return dataclasses.replace(skin, **scaled)
+
+
+def to_canvas(x: int, y: int, scale: fractions.Fraction) -> tuple[int, int]:
+    """Point in skin pixels to canvas pixels of the skin scaled by the factor"""
+    return round(x * scale), round(y * scale)
+
+
+class ScaledSkins:  # pylint: disable=too-few-public-methods
+    """
+    Scaled copies of one skin, each is made once per scale factor and reused until it drops out
+    of the cache, so painting on a big window costs the same as on the default one
+    """
+
+    def __init__(self, skin: Skin, max_size=SCALED_SKINS_CACHE_SIZE):
+        self.skin = skin
+        self._max_size = max_size
+        self._cache: collections.OrderedDict[fractions.Fraction, Skin] = collections.OrderedDict()
+
+    def get(self, scale: fractions.Fraction) -> Skin:
+        """Skin scaled by the factor, the least recently used one is dropped if the cache is full"""
+        scaled = self._cache.get(scale)
+        if scaled is None:
+            scaled = self._cache[scale] = scale_skin(self.skin, scale)
+            if len(self._cache) > self._max_size:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(scale)
+        return scaled
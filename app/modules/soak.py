@@ -0,0 +1,217 @@
+"""
+Soak test - hours of virtual play in seconds, resources are sampled on the way and must not grow without limit
+"""
+import dataclasses
+import gc
+import os
+import random
+import threading
+import tracemalloc
+import types
+import typing as t
+
+from .clock import VirtualClock
+from .controls_handler import ControlsHandler
+from .field import CellState
+from .figures import Point
+from .game import Game
+from .headless_ui import RecordingGUI
+from .logger import get_logger
+
+SAMPLE_INTERVAL_SEC = 60.0  # virtual seconds
+WARM_UP_SHARE = 0.25  # samples of this first part of the run are not used to judge growth
+TOP_ALLOCATORS_NUMBER = 10
+
+# metric -> allowed growth: absolute, relative to the level after warm-up
+DEFAULT_TOLERANCES = {
+    'rss_bytes': (8 * 1024 * 1024, 0.2),
+    'traced_bytes': (2 * 1024 * 1024, 0.2),
+    'threads': (0, 0.0),
+    'control_queue_depth': (50, 0.0),
+    'field_events_depth': (50, 0.0),
+    'canvas_items': (50, 0.0),
+}
+
+# Keys the input policy presses, keycodes are the same as Tk gives
+POLICY_KEYS = (37, 39, 38, 40)  # left, right, rotate, down
+
+logger = get_logger('soak')
+
+Probe = t.Callable[[], float | None]  # None - metric isn't available on this platform
+
+
+def rss_bytes() -> int | None:
+    """Resident memory of the process (Linux only)"""
+    try:
+        with open('/proc/self/statm', encoding='ascii') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class CanvasModelGUI(RecordingGUI):
+    """
+    Keeps items the way TkTetrisGUI keeps canvas images: each painted cell is a new item, only EMPTY removes it.
+    So if field changes paint a cell twice without clearing it, item count grows like it would on canvas
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.canvas_items = 0
+        self._painted: dict[Point, CellState] = {}
+
+    def apply_field_change(self, changed_points: t.OrderedDict[CellState, t.Set[Point]],
+                           trace: list[float] | None = None):
+        super().apply_field_change(changed_points, trace)
+        for cell_state, points in changed_points.items():
+            for point in points:
+                if cell_state == CellState.EMPTY:
+                    if self._painted.pop(point, None) is not None:
+                        self.canvas_items -= 1
+                else:
+                    self._painted[point] = cell_state
+                    self.canvas_items += 1
+
+
+@dataclasses.dataclass
+class SoakResult:
+    """Samples of all metrics and what grew too much"""
+    samples: list[dict[str, float]]
+    growing: dict[str, tuple[float, float]]  # metric -> (level after warm-up, level at the end)
+    top_allocators: list[str]
+    games_played: int
+
+    @property
+    def passed(self) -> bool:
+        """True if nothing grew too much"""
+        return not self.growing
+
+    def format_report(self) -> str:
+        """Human-readable summary"""
+        lines = [f'Soak test: {len(self.samples)} samples, {self.games_played} games, '
+                 f'{"PASSED" if self.passed else "FAILED"}']
+        if self.samples:
+            first, last = self.samples[0], self.samples[-1]
+            lines.append(f'  {"metric":<22}{"first":>14}{"last":>14}')
+            for name in last:
+                lines.append(f'  {name:<22}{first.get(name, 0):>14.0f}{last[name]:>14.0f}')
+        for name, (early, late) in self.growing.items():
+            lines.append(f'  GROWS: {name} {early:.0f} -> {late:.0f}')
+        if self.top_allocators:
+            lines.append('  Top allocators since warm-up:')
+            lines += [f'    {line}' for line in self.top_allocators]
+        return '\n'.join(lines)
+
+
+def find_growth(samples: list[dict[str, float]], tolerances: dict[str, tuple[float, float]],
+                warm_up_share=WARM_UP_SHARE) -> dict[str, tuple[float, float]]:
+    """
+    Compares peak of each metric in the last quarter of the run with its peak right after warm-up,
+    returns metrics which grew more than tolerated
+    """
+    start = int(len(samples) * warm_up_share)
+    judged = samples[start:]
+    if len(judged) < 4:
+        return {}
+    quarter = len(judged) // 4
+    growing = {}
+    for name in judged[-1]:
+        if name == 'time':
+            continue
+        absolute, relative = tolerances.get(name, (0, 0.0))
+        early = max(sample[name] for sample in judged[:quarter])
+        late = max(sample[name] for sample in judged[-quarter:])
+        if late - early > max(absolute, early * relative):
+            growing[name] = early, late
+    return growing
+
+
+class SoakRunner:  # pylint: disable=too-many-instance-attributes, too-few-public-methods
+    """
+    Plays games one after another on virtual clock with random input, samples metrics every sample_interval
+    virtual seconds. A new game is started when one is over, so leaks between games are caught too
+    """
+
+    def __init__(self, *, seed=0, sample_interval=SAMPLE_INTERVAL_SEC, gui_factory=CanvasModelGUI,
+                 tolerances: dict[str, tuple[float, float]] | None = None, trace_allocations=True):
+        """
+        :param gui_factory: - called for each new game, gets no arguments
+        :param trace_allocations: - use tracemalloc, it makes the run a few times slower
+        """
+        self.clock = VirtualClock()
+        self.controls_handler = ControlsHandler(clock=self.clock)
+        self.probes: dict[str, Probe] = {
+            'rss_bytes': rss_bytes,
+            'threads': threading.active_count,
+            'control_queue_depth': self.controls_handler.events_q.qsize,
+            'field_events_depth': lambda: self.game.field_events_depth,
+            'canvas_items': lambda: getattr(self.gui, 'canvas_items', None),
+        }
+        if trace_allocations:
+            self.probes['traced_bytes'] = lambda: tracemalloc.get_traced_memory()[0]
+        self.sample_hooks: list[t.Callable[['SoakRunner'], None]] = []  # called before each sample, e.g. skin change
+        self.tolerances = {**DEFAULT_TOLERANCES, **(tolerances or {})}
+        self._sample_interval = sample_interval
+        self._trace_allocations = trace_allocations
+        self._gui_factory = gui_factory
+        self._rng = random.Random(seed)
+        self.games_played = 0
+        self.gui = gui_factory()
+        self.game = Game(controls_handler=self.controls_handler, gui=self.gui, clock=self.clock,
+                         rng=random.Random(self._rng.random()))
+
+    def run(self, duration_sec: float) -> SoakResult:
+        """Plays for given virtual time"""
+        if self._trace_allocations:
+            tracemalloc.start()
+        samples = []
+        baseline = None
+        next_sample_time = self.clock.now()
+        warm_up_end_time = self.clock.now() + duration_sec * WARM_UP_SHARE
+        end_time = self.clock.now() + duration_sec
+        try:
+            while self.clock.now() < end_time:
+                self._play_one_key()
+                if self.game.is_over:
+                    self._new_game()
+                if self.clock.now() >= next_sample_time:
+                    samples.append(self._sample())
+                    next_sample_time += self._sample_interval
+                    if self._trace_allocations and baseline is None and self.clock.now() >= warm_up_end_time:
+                        baseline = tracemalloc.take_snapshot()
+            top_allocators = []
+            if baseline is not None:
+                statistics = tracemalloc.take_snapshot().compare_to(baseline, 'lineno')
+                top_allocators = [str(statistic) for statistic in statistics[:TOP_ALLOCATORS_NUMBER]]
+        finally:
+            if self._trace_allocations:
+                tracemalloc.stop()
+        result = SoakResult(samples, find_growth(samples, self.tolerances), top_allocators, self.games_played)
+        logger.info('%s', result.format_report())
+        return result
+
+    def _play_one_key(self):
+        """Presses a random key, holds it and waits a bit"""
+        key = types.SimpleNamespace(keycode=self._rng.choice(POLICY_KEYS))
+        self.controls_handler.on_key_press(key)
+        self.clock.advance(self._rng.uniform(0.02, 0.6))
+        self.controls_handler.on_key_release(key)
+        self.clock.advance(self._rng.uniform(0, 0.3))
+
+    def _new_game(self):
+        self.game.stop()
+        self.games_played += 1
+        self.gui = self._gui_factory()
+        self.game = Game(controls_handler=self.controls_handler, gui=self.gui, clock=self.clock,
+                         rng=random.Random(self._rng.random()))
+
+    def _sample(self) -> dict[str, float]:
+        for hook in self.sample_hooks:
+            hook(self)
+        gc.collect()
+        sample = {'time': self.clock.now()}
+        for name, probe in self.probes.items():
+            value = probe()
+            if value is not None:
+                sample[name] = value
+        return sample
@@ -0,0 +1,296 @@
+"""
+Spectator stream - a running game packed to compact binary frames, which can be sent to many subscribers.
+
+Every frame is <type: 1 byte><payload length: uint16><payload>, integers are little endian.
+    S - snapshot: width, height (uint8), next figure mask (uint16), rows removed (uint32), then every row RLE encoded
+    D - delta: number of rows (uint8), then for every changed row - its index (uint8) and RLE of old row XOR new row
+    N - next figure mask (uint16), bit y * 4 + x is set for every cell of 4x4 preview
+    R - row removed, no payload
+    G - game over, no payload
+Row is one byte (CellState value) per cell. RLE is pairs <run length: uint8><byte> covering exactly width cells.
+XOR of unchanged cells is zero, so a moved figure costs a few bytes per row.
+"""
+import queue
+import struct
+import threading
+import typing as t
+
+from .field import CellState, FieldEvent, FieldEventType
+from .logger import get_logger
+
+SNAPSHOT = b'S'
+DELTA = b'D'
+NEXT_FIGURE = b'N'
+ROW_REMOVED = b'R'
+GAME_OVER = b'G'
+
+NEXT_FIGURE_SIZE = 4  # next figure preview is 4x4 cells
+MAX_RUN = 255
+MAX_PAYLOAD_SIZE = 0xFFFF  # payload length is uint16
+SUBSCRIBER_QUEUE_FRAMES = 256  # subscriber which has this many frames not written yet is dropped
+
+_FRAME_HEADER = struct.Struct('<cH')
+_SNAPSHOT_HEADER = struct.Struct('<BBHI')
+_MASK = struct.Struct('<H')
+
+logger = get_logger('spectator')
+
+
+class SpectatorStreamError(Exception):
+    """Stream data can't be decoded"""
+
+
+def rle_encode(data: bytes) -> bytes:
+    """Packs bytes to <run length><byte> pairs"""
+    result = bytearray()
+    i = 0
+    while i < len(data):
+        value = data[i]
+        run = 1
+        while i + run < len(data) and data[i + run] == value and run < MAX_RUN:
+            run += 1
+        result += bytes((run, value))
+        i += run
+    return bytes(result)
+
+
+def rle_decode(data: bytes, offset: int, size: int) -> tuple[bytes, int]:
+    """Unpacks runs starting at offset until size bytes are got, returns bytes and offset after them"""
+    result = bytearray()
+    while len(result) < size:
+        if offset + 2 > len(data):
+            raise SpectatorStreamError('Row is truncated')
+        run, value = data[offset], data[offset + 1]
+        result += bytes((value,)) * run
+        offset += 2
+    if len(result) != size:
+        raise SpectatorStreamError(f'Row has {len(result)} cells instead of {size}')
+    return bytes(result), offset
+
+
+def max_payload_size(width: int, height: int) -> int:
+    """The biggest frame payload of the field - every row changed and every RLE run is one cell long"""
+    snapshot = _SNAPSHOT_HEADER.size + height * 2 * width
+    delta = 1 + height * (1 + 2 * width)
+    return max(snapshot, delta)
+
+
+def _frame(frame_type: bytes, payload=b'') -> bytes:
+    return _FRAME_HEADER.pack(frame_type, len(payload)) + payload
+
+
+def _points_mask(points: t.Iterable[tuple[int, int]]) -> int:
+    return sum(1 << (y * NEXT_FIGURE_SIZE + x) for x, y in points)
+
+
+class _SubscriberWriter:
+    """Own thread and bounded queue of one subscriber, so a slow subscriber doesn't block the game"""
+
+    def __init__(self, subscriber: t.Callable[[bytes], t.Any]):
+        self.subscriber = subscriber
+        self.broken = False  # subscriber raised an error or fell behind, nothing is written anymore
+        self._queue: queue.Queue[bytes | None] = queue.Queue(maxsize=SUBSCRIBER_QUEUE_FRAMES)
+        self._thread = threading.Thread(target=self._run, name='SpectatorWriter', daemon=True)
+        self._thread.start()
+
+    def offer(self, frame: bytes) -> bool:
+        """Queues frame without waiting, returns False if subscriber should be dropped"""
+        if self.broken:
+            return False
+        try:
+            self._queue.put_nowait(frame)
+            return True
+        except queue.Full:
+            logger.warning('Spectator subscriber %r dropped: %d frames behind', self.subscriber,
+                           SUBSCRIBER_QUEUE_FRAMES)
+            self.broken = True  # writer thread exits after the frame it's writing now
+            return False
+
+    def close(self, timeout: float | None = None):
+        """Writes queued frames and stops the thread"""
+        if not self.broken:
+            try:
+                self._queue.put(None, timeout=timeout)
+            except queue.Full:
+                self.broken = True
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            frame = self._queue.get()
+            if frame is None or self.broken:
+                return
+            try:
+                self.subscriber(frame)
+            except (OSError, ValueError) as error:  # closed socket or file
+                logger.warning('Spectator subscriber %r dropped: %s', self.subscriber, error)
+                self.broken = True
+                return
+
+
+class SpectatorStream:  # pylint: disable=too-many-instance-attributes
+    """
+    Keeps visible board model and encodes field events to frames. Every frame is encoded once
+    and given to all subscribers, a new subscriber gets snapshot first.
+    Subscriber is any callable taking bytes: file.write, socket.sendall, list.append...
+    Every subscriber is called from its own thread, the one which can't keep up is dropped
+    """
+
+    def __init__(self, width: int, height: int):
+        """
+        :param height: - visible rows only, the same as GUI gets
+        """
+        if not 0 < width <= 255 or not 0 < height <= 255 or max_payload_size(width, height) > MAX_PAYLOAD_SIZE:
+            raise ValueError(f'Field {width}x{height} is too big for the stream')
+        self.width = width
+        self.height = height
+        self._rows = [bytearray(width) for _ in range(height)]  # CellState.EMPTY is 0
+        self._next_figure_mask = 0
+        self._rows_removed = 0
+        self._writers: list[_SubscriberWriter] = []
+        self._snapshot: bytes | None = None  # cached until the next change
+        self._lock = threading.Lock()  # events come from game thread, subscribers - from anywhere
+        self.encoded_bytes = 0  # frames size since start, snapshots aren't counted
+        self.dropped_subscribers = 0  # broken or too slow ones
+
+    def subscribe(self, subscriber: t.Callable[[bytes], t.Any]):
+        """Sends snapshot to subscriber and then every new frame"""
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = self._encode_snapshot()
+            writer = _SubscriberWriter(subscriber)
+            writer.offer(self._snapshot)
+            self._writers.append(writer)
+
+    def unsubscribe(self, subscriber: t.Callable[[bytes], t.Any]):
+        """Stops sending frames to subscriber, frames queued before are still written"""
+        with self._lock:
+            writers = [writer for writer in self._writers if writer.subscriber == subscriber]
+            self._writers = [writer for writer in self._writers if writer.subscriber != subscriber]
+        for writer in writers:
+            writer.close(timeout=0)
+
+    def close(self, timeout: float | None = None):
+        """Writes all queued frames and stops writer threads, subscribers are removed"""
+        with self._lock:
+            writers, self._writers = self._writers, []
+        for writer in writers:
+            writer.close(timeout)
+            self.dropped_subscribers += writer.broken
+
+    @property
+    def subscribers_count(self) -> int:
+        """Number of current subscribers"""
+        return sum(not writer.broken for writer in self._writers)
+
+    def on_field_event(self, event: FieldEvent):
+        """Game field listener, see Game.add_field_listener()"""
+        with self._lock:
+            match event.event_type:
+                case FieldEventType.CELL_STATE_CHANGE:
+                    self._on_cells_change(event.payload)
+                case FieldEventType.NEW_FIGURE:
+                    self._next_figure_mask = _points_mask(event.payload)
+                    self._publish(_frame(NEXT_FIGURE, _MASK.pack(self._next_figure_mask)))
+                case FieldEventType.ROW_REMOVED:
+                    self._rows_removed += 1
+                    self._publish(_frame(ROW_REMOVED))
+                case FieldEventType.GAME_OVER:
+                    self._publish(_frame(GAME_OVER))
+
+    def _on_cells_change(self, payload):
+        """Applies CELL_STATE_CHANGE payload to the model, sends XOR of changed rows"""
+        old_rows = {}
+        for cell_state, cells in payload:
+            for index in cells:
+                y, x = divmod(index, self.width)
+                if y not in old_rows:
+                    old_rows[y] = bytes(self._rows[y])
+                self._rows[y][x] = cell_state
+        changed = [(y, old_row) for y, old_row in sorted(old_rows.items()) if old_row != self._rows[y]]
+        if not changed:
+            return
+        payload = bytearray((len(changed),))
+        for y, old_row in changed:
+            payload.append(y)
+            payload += rle_encode(bytes(a ^ b for a, b in zip(old_row, self._rows[y])))
+        self._publish(_frame(DELTA, bytes(payload)))
+
+    def _encode_snapshot(self) -> bytes:
+        payload = _SNAPSHOT_HEADER.pack(self.width, self.height, self._next_figure_mask, self._rows_removed) + \
+            b''.join(rle_encode(bytes(row)) for row in self._rows)
+        return _frame(SNAPSHOT, payload)
+
+    def _publish(self, frame: bytes):
+        """Queues frame for all subscribers, lock should be held"""
+        self._snapshot = None
+        self.encoded_bytes += len(frame)
+        writers = []
+        for writer in self._writers:
+            if writer.offer(frame):
+                writers.append(writer)
+            else:
+                self.dropped_subscribers += 1
+        self._writers = writers
+
+
+class SpectatorDecoder:
+    """Restores the board from stream frames, frames may come in chunks of any size"""
+
+    def __init__(self):
+        self.width = 0
+        self.height = 0
+        self.rows: list[bytearray] = []
+        self.next_figure_mask = 0
+        self.rows_removed = 0
+        self.is_game_over = False
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> int:
+        """Applies all complete frames, returns how many were applied"""
+        self._buffer += data
+        count = 0
+        while len(self._buffer) >= _FRAME_HEADER.size:
+            frame_type, length = _FRAME_HEADER.unpack_from(self._buffer)
+            end = _FRAME_HEADER.size + length
+            if len(self._buffer) < end:
+                break
+            self._apply(frame_type, bytes(self._buffer[_FRAME_HEADER.size:end]))
+            del self._buffer[:end]
+            count += 1
+        return count
+
+    def cell(self, x: int, y: int) -> CellState:
+        """State of visible cell"""
+        return CellState(self.rows[y][x])
+
+    def render(self) -> str:
+        """Board as text, one line per row"""
+        return '\n'.join(''.join(' .[]##'[value * 2:value * 2 + 2] for value in row) for row in self.rows)
+
+    def _apply(self, frame_type: bytes, payload: bytes):
+        match frame_type:
+            case b'S':
+                self.width, self.height, self.next_figure_mask, self.rows_removed = \
+                    _SNAPSHOT_HEADER.unpack_from(payload)
+                offset = _SNAPSHOT_HEADER.size
+                self.rows = []
+                for _ in range(self.height):
+                    row, offset = rle_decode(payload, offset, self.width)
+                    self.rows.append(bytearray(row))
+            case b'D':
+                if not self.rows:
+                    raise SpectatorStreamError('Delta before snapshot')
+                offset = 1
+                for _ in range(payload[0]):
+                    y = payload[offset]
+                    xor, offset = rle_decode(payload, offset + 1, self.width)
+                    self.rows[y] = bytearray(a ^ b for a, b in zip(self.rows[y], xor))
+            case b'N':
+                self.next_figure_mask, = _MASK.unpack(payload)
+            case b'R':
+                self.rows_removed += 1
+            case b'G':
+                self.is_game_over = True
+            case _:
+                raise SpectatorStreamError(f'Unknown frame type {frame_type!r}')
@@ -0,0 +1,77 @@
+"""Startup phase timings - shows where launch time goes"""
+import contextlib
+import importlib
+import json
+import pathlib
+import time
+
+
+class StartupProfiler:
+    """
+    Collects durations of startup phases.
+    Recording is always on (it's just a few perf_counter calls), the report is printed only when enabled
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.report_path: pathlib.Path | None = None
+        self._start = time.perf_counter()
+        self._last_mark = self._start
+        self._phases: list[tuple[str, float]] = []
+        self._finished = False
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        """Measures the code inside 'with' block as a phase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(name, start)
+
+    def mark(self, name: str):
+        """Records everything since previous mark/phase as a phase"""
+        self._add(name, self._last_mark)
+
+    def timed_import(self, module_name: str):
+        """Imports module as a separate phase, so lazy imports don't blur other phases"""
+        with self.phase(f'import {module_name}'):
+            importlib.import_module(module_name)
+
+    def finish(self):
+        """Closes the last phase and prints/writes the report (only once)"""
+        if self._finished:
+            return
+        self._finished = True
+        if not self.enabled:
+            return
+        print(self.format_report())
+        if self.report_path is not None:
+            self.report_path.write_text(json.dumps(self.report(), indent=2), encoding='utf-8')
+
+    def report(self) -> dict:
+        """Machine-readable report, all durations in milliseconds"""
+        return {
+            'total_ms': round((self._last_mark - self._start) * 1000, 3),
+            'phases': [{'name': name, 'ms': round(duration * 1000, 3)} for name, duration in self._phases]
+        }
+
+    def format_report(self) -> str:
+        """Human-readable report"""
+        report = self.report()
+        lines = ['Startup profile:']
+        for phase in report['phases']:
+            share = phase['ms'] / report['total_ms'] * 100 if report['total_ms'] else 0
+            lines.append(f'  {phase["name"]:<40} {phase["ms"]:>10.1f} ms {share:>5.1f}%')
+        lines.append(f'  {"total":<40} {report["total_ms"]:>10.1f} ms')
+        return '\n'.join(lines)
+
+    def _add(self, name: str, start: float):
+        if self._finished:
+            return
+        now = time.perf_counter()
+        self._phases.append((name, now - start))
+        self._last_mark = now
+
+
+startup_profiler = StartupProfiler()
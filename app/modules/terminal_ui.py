@@ -0,0 +1,221 @@
+"""Text front end: ANSI escapes output and raw terminal keys input, no Tk needed"""
+import os
+import select
+import sys
+import threading
+import time
+import types
+import typing as t
+
+from .abstract_ui import AbstractGUI
+from .audio import Sounds
+from .controls_handler import ControlsHandler
+from .field import CellState
+from .figures import Point
+from .headless_ui import silent_sounds
+from .latency import latency_tracker
+from .tick_thread import TickThread
+
+FRAME_INTERVAL_SEC = 1 / 30  # output is written not more often than this
+# Terminal has no key release events - key is released if it isn't repeated in time. The first repeat comes
+# after terminal's repeat delay (250-600 ms usually), next ones come often
+KEY_FIRST_RELEASE_TIMEOUT_SEC = 0.6
+KEY_RELEASE_TIMEOUT_SEC = 0.1
+
+CELL_TEXT = {CellState.EMPTY: ' .', CellState.FILLED: '[]', CellState.FALLING: '##'}
+NEXT_FIGURE_SIZE = 4  # next figure preview is 4x4 cells
+
+# Terminal input -> keycodes ControlsHandler knows (the same Tk gives)
+KEY_SEQUENCES = {
+    b'\x1b[D': 37,  # Left arrow
+    b'\x1b[A': 38,  # Up arrow
+    b'\x1b[C': 39,  # Right arrow
+    b'\x1b[B': 40,  # Down arrow
+    b' ': 32,  # Space
+    b'\r': 13,  # Enter
+    b'\n': 13,  # Enter
+}
+QUIT_KEYS = {b'q', b'Q', b'\x03'}  # q or Ctrl+C
+
+
+def _move_to(row: int, column: int) -> str:
+    """ANSI sequence to move cursor, row and column start from 1"""
+    return f'\x1b[{row};{column}H'
+
+
+class TerminalGUI(AbstractGUI):  # pylint: disable=too-many-instance-attributes
+    """
+    Draws the game with ANSI escapes. Only cells named in field changes are redrawn,
+    all changes made during one frame are written by one write() call
+    """
+
+    def __init__(self, width: int, height: int, out: t.TextIO = sys.stdout, frame_interval=FRAME_INTERVAL_SEC):
+        self._width = width
+        self._height = height
+        self._out = out
+        self._sounds = silent_sounds()
+
+        self._lock = threading.Lock()  # changes come from game thread, output is written by frame thread
+        self._dirty_cells: dict[Point, CellState] = {}
+        self._traces: list[list[float]] = []  # latency traces of changes which aren't written yet
+        self._next_figure_points: set[Point] | None = None
+        self._status: str | None = None
+        self._score: int | None = None
+        self._is_paused = False
+        self._is_game_over = False
+
+        self._out.write('\x1b[?25l\x1b[2J' + self._frame_text())  # hide cursor, clear screen, draw borders
+        self._out.flush()
+        self._frame_thread = TickThread(self._flush, frame_interval, startup_sleep_sec=0)
+        self._frame_thread.start()
+
+    @property
+    def sounds(self) -> Sounds:
+        return self._sounds
+
+    def apply_field_change(self, changed_points: t.OrderedDict[CellState, t.Set[Point]],
+                           trace: list[float] | None = None):
+        with self._lock:
+            for cell_state, points in changed_points.items():
+                for point in points:
+                    self._dirty_cells[point] = cell_state  # the last state in frame wins
+            if trace is not None:
+                self._traces.append(trace)
+
+    def show_next_figure(self, points: set[Point]):
+        with self._lock:
+            self._next_figure_points = points
+
+    def show_score(self, score: int):
+        with self._lock:
+            self._score = score
+
+    def toggle_pause(self):
+        with self._lock:
+            self._is_paused = not self._is_paused
+            self._status = 'PAUSE' if self._is_paused else ''
+
+    def game_over(self):
+        with self._lock:
+            self._is_game_over = True
+            self._status = 'GAME OVER'
+
+    def new_game(self):
+        pass
+
+    def close(self):
+        """Writes the last frame, shows cursor back and moves it below the game"""
+        self._frame_thread.stop()
+        self._flush()
+        self._out.write(_move_to(self._height + 3, 1) + '\x1b[?25h')
+        self._out.flush()
+
+    def _flush(self):
+        """Writes all changes made since previous frame"""
+        with self._lock:
+            dirty_cells, self._dirty_cells = self._dirty_cells, {}
+            next_figure_points, self._next_figure_points = self._next_figure_points, None
+            score, self._score = self._score, None
+            status, self._status = self._status, None
+            traces, self._traces = self._traces, []
+
+        parts = [_move_to(y + 2, x * 2 + 2) + CELL_TEXT[state] for (x, y), state in dirty_cells.items()
+                 if 0 <= x < self._width and 0 <= y < self._height]
+        panel_column = self._width * 2 + 5
+        if score is not None:
+            parts.append(_move_to(2, panel_column) + f'Score: {score:04d}')
+        if next_figure_points is not None:
+            for y in range(NEXT_FIGURE_SIZE):
+                parts.append(_move_to(y + 5, panel_column) +
+                             ''.join(CELL_TEXT[CellState.FALLING if Point(x, y) in next_figure_points
+                                               else CellState.EMPTY] for x in range(NEXT_FIGURE_SIZE)))
+        if status is not None:
+            parts.append(_move_to(11, panel_column) + f'{status:<10}')
+        if parts:
+            self._out.write(''.join(parts))
+            self._out.flush()
+        for trace in traces:
+            latency_tracker.finish(trace)
+
+    def _frame_text(self) -> str:
+        """Borders and empty field"""
+        lines = ['+' + '-' * self._width * 2 + '+']
+        lines += ['|' + CELL_TEXT[CellState.EMPTY] * self._width + '|'] * self._height
+        lines += lines[:1]
+        return ''.join(_move_to(row + 1, 1) + line for row, line in enumerate(lines)) + \
+            _move_to(4, self._width * 2 + 5) + 'Next:' + \
+            _move_to(self._height + 2, 1) + 'Arrows - move, Space - pause, q - quit'
+
+
+class TerminalKeyReader:  # pylint: disable=too-few-public-methods
+    """
+    Reads keys from raw terminal (Unix only) and passes them to ControlsHandler.
+    Terminal doesn't report key release, so key is released when terminal stops repeating it
+    """
+
+    def __init__(self, controls_handler: ControlsHandler, stdin: t.BinaryIO | None = None,
+                 release_timeout=KEY_RELEASE_TIMEOUT_SEC, first_release_timeout=KEY_FIRST_RELEASE_TIMEOUT_SEC):
+        """
+        :param first_release_timeout: - how long a key is held after the press if terminal doesn't repeat it
+        :param release_timeout: - the same after a repeat
+        """
+        self._controls_handler = controls_handler
+        self._stdin = stdin or sys.stdin.buffer
+        self._release_timeout = release_timeout
+        self._first_release_timeout = first_release_timeout
+        self._release_deadlines: dict[int, float] = {}  # keycode -> when to release it
+
+    def run(self):
+        """Reads keys until quit key is pressed"""
+        import termios  # pylint: disable=import-outside-toplevel  # Unix only
+        import tty  # pylint: disable=import-outside-toplevel
+
+        fileno = self._stdin.fileno()
+        old_settings = termios.tcgetattr(fileno)
+        tty.setcbreak(fileno)
+        try:
+            while self._read_once():
+                pass
+        finally:
+            termios.tcsetattr(fileno, termios.TCSADRAIN, old_settings)
+
+    def _read_once(self) -> bool:
+        """Processes keys or releases, returns False on quit"""
+        timeout = None
+        if self._release_deadlines:
+            timeout = max(min(self._release_deadlines.values()) - time.monotonic(), 0)
+        readable, _, _ = select.select([self._stdin], [], [], timeout)
+
+        if readable:
+            data = os.read(self._stdin.fileno(), 64)
+            for sequence in self._split(data):
+                if sequence in QUIT_KEYS:
+                    return False
+                keycode = KEY_SEQUENCES.get(sequence)
+                if keycode is not None:
+                    timeout = self._release_timeout if keycode in self._release_deadlines \
+                        else self._first_release_timeout  # held key is repeated by terminal
+                    self._controls_handler.on_key_press(types.SimpleNamespace(keycode=keycode))
+                    self._release_deadlines[keycode] = time.monotonic() + timeout
+
+        now = time.monotonic()
+        for keycode, deadline in list(self._release_deadlines.items()):
+            if deadline <= now:
+                del self._release_deadlines[keycode]
+                self._controls_handler.on_key_release(types.SimpleNamespace(keycode=keycode))
+        return True
+
+    @staticmethod
+    def _split(data: bytes) -> t.Iterator[bytes]:
+        """Splits input to escape sequences and single characters, CSI sequence ends with a byte 0x40-0x7E"""
+        i = 0
+        while i < len(data):
+            if data[i:i + 2] == b'\x1b[':
+                end = i + 2
+                while end < len(data) and not 0x40 <= data[end] <= 0x7e:  # parameters, e.g. ESC[1;5C
+                    end += 1
+                yield data[i:end + 1]
+                i = end + 1
+            else:
+                yield data[i:i + 1]
+                i += 1
@@ -1,19 +1,24 @@
 """Custom thread for endless background task"""
-import time
 import threading
 
+from .clock import Clock, real_clock
+
 
 class TickThread(threading.Thread):
     """
-    Special thread that endlessly run tick_function and can be stopped correctly
+    Special thread that endlessly run tick_function and can be stopped correctly.
+    With non-blocking (virtual) clock no OS thread is started - ticks are timers of the clock
     """
 
-    def __init__(self, tick_function, tick_interval_sec, startup_sleep_sec=1):
+    def __init__(self, tick_function, tick_interval_sec, startup_sleep_sec=1, clock: Clock = real_clock):
         super().__init__(target=tick_function, daemon=True)
         self._tick_interval = tick_interval_sec
         self._target = tick_function
         self._stop_event = threading.Event()
         self._startup_sleep_sec = startup_sleep_sec
+        self._clock = clock
+        self._last_start_time: float | None = None  # virtual clock only
+        self._timer = None  # virtual clock only, the next tick
 
     def set_tick(self, new_tick_sec):
         """
@@ -21,16 +26,40 @@ class TickThread(threading.Thread):
         :param new_tick_sec: - interval between task function calls
         """
         self._tick_interval = new_tick_sec
+        if self._timer is not None and self._last_start_time is not None:
+            # The same as the real thread does - current wait is shortened or prolonged
+            self._timer.cancel()
+            self._timer = self._clock.call_at(self._last_start_time + new_tick_sec, self._virtual_tick)
 
     def stop(self):
         """Conveniently stops thread after next tick"""
         self._stop_event.set()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def start(self):
+        if self._clock.blocking:
+            super().start()
+        else:
+            self._timer = self._clock.call_later(self._startup_sleep_sec, self._virtual_tick)
 
     def run(self):
-        time.sleep(self._startup_sleep_sec)
+        start_time = self._clock.now()
+        while start_time + self._startup_sleep_sec > self._clock.now() and not self._stop_event.is_set():
+            self._clock.sleep(self._startup_sleep_sec / 100)
         while not self._stop_event.is_set():
-            start_time = time.time()
+            start_time = self._clock.now()
             self._target()
-            # Using cycle instead of simple sleep to catch possible change of _tick_interval
-            while start_time + self._tick_interval > time.time():
-                time.sleep(self._tick_interval / 100)
+            # Using cycle instead of simple sleep to catch possible change of _tick_interval and stop()
+            while start_time + self._tick_interval > self._clock.now() and not self._stop_event.is_set():
+                self._clock.sleep(self._tick_interval / 100)
+
+    def _virtual_tick(self):
+        self._timer = None  # set_tick() called from the target shouldn't schedule one more tick
+        if self._stop_event.is_set():
+            return
+        self._last_start_time = self._clock.now()
+        self._target()
+        if not self._stop_event.is_set():
+            self._timer = self._clock.call_at(self._last_start_time + self._tick_interval, self._virtual_tick)
@@ -0,0 +1,26 @@
+"""Build step: packs all skins into one resource file which is loaded via mmap at startup"""
+import argparse
+import pathlib
+
+from modules.logger import configure_logging
+from modules.resource_pack import PACK_FILE_NAME, pack_resources
+
+RES_PATH = pathlib.Path(__file__).parent / 'res'
+
+
+def main():
+    """
+    Packs skins from app/res into app/res/skins.pack (or given path)
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--output', default=RES_PATH / PACK_FILE_NAME, type=pathlib.Path,
+                        help=f'Where to write the pack, default - app/res/{PACK_FILE_NAME}')
+    args = parser.parse_args()
+    configure_logging()
+
+    packed_count = pack_resources(RES_PATH, args.output)
+    print(f'Packed {packed_count} resources into {args.output}')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""Entry point for game server - many sessions in one process, clients speak line protocol (see game_server)"""
+import argparse
+import asyncio
+
+from modules.game_server import MAX_SESSIONS, GameServer
+from modules.logger import configure_logging
+
+DEFAULT_PORT = 7300
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on, default - 127.0.0.1')
+    parser.add_argument('--port', default=DEFAULT_PORT, type=int, help=f'TCP port, default - {DEFAULT_PORT}')
+    parser.add_argument('--unix-socket', help='Listen on this Unix socket instead of TCP')
+    parser.add_argument('--seed', type=int, help='All sessions get the same figures sequence')
+    parser.add_argument('--max-sessions', default=MAX_SESSIONS, type=int,
+                        help=f'Connections above this number are refused, default - {MAX_SESSIONS}')
+    parser.add_argument('--log-level', default='INFO', help='Log level, default - INFO')
+    args = parser.parse_args()
+
+    configure_logging(args.log_level)
+    server = GameServer(seed=args.seed, max_sessions=args.max_sessions)
+    try:
+        asyncio.run(server.serve_unix(args.unix_socket) if args.unix_socket else
+                    server.serve_tcp(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
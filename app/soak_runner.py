@@ -0,0 +1,47 @@
+"""Soak test runner - plays hours of virtual time and fails if memory, threads, queues or canvas items keep growing"""
+import argparse
+import itertools
+import sys
+
+from modules.logger import configure_logging
+from modules.soak import SAMPLE_INTERVAL_SEC, SoakRunner
+
+
+def tk_runner(options: argparse.Namespace) -> SoakRunner:
+    """Runner which plays with the real window, switching skins to catch leaks of skin loading"""
+    from tk_app import TkTetrisGUI  # pylint: disable=import-outside-toplevel  # needs display
+
+    gui = TkTetrisGUI()
+    soak_runner = SoakRunner(seed=options.seed, sample_interval=options.sample_interval, gui_factory=lambda: gui,
+                             trace_allocations=not options.no_tracemalloc)
+    # pylint: disable=protected-access
+    soak_runner.probes['canvas_items'] = lambda: len(gui._base_canvas.find_all())
+    soak_runner.probes['tk_widgets'] = lambda: len(gui.winfo_children())
+    skins = itertools.cycle(['Matrix', 'Default'])
+
+    def switch_skin(_):
+        gui._load_skin(next(skins))
+        gui.update()
+    soak_runner.sample_hooks.append(switch_skin)
+    return soak_runner
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--hours', default=4, type=float, help='Virtual play time, default - 4 hours')
+    parser.add_argument('--seed', default=0, type=int, help='Random seed of figures and input, default - 0')
+    parser.add_argument('--sample-interval', default=SAMPLE_INTERVAL_SEC, type=float,
+                        help=f'Virtual seconds between samples, default - {SAMPLE_INTERVAL_SEC:g}')
+    parser.add_argument('--no-tracemalloc', action='store_true', help='Faster, but no Python allocations tracking')
+    parser.add_argument('--tk', action='store_true', help='Play in the real window (needs display)')
+    args = parser.parse_args()
+
+    configure_logging('ERROR')
+    if args.tk:
+        runner = tk_runner(args)
+    else:
+        runner = SoakRunner(seed=args.seed, sample_interval=args.sample_interval,
+                            trace_allocations=not args.no_tracemalloc)
+    result = runner.run(args.hours * 3600)
+    print(result.format_report())
+    sys.exit(0 if result.passed else 1)
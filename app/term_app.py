@@ -0,0 +1,35 @@
+"""Entry point for terminal front end - for machines without X server and slow remote links"""
+import argparse
+
+from modules.controls_handler import ARR_SEC, DAS_SEC, ControlsHandler, add_key_repeat_arguments
+from modules.game import FIELD_HEIGHT, FIELD_WIDTH, Game
+from modules.logger import configure_logging
+from modules.terminal_ui import FRAME_INTERVAL_SEC, TerminalGUI, TerminalKeyReader
+
+
+def main(frame_interval: float, das_sec=DAS_SEC, arr_sec=ARR_SEC):
+    """
+    Connects terminal GUI, controls and game logic, returns when user quits
+    """
+    controls_handler = ControlsHandler(das_sec=das_sec, arr_sec=arr_sec)
+    gui = TerminalGUI(FIELD_WIDTH, FIELD_HEIGHT, frame_interval=frame_interval)
+    game = Game(controls_handler=controls_handler, gui=gui)
+    try:
+        TerminalKeyReader(controls_handler).run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        game.stop()
+        controls_handler.stop()
+        gui.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--fps', default=1 / FRAME_INTERVAL_SEC, type=float,
+                        help=f'Max frames per second written to terminal, default - {1 / FRAME_INTERVAL_SEC:g}')
+    add_key_repeat_arguments(parser)
+    args = parser.parse_args()
+
+    configure_logging('ERROR')  # log lines would break the picture
+    main(1 / args.fps, das_sec=args.das / 1000, arr_sec=args.arr / 1000)
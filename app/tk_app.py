@@ -1,18 +1,33 @@
 """Entry point and GUI"""
 import argparse
+import atexit
+import fractions
+import os
+import pathlib
+import threading
 import traceback
-import tkinter as tk
 import typing as t
 
-from simpleaudio import PlayObject
+# Startup profiler goes before heavy imports to catch the time spent on them
+from modules.startup_profiler import startup_profiler
+import tkinter as tk  # pylint: disable=wrong-import-order
 
 from modules.abstract_ui import AbstractGUI
-from modules.controls_handler import ControlsHandler
-from modules.game import Game
+from modules.audio import Sounds, voice_pool
+from modules.controls_handler import ARR_SEC, DAS_SEC, ControlsHandler, add_key_repeat_arguments
+from modules.game import FIELD_HEIGHT, FIELD_WIDTH, Game
+from modules.latency import latency_tracker
 from modules.field import CellState
 from modules.figures import Point
-from modules.logger import logger
-from modules.skin import Skin, Sounds, get_skin
+from modules.logger import configure_logging, get_logger, parse_module_levels
+from modules.perf_counters import PERF_COUNTERS_ENV_VAR, instrument_hot_path, perf_counters
+from modules.perf_hud import HudMetrics, PerfHud
+from modules.skin import ScaledSkins, Skin, fit_scale, get_skin, to_canvas
+from modules.spectator import SpectatorStream
+
+startup_profiler.mark('import tkinter and game modules')
+
+logger = get_logger('gui')
 
 VERSION = '1.2d'
 
@@ -22,28 +37,56 @@ class TkTetrisGUI(tk.Tk, AbstractGUI):  # pylint: disable=too-many-instance-attr
     Main window class
     """
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, scalable=False):
+        """
+        :param scalable: - skin is scaled to fit the window when it's resized, otherwise window has skin size
+        """
+        with startup_profiler.phase('Tk window creation'):
+            super().__init__()
         self.title(f'TkTetris {VERSION}')
 
         # to store ids and states of painted cell images
         self._game_field_cells: dict[Point, tuple[int, CellState]] = {}
 
+        # Game calls come from game threads, canvas is changed only by Tk thread - calls wait here for it
+        self._pending_calls: list[tuple[t.Callable, tuple]] = []
+        self._pending_calls_lock = threading.Lock()  # no Tk calls under it, they could wait for Tk thread
+        self._pump_scheduled = False
+
+        # Performance overlay and its counters
+        self.game: Game | None = None  # source of logic metrics
+        self._frames_count = 0  # painted frames with field changes
+        self._last_frame_ops = 0
+        self._frame_ops = 0  # cell changes waiting to be painted
+        self._frame_traces: list[list[float]] = []  # latency traces of changes waiting to be painted
+        self._frame_scheduled = False
+        self.on_first_frame: t.Callable[[], None] | None = None  # called once the first field cells are painted
+        self._latency_enabled_before_hud = latency_tracker.enabled
+        self._perf_hud = PerfHud(self, self._get_hud_metrics)
+
         self._prepare_ui()  # initialize menus and binds
 
         self._pause_image_id: int | None = None  # to toggle pause
         self._base_canvas: tk.Canvas | None = None
-        self._current_music: list[PlayObject] = []
         self._current_skin_rb: tk.StringVar  # this is for radiobutton
         self._loaded_skin: str | None = None  # this is to control loading skin if it's already loaded
-        self.skin: Skin
+        self.skin: Skin  # scaled to the window
+        self._scaled_skins: ScaledSkins
+        self._scalable = scalable
+        self._scale = fractions.Fraction(1)
 
         self._next_figure_points: set[Point] = set()  # store to repaint if skin changed
         self._next_figure_image_ids: set[int] = set()
 
         self._score_image_ids = set()
+        self._score = 0  # store to repaint if skin changed
 
         self._load_skin()  # paint all stuff now
+        if scalable:
+            # Canvas stays in the middle of the window
+            self.grid_rowconfigure(0, weight=1)
+            self.grid_columnconfigure(0, weight=1)
+            self.bind('<Configure>', self._on_configure)
 
     @property
     def sounds(self) -> Sounds:
@@ -60,87 +103,192 @@ class TkTetrisGUI(tk.Tk, AbstractGUI):  # pylint: disable=too-many-instance-attr
             return
 
         try:
-            self.skin = get_skin(skin_name)
+            with startup_profiler.phase('skin decode'):
+                skin = get_skin(skin_name)
         except (KeyError, tk.TclError):
-            logger.error(f'Cannot load skin "{skin_name}!')
-            logger.debug(traceback.format_exc())
+            logger.error('Cannot load skin "%s"!', skin_name)
+            logger.debug('%s', traceback.format_exc())
             return  # Leave current skin unchanged
 
+        self._scaled_skins = ScaledSkins(skin)
+        scale = fractions.Fraction(1)
+        if self._scalable and self.winfo_ismapped():
+            scale = fit_scale(self.winfo_width(), self.winfo_height(), skin)
+        self._apply_skin(scale)
+
+        # Stop any music
+        voice_pool.stop_all()
+        self._loaded_skin = skin_name
+
+    def _on_configure(self, event: tk.Event):
+        if event.widget is not self:  # children's events come here too
+            return
+        scale = fit_scale(event.width, event.height, self._scaled_skins.skin)
+        if scale != self._scale:
+            logger.debug('Scaling skin by %s', scale)
+            self._apply_skin(scale)
+
+    def _apply_skin(self, scale: fractions.Fraction):
+        """
+        Builds canvas for the skin scaled by the factor and repaints everything on it
+        """
+        first_paint = self._base_canvas is None
+        self.skin = self._scaled_skins.get(scale)
+        self._scale = scale
+
+        # The old canvas goes away with all its items, ids of them are meaningless on the new one
+        if self._base_canvas is not None:
+            self._base_canvas.destroy()
+        self._next_figure_image_ids = set()
+        self._score_image_ids = set()
         self._base_canvas = tk.Canvas(master=self,
                                       width=self.skin.base_image.width(),
                                       height=self.skin.base_image.height())
         self._base_canvas.create_image(0, 0, image=self.skin.base_image, anchor=tk.NW)
-        self._base_canvas.grid(column=0, row=0, sticky=tk.NW)
-        self.geometry(f'{self.skin.base_image.width()}x{self.skin.base_image.height()}')
+        self._base_canvas.grid(column=0, row=0, sticky='' if self._scalable else tk.NW)
+        self._perf_hud.attach(self._base_canvas)
+        if first_paint or not self._scalable:  # resized window keeps the size user gave it
+            self.geometry(f'{self.skin.base_image.width()}x{self.skin.base_image.height()}')
 
         # Scores
-        self.show_score(0)
-
-        # Stop any music
-        for i in self._current_music:
-            i.stop()
-        self._loaded_skin = skin_name
+        self._show_score(self._score)
 
-        # Repaint stuff if any
-        self.show_next_figure(self._next_figure_points)
-        for point, cell in self._game_field_cells.items():
-            if cell[1] == CellState.FILLED:
-                self._paint_cell(point, self.skin.cell_filled_image)
+        # Repaint stuff if any, field changes can't come in the middle - they are applied by this thread too
+        self._show_next_figure(self._next_figure_points)
+        for point, (_, cell_state) in list(self._game_field_cells.items()):
+            self._game_field_cells[point] = (self._paint_cell(point, self._cell_image(cell_state)), cell_state)
+        if self._pause_image_id is not None:
+            self._pause_image_id = None
+            self._toggle_pause()
+
+    def _call_in_tk_thread(self, function: t.Callable, *arguments):
+        """Queues the call, Tk thread makes queued calls in order"""
+        with self._pending_calls_lock:
+            self._pending_calls.append((function, arguments))
+            schedule, self._pump_scheduled = not self._pump_scheduled, True
+        if schedule:
+            self.after(0, self._make_pending_calls)
+
+    def _make_pending_calls(self):
+        with self._pending_calls_lock:
+            calls, self._pending_calls = self._pending_calls, []
+            self._pump_scheduled = False
+        for function, arguments in calls:
+            function(*arguments)
 
     def show_next_figure(self, points: set[Point]):
+        self._call_in_tk_thread(self._show_next_figure, points)
+
+    def _show_next_figure(self, points: set[Point]):
         self._next_figure_points = points
         for i in self._next_figure_image_ids:
             self._base_canvas.delete(i)
         self._next_figure_image_ids = set()
         for x, y in points:
-            _x = x * self.skin.cell_size + self.skin.next_figure_field_offset_x - self.skin.cell_anchor_offset_x
-            _y = y * self.skin.cell_size + self.skin.next_figure_field_offset_y - self.skin.cell_anchor_offset_y
+            _x, _y = to_canvas(
+                x * self.skin.cell_size + self.skin.next_figure_field_offset_x - self.skin.cell_anchor_offset_x,
+                y * self.skin.cell_size + self.skin.next_figure_field_offset_y - self.skin.cell_anchor_offset_y,
+                self._scale)
             self._next_figure_image_ids.add(
                 self._base_canvas.create_image(_x, _y, anchor=tk.NW, image=self.skin.cell_falling_image))
 
     def show_score(self, score: int):
+        self._call_in_tk_thread(self._show_score, score)
+
+    def _show_score(self, score: int):
+        self._score = score
         for i in self._score_image_ids:
             self._base_canvas.delete(i)
         score_str = f'{score:04d}'
         for i, digit in enumerate(score_str):
-            x = self.skin.score_digit_offset_x + i * self.skin.digit_width
-            self._score_image_ids.add(self._base_canvas.create_image(x, self.skin.score_digit_offset_y,
-                                                                     anchor=tk.NW, image=self.skin.digit_images[digit]))
+            x, y = to_canvas(self.skin.score_digit_offset_x + i * self.skin.digit_width,
+                             self.skin.score_digit_offset_y, self._scale)
+            self._score_image_ids.add(self._base_canvas.create_image(x, y, anchor=tk.NW,
+                                                                     image=self.skin.digit_images[digit]))
 
     def _paint_cell(self, point: Point, cell_image: tk.PhotoImage) -> int:
-        x = point.x * self.skin.cell_size + self.skin.game_field_offset_x - self.skin.cell_anchor_offset_x
-        y = point.y * self.skin.cell_size + self.skin.game_field_offset_y - self.skin.cell_anchor_offset_y
+        x, y = to_canvas(point.x * self.skin.cell_size + self.skin.game_field_offset_x - self.skin.cell_anchor_offset_x,
+                         point.y * self.skin.cell_size + self.skin.game_field_offset_y - self.skin.cell_anchor_offset_y,
+                         self._scale)
         return self._base_canvas.create_image(x, y, anchor=tk.NW, image=cell_image)
 
-    def apply_field_change(self, changed_points: t.OrderedDict[CellState, set[Point]]):
+    def apply_field_change(self, changed_points: t.OrderedDict[CellState, set[Point]],
+                           trace: list[float] | None = None):
+        self._call_in_tk_thread(self._apply_field_change, changed_points, trace)
+
+    def _apply_field_change(self, changed_points: t.OrderedDict[CellState, set[Point]],
+                            trace: list[float] | None = None):
+        ops = 0
         for cell_state, points in changed_points.items():
             if cell_state == CellState.EMPTY:
                 self._remove_cells(points)
             else:
                 self._paint_cells(points, cell_state)
+            ops += len(points)
+        if not self._frame_scheduled:
+            # Tk redraws canvas when it's idle, this idle callback is queued after the redraw
+            self._frame_scheduled = True
+            self.after_idle(self._on_frame_painted)
+        self._frame_ops += ops
+        if trace is not None:
+            self._frame_traces.append(trace)
+
+    def _on_frame_painted(self):
+        self._frame_scheduled = False
+        self._frames_count += 1
+        self._last_frame_ops, self._frame_ops = self._frame_ops, 0
+        traces, self._frame_traces = self._frame_traces, []
+        for trace in traces:
+            latency_tracker.finish(trace)
+        if self.on_first_frame is not None:
+            on_first_frame, self.on_first_frame = self.on_first_frame, None
+            on_first_frame()
+
+    def _get_hud_metrics(self) -> HudMetrics:
+        return HudMetrics(frames=self._frames_count,
+                          ticks=0 if self.game is None else self.game.tick_count,
+                          queue_depth=0 if self.game is None else self.game.field_events_depth,
+                          last_frame_ops=self._last_frame_ops,
+                          latency_sec=latency_tracker.last_total_sec)
+
+    def _toggle_perf_hud(self):
+        if self._perf_hud.visible:
+            latency_tracker.enabled = self._latency_enabled_before_hud  # tracing costs, don't leave it on
+        else:
+            self._latency_enabled_before_hud = latency_tracker.enabled
+            latency_tracker.enabled = True  # HUD shows input latency, nothing to show if it's not measured
+        self._perf_hud.toggle()
+
+    def _cell_image(self, state: CellState) -> tk.PhotoImage:
+        return self.skin.cell_falling_image if state == CellState.FALLING else self.skin.cell_filled_image
 
     def _remove_cells(self, points: set[Point]):
         for point in points:
-            image_id, _ = self._game_field_cells.pop(point, None)
+            image_id, _ = self._game_field_cells.pop(point, (None, None))
             if image_id is not None:
                 self._base_canvas.delete(image_id)
 
     def _paint_cells(self, points: set[Point], state: CellState):
-        cell_image = self.skin.cell_falling_image if state == CellState.FALLING else self.skin.cell_filled_image
+        cell_image = self._cell_image(state)
         for point in points:
+            previous = self._game_field_cells.get(point)
+            if previous is not None:  # don't leave the old image under the new one
+                self._base_canvas.delete(previous[0])
             self._game_field_cells[point] = (self._paint_cell(point, cell_image), state)
 
     def game_over(self):
         pass
 
     def toggle_pause(self):
+        self._call_in_tk_thread(self._toggle_pause)
+
+    def _toggle_pause(self):
         if self._pause_image_id is not None:
             self._base_canvas.delete(self._pause_image_id)
             self._pause_image_id = None
         else:
-            self._pause_image_id = self._base_canvas.create_image(self.skin.pause_image_offset_x,
-                                                                  self.skin.pause_image_offset_y,
-                                                                  anchor=tk.NW, image=self.skin.pause_image)
+            x, y = to_canvas(self.skin.pause_image_offset_x, self.skin.pause_image_offset_y, self._scale)
+            self._pause_image_id = self._base_canvas.create_image(x, y, anchor=tk.NW, image=self.skin.pause_image)
 
     def _prepare_ui(self):
 
@@ -158,6 +306,9 @@ class TkTetrisGUI(tk.Tk, AbstractGUI):  # pylint: disable=too-many-instance-attr
                               variable=self._current_skin_rb, value='Matrix')
         popup.add_separator()
         popup.add_command(label='New Game', command=self.new_game)
+        if latency_tracker.enabled:
+            popup.add_command(label='Input Latency Report', command=latency_tracker.dump)
+        popup.add_command(label='Performance HUD (F3)', command=self._toggle_perf_hud)
 
         def menu_popup(event):
             # display the popup menu
@@ -168,22 +319,46 @@ class TkTetrisGUI(tk.Tk, AbstractGUI):  # pylint: disable=too-many-instance-attr
                 popup.grab_release()
 
         self.bind("<Button-3>", menu_popup)
+        self.bind("<F3>", lambda _: self._toggle_perf_hud())
 
 
-def main():
+def main(das_sec=DAS_SEC, arr_sec=ARR_SEC, spectator_file: pathlib.Path | None = None, scalable=False):
     """
     Connects GUI, controls and game logic
+    :param scalable: - scale skin to the window size
+    :param spectator_file: - write spectator stream of the game to this file (or pipe)
     """
-    controls_handler = ControlsHandler()
+    if startup_profiler.enabled:
+        # Imported lazily on first use, import it here to see its cost separately. yaml isn't here - with
+        # resource pack it's not imported at all, without it its cost goes to skin decode
+        startup_profiler.timed_import('simpleaudio')
 
     # Create main GUI class and bind controls handler to it
-    gui = TkTetrisGUI()
+    gui = TkTetrisGUI(scalable=scalable)
+    startup_profiler.mark('GUI setup')
+
+    controls_handler = ControlsHandler(das_sec=das_sec, arr_sec=arr_sec)
     gui.bind(sequence='<KeyPress>', func=controls_handler.on_key_press)
     gui.bind(sequence='<KeyRelease>', func=controls_handler.on_key_release)
     gui.geometry("+800+300")
 
     # Game logic class - binds GUI, controls and logic together
-    Game(controls_handler=controls_handler, gui=gui)
+    gui.game = Game(controls_handler=controls_handler, gui=gui)
+    if spectator_file is not None:
+        spectator_stream = SpectatorStream(FIELD_WIDTH, FIELD_HEIGHT)
+        gui.game.add_field_listener(spectator_stream.on_field_event)
+        spectator_output = open(spectator_file, 'wb', buffering=0)  # pylint: disable=consider-using-with
+        atexit.register(spectator_output.close)
+        spectator_stream.subscribe(spectator_output.write)
+        atexit.register(spectator_stream.close, timeout=1)  # runs before the output is closed
+    startup_profiler.mark('thread start')
+
+    def on_first_paint():
+        startup_profiler.mark('first paint')
+        startup_profiler.finish()
+
+    # Empty canvas doesn't count - the mark is taken when the first field cells are painted
+    gui.on_first_frame = on_first_paint
 
     # Start application
     gui.mainloop()
@@ -193,8 +368,41 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument('--log-level', default='WARNING', dest='log_level',
                         help='Logging level. Example --loglevel=DEBUG, default level - WARNING')
+    parser.add_argument('--module-log-level', default=[], action='append', dest='module_log_levels',
+                        help='Logging level of one module, could be repeated. Example --module-log-level=game=DEBUG')
+    parser.add_argument('--log-file', default=None, dest='log_file', type=pathlib.Path,
+                        help='Also write logs to this file, it is rotated when becomes too big')
+    parser.add_argument('--profile-startup', action='store_true', dest='profile_startup',
+                        help='Print startup phases breakdown and write it to --profile-startup-report file')
+    parser.add_argument('--profile-startup-report', default='startup_profile.json', dest='profile_startup_report',
+                        type=pathlib.Path, help='Where to write JSON startup report, default - startup_profile.json')
+    parser.add_argument('--latency-report', default=None, dest='latency_report', type=pathlib.Path,
+                        help='Measure input latency, write the JSON report to given file on exit or on demand')
+    add_key_repeat_arguments(parser)
+    parser.add_argument('--perf-counters', default=os.environ.get(PERF_COUNTERS_ENV_VAR) or None,
+                        dest='perf_counters', type=pathlib.Path,
+                        help=f'Count and time game logic hot path, print the table and write JSON to given file on '
+                             f'exit. Could be enabled by {PERF_COUNTERS_ENV_VAR} environment variable too')
+    parser.add_argument('--spectator-file', default=None, dest='spectator_file', type=pathlib.Path,
+                        help='Write spectator stream of the game to given file or named pipe')
+    parser.add_argument('--scalable', action='store_true', dest='scalable',
+                        help='Scale the skin when the window is resized, for big and high-DPI screens')
     args = parser.parse_args()
 
-    logger.setLevel(args.log_level.upper())
-
-    main()
+    try:
+        configure_logging(args.log_level, parse_module_levels(args.module_log_levels), args.log_file)
+    except ValueError as error:
+        parser.error(str(error))
+    startup_profiler.enabled = args.profile_startup
+    startup_profiler.report_path = args.profile_startup_report
+    if args.latency_report is not None:
+        latency_tracker.enabled = True
+        latency_tracker.report_path = args.latency_report
+        atexit.register(latency_tracker.dump)
+    if args.perf_counters is not None:
+        instrument_hot_path(perf_counters)
+        perf_counters.report_path = args.perf_counters
+        atexit.register(perf_counters.dump)
+
+    main(das_sec=args.das / 1000, arr_sec=args.arr / 1000, spectator_file=args.spectator_file,
+         scalable=args.scalable)
@@ -1,6 +1,9 @@
 :: Install dependencies for python
 py -3 -m pip install -r requirements.txt
 
+:: Pack skins into one file, it's mapped at startup instead of unpacking dozens of small files
+py -3 %~dp0app\pack_skins.py
+
 :: Build EXE wrapper
 py -3 -m PyInstaller %~dp0app\tk_app.py --clean -F --specpath %~dp0\build --log-level ERROR --paths %~dp0app ^
---add-data "%~dp0\app;app" --windowed
\ No newline at end of file
+--add-data "%~dp0\app\res\skins.pack;app\res" --windowed
\ No newline at end of file
@@ -0,0 +1,94 @@
+"""Tests for voice pool limits and coalescing"""
+import pytest
+
+import app.modules.audio as a
+
+
+class FakePlayObject:
+    """Playback which lasts until stopped"""
+
+    def __init__(self):
+        self.playing = True
+
+    def is_playing(self):
+        """Same as simpleaudio.PlayObject.is_playing"""
+        return self.playing
+
+    def stop(self):
+        """Same as simpleaudio.PlayObject.stop"""
+        self.playing = False
+
+
+class FakeWaveObject:  # pylint: disable=too-few-public-methods
+    """Remembers all playbacks"""
+
+    def __init__(self):
+        self.play_objects = []
+
+    def play(self):
+        """Same as simpleaudio.WaveObject.play"""
+        self.play_objects.append(FakePlayObject())
+        return self.play_objects[-1]
+
+
+class FakeTime:  # pylint: disable=too-few-public-methods
+    """Time which moves only by hand"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(name='fake_time')
+def fixture_fake_time():
+    """Manual time"""
+    return FakeTime()
+
+
+def test_coalesce(fake_time):
+    """Triggers within one frame are merged"""
+    pool = a.VoicePool(coalesce_window_sec=0.01, time_func=fake_time)
+    wave = FakeWaveObject()
+    voice = pool.voice(wave, max_concurrent=5)
+    voice.play()
+    voice.play()
+    fake_time.now += 0.02
+    voice.play()
+    assert len(wave.play_objects) == 2
+    assert pool.coalesced_count == 1
+
+
+def test_max_concurrent(fake_time):
+    """The oldest playback of the sound is stopped when the sound is out of voices"""
+    pool = a.VoicePool(time_func=fake_time)
+    wave = FakeWaveObject()
+    voice = pool.voice(wave, max_concurrent=2)
+    for _ in range(3):
+        voice.play()
+        fake_time.now += 1
+    assert [p.playing for p in wave.play_objects] == [False, True, True]
+    assert pool.active_count == 2
+
+
+def test_max_voices(fake_time):
+    """The oldest playback at all is stopped when the pool is out of voices"""
+    pool = a.VoicePool(max_voices=2, time_func=fake_time)
+    waves = [FakeWaveObject() for _ in range(3)]
+    for wave in waves:
+        pool.voice(wave).play()
+    assert [wave.play_objects[0].playing for wave in waves] == [False, True, True]
+    assert pool.stolen_count == 1
+
+
+def test_finished_are_dropped(fake_time):
+    """Finished playbacks don't hold voices"""
+    pool = a.VoicePool(max_voices=1, time_func=fake_time)
+    first, second = FakeWaveObject(), FakeWaveObject()
+    pool.voice(first).play()
+    first.play_objects[0].playing = False
+    pool.voice(second).play()
+    assert pool.stolen_count == 0
+    pool.stop_all()
+    assert pool.active_count == 0
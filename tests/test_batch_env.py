@@ -0,0 +1,68 @@
+"""Tests for vectorized batch environment"""
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+be = pytest.importorskip('app.modules.batch_env')
+from app.modules.figures import IFigure, Rotation, all_figures  # pylint: disable=wrong-import-position
+
+
+def test_shapes_follow_figures():
+    """Figure definitions are shared with the game"""
+    shapes = be.figure_shapes()
+    for kind, figure_class in enumerate(all_figures):
+        figure = figure_class(random.Random(0))
+        for rotation in Rotation:
+            assert {tuple(cell) for cell in shapes[kind, rotation]} == figure[rotation]
+
+
+def test_row_removed():
+    """I figure dropped into the gap removes the row and gives reward"""
+    env = be.BatchEnv(2, seed=1)
+    env.boards[0, -1, 1:] = 1
+    env.boards[0, -2, 2:] = 1
+    env.kind[0] = all_figures.index(IFigure)
+    env.rotation[0] = Rotation.NORTH  # vertical, cells x=1
+    env.x[0] = -1
+    env.y[0] = 0
+    _, rewards, dones = env.step([be.Action.DROP, be.Action.NOOP])
+    assert rewards.tolist() == [be.ROW_SCORE, 0]
+    assert not dones.any()
+    assert env.boards[0, -1].tolist() == [1, 0, 1, 1, 1, 1, 1, 1, 1, 1]  # former second row moved down
+    assert env.boards[0, -2].tolist() == [1] * 1 + [0] * 9
+
+
+def test_walls_and_buffers():
+    """Figures don't leave the field, step returns the same buffers every time"""
+    env = be.BatchEnv(64, seed=2)
+    observations = env.observations
+    for action in [be.Action.LEFT] * 8 + [be.Action.ROTATE, be.Action.RIGHT] * 8:
+        result = env.step(np.full(64, action))
+        assert result[0] is observations
+        assert ((observations == 2).sum(axis=(1, 2)) <= 4).all()
+
+
+def test_random_play_until_game_over():
+    """Random agent fills the boards, games are restarted automatically"""
+    env = be.BatchEnv(64, seed=3)
+    rng = np.random.default_rng(3)
+    done_count = 0
+    for _ in range(500):
+        _, _, dones = env.step(rng.integers(len(be.Action), size=64))
+        done_count += int(dones.sum())
+        assert set(np.unique(env.boards)) <= {0, 1}
+    assert done_count > 0
+
+
+def test_drop_distance():
+    """Drop distance is the same as moving down one cell while possible"""
+    env = be.BatchEnv(128, seed=4)
+    rng = np.random.default_rng(4)
+    env.boards[:, 10:] = rng.random((128, env.height - 10, env.width)) < 0.3
+    expected = np.zeros(128, dtype=int)
+    y = env.y.copy()
+    while (can_fall := env._fits(env.rotation, env.x, y + 1)).any():  # pylint: disable=protected-access
+        expected += can_fall
+        y += can_fall
+    assert env._drop_distance().tolist() == expected.tolist()  # pylint: disable=protected-access
@@ -0,0 +1,81 @@
+"""Tests for virtual clock and the game running on it"""
+import random
+import time
+import types
+
+import app.modules.clock as clk
+import app.modules.controls_handler as ch
+import app.modules.game as gm
+import app.modules.headless_ui as hui
+from app.modules.tick_thread import TickThread
+
+LEFT = types.SimpleNamespace(keycode=37)
+DOWN = types.SimpleNamespace(keycode=40)
+
+
+def test_timers_order():
+    """Timers fire by deadline, equal deadlines - in scheduling order, cancelled ones don't"""
+    clock = clk.VirtualClock()
+    fired = []
+    clock.call_later(2, lambda: fired.append(('b', clock.now())))
+    clock.call_later(1, lambda: fired.append(('a', clock.now())))
+    clock.call_later(2, lambda: fired.append(('c', clock.now())))
+    clock.call_later(1.5, lambda: fired.append('cancelled')).cancel()
+    clock.advance(5)
+    assert fired == [('a', 1), ('b', 2), ('c', 2)]
+    assert clock.now() == 5
+
+
+def test_tick_thread_set_tick():
+    """Virtual ticks follow changed interval without OS thread"""
+    clock = clk.VirtualClock()
+    times = []
+    thread = TickThread(lambda: times.append(clock.now()), 1, startup_sleep_sec=0.5, clock=clock)
+    thread.start()
+    clock.advance(2)
+    thread.set_tick(0.25)
+    clock.advance(0.5)
+    thread.stop()
+    clock.advance(10)
+    assert not thread.is_alive()
+    assert times == [0.5, 1.5, 2.0, 2.25, 2.5]  # overdue tick after shortening runs at once
+
+
+def test_key_repeat():
+    """DAS and ARR are counted in virtual time"""
+    clock = clk.VirtualClock()
+    controls_handler = ch.ControlsHandler(das_sec=0.2, arr_sec=0.1, clock=clock)
+    controls_handler.on_key_press(LEFT)
+    clock.advance(0.45)
+    controls_handler.on_key_release(LEFT)
+    clock.advance(1)
+    commands = []
+    while not controls_handler.events_q.empty():
+        commands.append(controls_handler.events_q.get().payload)
+    assert commands == [ch.Commands.MOVE_LEFT] * 4  # press, 0.2, 0.3, 0.4
+
+
+def _play(seed: int) -> tuple[int, int, float]:
+    """Plays the game until game over with some key presses, returns score, ticks and virtual duration"""
+    clock = clk.VirtualClock()
+    controls_handler = ch.ControlsHandler(clock=clock)
+    gui = hui.RecordingGUI()
+    game = gm.Game(controls_handler=controls_handler, gui=gui, clock=clock, rng=random.Random(seed))
+    keys = random.Random(seed)
+    while not clock.advance(keys.uniform(0.1, 3), until=lambda: game.is_over) and clock.now() < 100000:
+        key = keys.choice([LEFT, DOWN, types.SimpleNamespace(keycode=39), types.SimpleNamespace(keycode=38)])
+        controls_handler.on_key_press(key)
+        clock.advance(keys.uniform(0, 0.5))
+        controls_handler.on_key_release(key)
+    game.stop()
+    assert gui.is_game_over
+    return gui.score, game.tick_count, clock.now()
+
+
+def test_game_is_fast_and_deterministic():
+    """Whole game runs much faster than real time and repeats with the same seed"""
+    start = time.perf_counter()
+    result = _play(3)
+    elapsed = time.perf_counter() - start
+    assert result[2] > 100 * elapsed
+    assert _play(3) == result
@@ -0,0 +1,68 @@
+"""Tests for key auto-repeat"""
+import types
+
+import app.modules.controls_handler as ch
+from app.modules.clock import VirtualClock
+from app.modules.latency import latency_tracker
+
+LEFT = types.SimpleNamespace(keycode=37)
+UP = types.SimpleNamespace(keycode=38)
+
+
+def drain(controls_handler: ch.ControlsHandler) -> list[ch.Commands]:
+    """Returns all commands from the queue"""
+    commands = []
+    while not controls_handler.events_q.empty():
+        commands.append(controls_handler.events_q.get().payload)
+    return commands
+
+
+def test_single_press():
+    """Short press gives exactly one command, OS key repeat is ignored"""
+    clock = VirtualClock()
+    controls_handler = ch.ControlsHandler(das_sec=10, clock=clock)
+    controls_handler.on_key_press(LEFT)
+    clock.advance(1)
+    controls_handler.on_key_press(LEFT)
+    controls_handler.on_key_release(LEFT)
+    clock.advance(20)
+    assert drain(controls_handler) == [ch.Commands.MOVE_LEFT]
+
+
+def test_not_repeatable():
+    """Rotation isn't repeated however long the key is held"""
+    clock = VirtualClock()
+    controls_handler = ch.ControlsHandler(das_sec=0, arr_sec=0.001, clock=clock)
+    controls_handler.on_key_press(UP)
+    clock.advance(1)
+    assert drain(controls_handler) == [ch.Commands.ROTATE]
+
+
+def test_repeat():
+    """Held key is repeated after DAS with ARR interval"""
+    clock = VirtualClock()
+    controls_handler = ch.ControlsHandler(das_sec=0.25, arr_sec=0.125, clock=clock)
+    controls_handler.on_key_press(LEFT)
+    clock.advance(0.2)
+    assert drain(controls_handler) == [ch.Commands.MOVE_LEFT]  # DAS isn't passed yet
+    clock.advance(0.75)
+    assert drain(controls_handler) == [ch.Commands.MOVE_LEFT] * 6  # at 0.25, 0.375, ... 0.875
+    controls_handler.on_key_release(LEFT)
+    clock.advance(1)
+    assert not drain(controls_handler)
+
+
+def test_zero_arr():
+    """With zero ARR held key shifts the figure to the wall once"""
+    clock = VirtualClock()
+    controls_handler = ch.ControlsHandler(das_sec=0.01, arr_sec=0, clock=clock)
+    controls_handler.on_key_press(LEFT)
+    clock.advance(1)
+    assert drain(controls_handler) == [ch.Commands.MOVE_LEFT, ch.Commands.SHIFT_LEFT]
+
+
+def test_trace_only_when_tracking(monkeypatch):
+    """Events carry latency trace only while latency tracker is enabled"""
+    assert ch.ControlEvent(ch.ControlEventType.KEY_PRESS).trace is None
+    monkeypatch.setattr(latency_tracker, 'enabled', True)
+    assert len(ch.ControlEvent(ch.ControlEventType.KEY_PRESS).trace) == 1
@@ -0,0 +1,87 @@
+"""Tests for memory-mapped training dataset"""
+import json
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+ds = pytest.importorskip('app.modules.dataset')
+# pylint: disable=wrong-import-position
+from app.modules.field import CellState, Field, FieldEvent, FieldEventType, FIELD_HIDDEN_TOP_ROWS_NUMBER
+from app.modules.figures import OFigure
+
+
+def test_board_model_follows_events():
+    """Cells, next figure and game over come from field events"""
+    model = ds.BoardModel(4, 2)
+    model.on_field_event(FieldEvent(FieldEventType.CELL_STATE_CHANGE,
+                                    ((CellState.FILLED, (4, 5)), (CellState.FALLING, (0,)))))
+    model.on_field_event(FieldEvent(FieldEventType.NEW_FIGURE, ((0, 0), (1, 1))))
+    board, figure, next_figure = model.snapshot()
+    assert np.unpackbits(board)[:8].tolist() == [0, 0, 0, 0, 1, 1, 0, 0]
+    assert np.unpackbits(figure)[:8].tolist() == [1, 0, 0, 0, 0, 0, 0, 0]
+    assert next_figure == 1 | 1 << 5
+    assert not model.is_game_over
+    model.on_field_event(FieldEvent(FieldEventType.GAME_OVER))
+    assert model.is_game_over
+
+
+def test_writer_grows_and_truncates(tmp_path):
+    """Files grow by chunks while writing and hold exactly count records after close"""
+    model = ds.BoardModel(10, 20)
+    with ds.DatasetWriter(tmp_path, 10, 20, chunk_records=4) as writer:
+        for i in range(10):
+            model.cells[i] = CellState.FILLED
+            writer.append(model.snapshot(), i % 6, float(i))
+        assert (tmp_path / 'action').stat().st_size == 12
+    assert (tmp_path / 'action').stat().st_size == 10
+    assert (tmp_path / 'board').stat().st_size == 10 * 25
+    assert json.loads((tmp_path / ds.INDEX_FILE_NAME).read_text(encoding='utf-8'))['count'] == 10
+
+    reader = ds.DatasetReader(tmp_path)
+    assert len(reader) == 10
+    batches = list(reader.iter_batches(4))
+    assert [len(batch['action']) for batch in batches] == [4, 4, 2]
+    assert batches[2]['reward'].tolist() == [8.0, 9.0]
+    boards = reader.unpack(batches[2]['board'])
+    assert boards.shape == (2, 20, 10)
+    assert boards[1, 0].tolist() == [1] * 10
+    assert boards[0, 0].tolist() == [1] * 9 + [0]
+
+
+def test_empty_dataset(tmp_path):
+    """Reader works for a dataset without records"""
+    ds.DatasetWriter(tmp_path).close()
+    reader = ds.DatasetReader(tmp_path)
+    assert len(reader) == 0
+    assert not list(reader.iter_batches())
+
+
+def test_self_play_is_deterministic(tmp_path):
+    """The same seed writes the same records, boards are legal game states"""
+    games = ds.export_self_play(tmp_path / 'a', 3000, seed=5, chunk_records=1000)
+    ds.export_self_play(tmp_path / 'b', 3000, seed=5, chunk_records=1000)
+    first, second = ds.DatasetReader(tmp_path / 'a'), ds.DatasetReader(tmp_path / 'b')
+    assert len(first) == 3000
+    assert games >= 1
+    for name, column in first.columns.items():
+        assert np.array_equal(column, second.columns[name]), name
+    boards = first.unpack(first.columns['board'])
+    figures = first.unpack(first.columns['figure'])
+    assert not (boards & figures).any()
+    assert set(np.unique(first.columns['reward'])) <= {0.0, 10.0, 20.0, 30.0, 40.0}
+
+
+def test_reward_goes_to_completing_action():
+    """Row completed by a drop is removed and rewarded within the same record, not the next one"""
+    field = Field(ds.FIELD_WIDTH, ds.FIELD_HEIGHT + FIELD_HIDDEN_TOP_ROWS_NUMBER, random.Random(0))
+    model = ds.BoardModel(ds.FIELD_WIDTH, ds.FIELD_HEIGHT)
+    field._next_figure = OFigure(random.Random(0))  # pylint: disable=protected-access
+    bottom = field.height - 1
+    for x in range(field.width):
+        if x not in (4, 5):  # O figure falls into this gap
+            field._set(x, bottom, CellState.FILLED)  # pylint: disable=protected-access
+    ds._step(field, model, lambda: None)  # pylint: disable=protected-access
+    assert ds._step(field, model, lambda: ds._drop(field)) == 1  # pylint: disable=protected-access
+    board, _, _ = model.snapshot()
+    assert np.unpackbits(board)[-ds.FIELD_WIDTH:].tolist() == [0] * 4 + [1, 1] + [0] * 4
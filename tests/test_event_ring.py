@@ -0,0 +1,104 @@
+"""Tests for bounded field events channel"""
+import random
+import threading
+from queue import Empty
+
+import pytest
+
+import app.modules.event_ring as er
+import app.modules.field as fld
+from app.modules.figures import Point
+
+
+def test_fifo_and_drain():
+    """Items come out in order, drain respects max_items"""
+    ring = er.EventRing(capacity=4)
+    for i in range(3):
+        ring.put(i)
+    assert ring.drain(max_items=2) == [0, 1]
+    ring.put(3)
+    ring.put(4)
+    assert ring.drain() == [2, 3, 4]
+    assert ring.stats()['high_water_mark'] == 3
+
+
+def test_empty():
+    """Non-blocking get from empty ring raises like Queue does"""
+    ring = er.EventRing()
+    with pytest.raises(Empty):
+        ring.get(block=False)
+    assert not ring.drain(timeout=0.01)
+
+
+def test_overflow_timeout():
+    """Full ring drops item after timeout and counts it"""
+    ring = er.EventRing(capacity=2)
+    ring.put(1)
+    ring.put(2)
+    assert not ring.put(3, timeout=0.01)
+    assert ring.stats()['overflow_count'] == 1
+    assert ring.stats()['dropped_count'] == 1
+    assert len(ring) == 2
+
+
+def test_producer_waits_for_consumer():
+    """Producer is blocked while the ring is full and nothing is lost"""
+    ring = er.EventRing(capacity=8)
+    count = 10000
+    producer = threading.Thread(target=lambda: [ring.put(i) for i in range(count)])
+    producer.start()
+    received = []
+    while len(received) < count:
+        received.extend(ring.drain(timeout=1))
+    producer.join()
+    assert received == list(range(count))
+    assert ring.stats()['high_water_mark'] <= 8
+
+
+def test_unpack_cell_delta():
+    """Packed cells are converted back to points keeping states order"""
+    payload = ((fld.CellState.EMPTY, (0, 11)), (fld.CellState.FALLING, (12, 25)))
+    changes = fld.unpack_cell_delta(payload, width=10)
+    assert list(changes) == [fld.CellState.EMPTY, fld.CellState.FALLING]
+    assert changes[fld.CellState.EMPTY] == {Point(0, 0), Point(1, 1)}
+    assert changes[fld.CellState.FALLING] == {Point(2, 1), Point(5, 2)}
+
+
+def _play_from_two_threads(field: fld.Field, rng: random.Random) -> list[fld.FieldEvent]:
+    """Ticks and moves the figure until game over while another thread moves it too, returns received events"""
+    received = []
+    errors = []
+    done = threading.Event()
+
+    def consume():
+        while not done.is_set() or len(field.events_q):
+            received.extend(field.events_q.drain(timeout=0.01))
+
+    def move():
+        try:
+            while not done.is_set():
+                rng.choice([field.move_left, field.move_right, field.rotate])()
+        except Exception as exc:  # pylint: disable=broad-except
+            errors.append(exc)
+
+    threads = [threading.Thread(target=consume), threading.Thread(target=move)]
+    for thread in threads:
+        thread.start()
+    while field.tick():
+        rng.choice([field.move_left, field.move_right, field.rotate])()
+    done.set()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    return received
+
+
+def test_field_producers_are_serialized():
+    """Ticks and moves from different threads don't lose events - every put reaches the consumer"""
+    rows_removed = 0
+    for seed in range(20):
+        field = fld.Field(4, 24, random.Random(seed))  # narrow field - rows are removed often
+        received = _play_from_two_threads(field, random.Random(seed))
+        assert len(received) == field.events_q.put_count
+        rows_removed += received.count(fld.FieldEvent(fld.FieldEventType.ROW_REMOVED))
+    assert rows_removed
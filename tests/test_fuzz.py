@@ -0,0 +1,61 @@
+"""Tests for differential fuzzing of Field backends"""
+import app.modules.fuzz as fz
+from app.modules.rotation import SRS_KICKS
+
+
+def srs_backend(seed: int) -> fz.Backend:
+    """Field with other rotation rules - must be caught"""
+    return fz.FieldBackend(fz._new_field(fz.Field, seed, kick_table=SRS_KICKS))  # pylint: disable=protected-access
+
+
+def test_cases_are_reproducible():
+    """Case is made from its seed only"""
+    assert fz.random_case(7, 100) == fz.random_case(7, 100)
+    assert fz.random_case(7, 100) != fz.random_case(8, 100)
+
+
+def test_field_matches_reference():
+    """Game field with kick table rotation follows the reference rules"""
+    steps = 0
+    for case_seed in range(10):
+        divergence, case_steps = fz.run_case(fz.random_case(case_seed), fz.field_backend)
+        assert divergence is None, divergence
+        steps += case_steps
+    assert steps > 2000
+
+
+def test_divergence_is_shrunk():
+    """Different rotation is found and shrunk to a case from which no command could be removed"""
+    case = fz.random_case(2)
+    divergence, _ = fz.run_case(case, srs_backend)
+    assert divergence is not None
+    minimal = fz.shrink(case, srs_backend)
+    assert len(minimal.commands) < divergence.step
+    assert minimal.commands[-1] == fz.Command.ROTATE
+    assert fz.run_case(minimal, srs_backend)[0] is not None
+    for i in range(len(minimal.commands)):
+        shorter = fz.Case(minimal.seed, minimal.commands[:i] + minimal.commands[i + 1:])
+        assert fz.run_case(shorter, srs_backend)[0] is None
+
+
+def test_fuzz_on_process_pool():
+    """Cases are spread over worker processes"""
+    result = fz.fuzz('field', max_cases=fz.CASES_PER_TASK + 5, length=200, workers=2)
+    assert result.failure is None
+    assert result.cases == fz.CASES_PER_TASK + 5
+    assert result.steps > 0
+    assert 'PASSED' in result.format_report()
+
+
+def test_reference_is_not_shared_with_field(monkeypatch):
+    """Reference rules don't change when Field does - a broken Field method is caught, not copied"""
+    assert not issubclass(fz.ReferenceField, fz.Field)
+    for name, value in vars(fz.ReferenceField).items():
+        assert value is not vars(fz.Field).get(name), name
+    can_place = fz.Field._can_place  # pylint: disable=protected-access
+    monkeypatch.setattr(fz.Field, '_can_place', lambda self, points: all(x > 0 for x, _ in points) and
+                        can_place(self, points))  # the left column is lost
+    assert fz.run_case(fz.random_case(0), fz.field_backend)[0] is not None
+    monkeypatch.undo()
+    monkeypatch.setattr(fz.Field, '_get_full_row', lambda self: None)  # rows are never removed
+    assert fz.run_case(fz.random_case(25), fz.field_backend)[0] is not None  # case 25 removes a row
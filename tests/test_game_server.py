@@ -0,0 +1,111 @@
+"""Tests for multi-session game server"""
+import asyncio
+import random
+
+import app.modules.game_server as gs
+
+
+def test_timing_wheel_order_and_cancel():
+    """Timers fire on their tick, cancelled ones don't, long delays survive wheel rounds"""
+    wheel = gs.TimingWheel(tick_sec=0.01, slots=8)
+    fired = []
+    wheel.schedule(0.03, lambda: fired.append('short'))
+    wheel.schedule(0.2, lambda: fired.append('long'))  # more than one round of 8 slots
+    wheel.schedule(0.05, lambda: fired.append('cancelled')).cancel()
+    wheel.advance(3)
+    assert fired == ['short']
+    wheel.advance(16)
+    assert fired == ['short']
+    wheel.advance(1)
+    assert fired == ['short', 'long']
+
+
+def test_timing_wheel_never_fires_early():
+    """Delay is rounded up to wheel ticks"""
+    wheel = gs.TimingWheel(tick_sec=0.01, slots=8)
+    fired = []
+    wheel.schedule(0.011, lambda: fired.append('rounded up'))
+    wheel.schedule(0.8, lambda: fired.append('exact'))
+    wheel.advance(1)
+    assert not fired
+    wheel.advance(1)
+    assert fired == ['rounded up']
+    wheel.advance(77)
+    assert fired == ['rounded up']
+    wheel.advance(1)
+    assert fired == ['rounded up', 'exact']
+
+
+def test_closed_session_stops():
+    """Session closed by its send() - e.g. slow client disconnected - doesn't send or schedule anything"""
+    wheel = gs.TimingWheel()
+    sent = []
+
+    def send(text: str):
+        sent.append(text)
+        session.close()
+
+    session = gs.GameSession(wheel, send, random.Random(1))
+    wheel.advance(round(gs.TICK_INTERVAL / wheel.tick_sec) * 5)
+    session.handle_command('L')
+    assert len(sent) == 1
+    assert session.closed
+
+
+def test_session_gravity_and_protocol():
+    """Gravity comes from the wheel, field events are encoded as protocol lines"""
+    wheel = gs.TimingWheel()
+    sent = []
+    session = gs.GameSession(wheel, sent.append, random.Random(1))
+    wheel.advance(round(gs.TICK_INTERVAL / wheel.tick_sec))
+    lines = ''.join(sent).splitlines()
+    assert lines[0].startswith('N ')
+    assert any(line.startswith('C ') for line in lines)
+
+    session.handle_command('Z')
+    assert sent[-1].startswith('E ')
+
+    sent.clear()
+    session.handle_command('X')
+    wheel.advance(round(gs.TICK_INTERVAL / wheel.tick_sec))  # figure is fixed by the next gravity step
+    assert 'F' in ''.join(sent).splitlines()
+
+    sent.clear()
+    session.handle_command('P')
+    session.handle_command('L')
+    assert not sent
+    session.close()
+
+
+def test_same_seed_same_game():
+    """Sessions with equal seeds get equal figures"""
+    outputs = []
+    for _ in range(2):
+        wheel = gs.TimingWheel()
+        sent = []
+        session = gs.GameSession(wheel, sent.append, random.Random(42))
+        for _ in range(5):
+            session.handle_command('X')
+            wheel.advance(round(gs.TICK_INTERVAL / wheel.tick_sec))
+        outputs.append(sent)
+    assert outputs[0] == outputs[1]
+
+
+def test_server_over_tcp():
+    """Client connects, sends commands and gets diffs"""
+    async def scenario():
+        server = gs.GameServer(seed=3)
+        tcp_server = await asyncio.start_server(server._on_client, '127.0.0.1', 0)  # pylint: disable=protected-access
+        wheel_task = asyncio.create_task(server.wheel.run())
+        port = tcp_server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'X\n')
+        first = await asyncio.wait_for(reader.readline(), timeout=5)
+        assert len(server.sessions) == 1
+        writer.close()
+        await writer.wait_closed()
+        wheel_task.cancel()
+        tcp_server.close()
+        return first
+
+    assert asyncio.run(scenario()).startswith(b'N ')
@@ -0,0 +1,48 @@
+"""Tests for GUI implementations without display"""
+import threading
+import types
+from collections import OrderedDict
+
+import app.modules.headless_ui as hui
+from app.modules.controls_handler import ControlsHandler
+from app.modules.field import CellState
+from app.modules.figures import Point
+from app.modules.game import Game
+
+
+def test_recording_gui():
+    """Calls are counted, last values are kept"""
+    gui = hui.RecordingGUI()
+    gui.apply_field_change(OrderedDict({CellState.EMPTY: {Point(0, 0)}, CellState.FALLING: {Point(0, 1), Point(1, 1)}}))
+    gui.show_score(10)
+    gui.show_score(20)
+    gui.toggle_pause()
+    gui.sounds.move.play()
+    assert gui.calls['apply_field_change'].count == 1
+    assert gui.changed_cells_count == 3
+    assert gui.calls['show_score'].count == 2
+    assert gui.calls['show_score'].first_time <= gui.calls['show_score'].last_time
+    assert gui.score == 20
+    assert gui.is_paused
+    assert gui.sounds.move.play_count == 1  # pylint: disable=no-member
+
+
+def test_recent_calls_limit():
+    """Memory doesn't grow with calls number"""
+    gui = hui.RecordingGUI()
+    for score in range(hui.RECENT_CALLS_LIMIT * 2):
+        gui.show_score(score)
+    assert gui.calls['show_score'].count == hui.RECENT_CALLS_LIMIT * 2
+    assert len(gui.calls['show_score'].recent_times) == hui.RECENT_CALLS_LIMIT
+
+
+def test_stopped_game_leaves_no_threads():
+    """Game on the real clock ends all its threads on stop(), controls handler ends its own"""
+    threads_count = threading.active_count()
+    controls_handler = ControlsHandler()
+    gui = hui.RecordingGUI()
+    game = Game(controls_handler=controls_handler, gui=gui)
+    controls_handler.on_key_press(types.SimpleNamespace(keycode=37))  # arms auto-repeat
+    game.stop()
+    controls_handler.stop()
+    assert threading.active_count() == threads_count
@@ -0,0 +1,33 @@
+"""Tests for input latency histograms"""
+import pytest
+
+import app.modules.latency as lat
+
+
+def test_percentiles():
+    """Percentiles are rounded up to the bucket bound"""
+    histogram = lat.LatencyHistogram()
+    for latency_ms in range(1, 101):
+        histogram.add(latency_ms / 1000)
+    assert histogram.percentile(50) == pytest.approx(0.0501)
+    assert histogram.percentile(99) == pytest.approx(0.0991)
+    assert histogram.max == pytest.approx(0.1)
+
+
+def test_too_slow_sample():
+    """Samples above the histogram range go into the last bucket, max is still exact"""
+    histogram = lat.LatencyHistogram()
+    histogram.add(lat.MAX_LATENCY_SEC * 10)
+    assert histogram.percentile(50) == pytest.approx(lat.MAX_LATENCY_SEC * 10)
+
+
+def test_tracker_stages():
+    """Trace is split into stages"""
+    tracker = lat.LatencyTracker()
+    tracker.record([0.0, 0.001, 0.002, 0.003, 0.004])
+    assert tracker.report()['total']['count'] == 0  # disabled
+    tracker.enabled = True
+    tracker.record([0.0, 0.001, 0.003, 0.006, 0.010])
+    report = tracker.report()
+    assert [report[stage]['max_ms'] for stage in lat.STAGES] == pytest.approx([1, 2, 3, 4])
+    assert report['total']['max_ms'] == pytest.approx(10)
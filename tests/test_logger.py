@@ -0,0 +1,80 @@
+"""Tests for logging pipeline"""
+import logging
+
+import pytest
+
+import app.modules.logger as lg
+
+
+def make_record(msg='Control event: %s', args=('x',)):
+    """Record as game logger would create it"""
+    return logging.LogRecord('Tetris.game', logging.DEBUG, __file__, 1, msg, args, None)
+
+
+def test_rate_limit():
+    """Repeated message is dropped after limit, the next allowed one tells how many were dropped"""
+    rate_limit = lg.RateLimitFilter(window_sec=60, max_messages=2)
+    assert [rate_limit.filter(make_record()) for _ in range(5)] == [True, True, False, False, False]
+    assert rate_limit.filter(make_record(msg='Other message'))
+
+    rate_limit.window_sec = 0  # next window starts right now
+    record = make_record()
+    assert rate_limit.filter(record)
+    assert record.suppressed_count == 3  # pylint: disable=no-member
+    formatter = lg._Formatter('%(message)s')  # pylint: disable=protected-access
+    assert formatter.format(record) == 'Control event: x [3 similar messages suppressed]'
+
+
+def test_parse_module_levels():
+    """Module levels from command line"""
+    assert lg.parse_module_levels(['game=debug', 'field = INFO']) == {'game': 'DEBUG', 'field': 'INFO'}
+    with pytest.raises(ValueError):
+        lg.parse_module_levels(['game'])
+
+
+def test_file_output(tmp_path):
+    """Records reach the file through the listener thread, module levels are respected"""
+    log_file = tmp_path / 'tetris.log'
+    lg.configure_logging('WARNING', {'test': 'DEBUG'}, log_file)
+    try:
+        lg.get_logger('test').debug('Debug %d', 42)
+        lg.get_logger('other').debug('Hidden')
+    finally:
+        lg.configure_logging()  # stops listener with file handler, so everything is flushed
+    text = log_file.read_text(encoding='utf-8')
+    assert 'Tetris.test [DEBUG]: Debug 42' in text
+    assert 'Hidden' not in text
+
+
+def test_mutable_args_are_formatted_when_queued():
+    """List argument could be changed before the listener writes the record, so it's formatted right away"""
+    handler = lg._LazyQueueHandler(None)  # pylint: disable=protected-access
+    trace = [1.0]
+    record = handler.prepare(make_record(args=(trace,)))
+    trace.append(2.0)
+    assert (record.msg, record.args) == ('Control event: [1.0]', None)
+
+    record = handler.prepare(make_record(args=('x', 2)))
+    assert (record.msg, record.args) == ('Control event: %s', ('x', 2))  # immutable args are left to the listener
+
+
+def test_no_listener_on_import():
+    """Importing the module doesn't start a thread, configure_logging() does"""
+    pipeline = lg._LoggingPipeline()  # pylint: disable=protected-access
+    assert pipeline._listener is None  # pylint: disable=protected-access
+
+
+def test_queue_is_bounded_without_listener(tmp_path, monkeypatch):
+    """Until the listener is started records wait in a bounded queue, the ones which don't fit are dropped"""
+    monkeypatch.setattr(lg, 'LOG_QUEUE_SIZE', 3)
+    pipeline = lg._LoggingPipeline()  # pylint: disable=protected-access
+    for i in range(5):
+        pipeline.queue_handler.handle(make_record(msg=f'Record {i}', args=()))
+    assert pipeline.queue_handler.dropped_count == 2
+
+    log_file = tmp_path / 'tetris.log'
+    pipeline.set_outputs(log_file)
+    pipeline.stop()
+    text = log_file.read_text(encoding='utf-8')
+    assert 'Record 2' in text
+    assert 'Record 3' not in text
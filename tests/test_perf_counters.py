@@ -0,0 +1,26 @@
+"""Tests for hot path counters"""
+import app.modules.perf_counters as pc
+
+
+class Worker:  # pylint: disable=too-few-public-methods
+    """Class to instrument"""
+
+    def work(self, items):
+        """Returns items count"""
+        return len(items)
+
+
+def test_instrument_and_restore():
+    """Instrumented method is counted, restore brings the original back"""
+    original = Worker.work
+    counters = pc.PerfCounters()
+    assert not counters.enabled
+    counters.instrument(Worker, ('work',), gauge=('items', lambda _, items: len(items)))
+    assert counters.enabled
+    assert Worker().work([1, 2, 3]) == 3
+    Worker().work([1])
+    report = counters.report()
+    assert report['timers_ms']['Worker.work']['count'] == 2
+    assert report['gauges']['items']['max'] == 3
+    counters.restore()
+    assert Worker.work is original
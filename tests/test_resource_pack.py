@@ -0,0 +1,67 @@
+"""Tests for packed skin resources"""
+import pathlib
+import sys
+import wave
+
+import pytest
+
+import app.modules.resource_pack as rp
+from app.modules import skin
+
+RES_PATH = pathlib.Path(__file__).parent.parent / 'app' / 'res'
+
+
+@pytest.fixture(name='pack', scope='module')
+def fixture_pack(tmp_path_factory):
+    """Packs real skins once for all tests"""
+    pack_path = tmp_path_factory.mktemp('pack') / rp.PACK_FILE_NAME
+    rp.pack_resources(RES_PATH, pack_path)
+    return rp.ResourcePack(pack_path)
+
+
+@pytest.mark.parametrize('name', ['Default/gfx/base.png', 'Default/gfx/cfg.yaml', 'Matrix/gfx/7.png'])
+def test_read_file(pack, name):
+    """Packed file content is the same as original one"""
+    assert bytes(pack.read(name)) == (RES_PATH / name).read_bytes()
+
+
+def test_read_wav(pack):
+    """Sounds are stored as PCM with params of original wave file"""
+    name = 'Default/sound/move.wav'
+    with wave.open(str(RES_PATH / name), 'rb') as wave_file:
+        assert pack.audio_params(name) == (wave_file.getnchannels(), wave_file.getsampwidth(),
+                                           wave_file.getframerate())
+        assert bytes(pack.read(name)) == wave_file.readframes(wave_file.getnframes())
+
+
+def test_bad_file(tmp_path):
+    """Not a pack file"""
+    bad_path = tmp_path / 'bad.pack'
+    bad_path.write_bytes(b'definitely not a pack')
+    with pytest.raises(rp.ResourcePackError):
+        rp.ResourcePack(bad_path)
+
+
+def test_config_is_parsed_at_pack_time(pack):
+    """Skin config comes from the index as parsed data"""
+    yaml = pytest.importorskip('yaml')
+    name = 'Default/gfx/cfg.yaml'
+    assert pack.config(name) == yaml.safe_load((RES_PATH / name).read_text(encoding='utf-8'))
+    assert pack.config('Default/gfx/base.png') is None
+
+
+def test_skin_config_without_yaml(pack, monkeypatch):
+    """With the pack skin config is read without importing yaml"""
+    monkeypatch.setattr(skin, '_get_resource_pack', lambda: pack)
+    monkeypatch.setitem(sys.modules, 'yaml', None)  # import fails
+    assert skin._get_cfg('Matrix')['cell_size'] > 0  # pylint: disable=protected-access
+
+
+@pytest.mark.parametrize('size', [0, 5, 20, -1])
+def test_short_file(tmp_path, pack, size):
+    """Empty and truncated packs are reported as broken, not as mmap or JSON errors"""
+    whole = bytes(pack._view)  # pylint: disable=protected-access
+    short_path = tmp_path / 'short.pack'
+    short_path.write_bytes(whole[:size])
+    with pytest.raises(rp.ResourcePackError):
+        rp.ResourcePack(short_path)
@@ -0,0 +1,62 @@
+"""Tests for table-driven rotation"""
+import random
+
+import pytest
+
+import app.modules.field as fld
+import app.modules.figures as f
+import app.modules.rotation as rot
+
+WIDTH, HEIGHT = 10, 24
+
+
+def legacy_rotation(figure: f.Figure, filled: set[f.Point]) -> f.Point | None:
+    """How Field.rotate found the position before kick tables"""
+    for x_offset in (0, -1, 1, -2, 2):
+        position = f.Point(figure.position.x + x_offset, figure.position.y)
+        points = figure.get_points(position, next_rotation=True)
+        if all(0 <= x < WIDTH and 0 <= y < HEIGHT and (x, y) not in filled for x, y in points):
+            return position
+    return None
+
+
+@pytest.mark.parametrize('figure_class', f.all_figures)
+def test_classic_kicks_match_legacy(figure_class):
+    """Default engine rotates exactly like Field did"""
+    rng = random.Random(figure_class.__name__)
+    engine = rot.RotationEngine()
+    for _ in range(300):
+        filled = {f.Point(x, y) for x in range(WIDTH) for y in range(HEIGHT) if rng.random() < 0.25}
+        rows = [sum(1 << x for x in range(WIDTH) if (x, y) in filled) for y in range(HEIGHT)]
+        figure = figure_class(rng)
+        figure.position = f.Point(rng.randint(-2, WIDTH - 1), rng.randint(0, HEIGHT - 4))
+        assert engine.find_position(figure, rows, WIDTH) == legacy_rotation(figure, filled)
+
+
+def test_srs_kicks():
+    """I figure at the wall is kicked by SRS table, O figure never moves"""
+    engine = rot.RotationEngine(rot.SRS_KICKS)
+    rows = [0] * HEIGHT
+    figure = f.IFigure()
+    while figure.rotation != f.Rotation.NORTH:
+        figure.rotate()
+    figure.position = f.Point(-1, 10)  # vertical at the left wall, next rotation is horizontal
+    assert engine.find_position(figure, rows, WIDTH) == f.Point(0, 10)  # (0, 0) and (-2, 0) don't fit
+
+    figure = f.OFigure()
+    figure.position = f.Point(3, 3)
+    assert engine.find_position(figure, rows, WIDTH) == f.Point(3, 3)
+    rows[5] = 1 << 3
+    assert engine.find_position(figure, rows, WIDTH) is None
+
+
+def test_field_with_srs():
+    """Field plays with another kick table, filled rows mask follows cells"""
+    field = fld.Field(WIDTH, HEIGHT, random.Random(5), kick_table=rot.SRS_KICKS)
+    rng = random.Random(5)
+    for _ in range(2000):
+        rng.choice([field.tick, field.rotate, field.move_left, field.move_right, field.rotate])()
+        field.events_q.drain(timeout=0)  # full events ring would block the field
+    # pylint: disable=protected-access
+    assert field._filled_rows == [sum(1 << x for x in range(WIDTH) if field._get(x, y) == fld.CellState.FILLED)
+                                  for y in range(HEIGHT)]
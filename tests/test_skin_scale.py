@@ -0,0 +1,88 @@
+"""Tests for skin scaling, images are stand-ins because Tk needs a display"""
+import fractions
+import tkinter as tk
+
+from app.modules import skin as sk
+
+
+class FakeImage(tk.PhotoImage):  # pylint: disable=too-many-ancestors
+    """Knows only its size and how many times it was scaled, like PhotoImage zoom and subsample do"""
+
+    def __init__(self, width, height):  # pylint: disable=super-init-not-called
+        self._width = width
+        self._height = height
+        self.name = None  # PhotoImage.__del__ looks at it
+
+    def width(self):
+        return self._width
+
+    def height(self):
+        return self._height
+
+    def zoom(self, x, y=''):
+        return FakeImage(self._width * x, self._height * x)
+
+    def subsample(self, x, y=''):
+        return FakeImage(-(-self._width // x), -(-self._height // x))
+
+
+def make_skin() -> sk.Skin:
+    """Sizes and offsets like the Default skin has"""
+    return sk.Skin(base_image=FakeImage(500, 900), game_field_offset_x=111, game_field_offset_y=87,
+                   next_figure_field_offset_x=340, next_figure_field_offset_y=219,
+                   pause_image=FakeImage(50, 20), pause_image_offset_x=377, pause_image_offset_y=428,
+                   cell_falling_image=FakeImage(20, 20), cell_filled_image=FakeImage(20, 20), cell_size=19,
+                   cell_anchor_offset_x=1, cell_anchor_offset_y=1,
+                   digit_images={str(digit): FakeImage(11, 17) for digit in range(10)}, digit_width=11,
+                   digit_height=17, score_digit_offset_x=351, score_digit_offset_y=107, sounds=None)
+
+
+def test_fit_scale():
+    """Scale is the biggest step which fits, never below one step"""
+    skin = make_skin()
+    assert sk.fit_scale(500, 900, skin) == 1
+    assert sk.fit_scale(1000, 1000, skin) == 1
+    assert sk.fit_scale(1300, 2300, skin) == fractions.Fraction(5, 2)
+    assert sk.fit_scale(100, 100, skin) == sk.SCALE_STEP
+
+
+def test_scale_skin():
+    """Images and offsets are scaled, sounds are shared"""
+    skin = make_skin()
+    scaled = sk.scale_skin(skin, fractions.Fraction(3, 2))
+    assert (scaled.base_image.width(), scaled.base_image.height()) == (750, 1350)
+    assert scaled.cell_falling_image.width() == 30
+    assert scaled.digit_images['7'].height() == 26
+    assert scaled.cell_size == 19  # offsets stay in skin pixels
+    assert scaled.game_field_offset_x == 111
+    assert scaled.sounds is skin.sounds
+    assert sk.scale_skin(skin, fractions.Fraction(1)) is skin
+
+
+def test_scaled_skins_are_reused():
+    """Every scale factor is made once while it's in the cache, the least recently used one goes first"""
+    skins = sk.ScaledSkins(make_skin(), max_size=2)
+    double = skins.get(fractions.Fraction(2))
+    assert skins.get(fractions.Fraction(2)) is double
+    half = skins.get(fractions.Fraction(1, 2))
+    assert skins.get(fractions.Fraction(2)) is double
+    skins.get(fractions.Fraction(3))  # drops 1/2
+    assert skins.get(fractions.Fraction(2)) is double
+    assert skins.get(fractions.Fraction(1, 2)) is not half
+
+
+def test_grid_follows_scaled_base_image():
+    """The last cell of the field is where scaled base image has it, rounding isn't multiplied by cell index"""
+    skin = make_skin()
+    for scale in (fractions.Fraction(1, 2), fractions.Fraction(3, 2), fractions.Fraction(5, 2)):
+        scaled = sk.scale_skin(skin, scale)
+        # The same sum GUI paints a cell with, taken from the scaled skin
+        canvas_x, canvas_y = sk.to_canvas(9 * scaled.cell_size + scaled.game_field_offset_x,
+                                          19 * scaled.cell_size + scaled.game_field_offset_y, scale)
+        # Where the cell is on the scaled base image
+        expected_x = (9 * skin.cell_size + skin.game_field_offset_x) * \
+            fractions.Fraction(scaled.base_image.width(), skin.base_image.width())
+        expected_y = (19 * skin.cell_size + skin.game_field_offset_y) * \
+            fractions.Fraction(scaled.base_image.height(), skin.base_image.height())
+        assert abs(canvas_x - expected_x) <= fractions.Fraction(1, 2), scale
+        assert abs(canvas_y - expected_y) <= fractions.Fraction(1, 2), scale
@@ -0,0 +1,38 @@
+"""Tests for soak test runner"""
+from collections import OrderedDict
+
+from app.modules import soak
+from app.modules.field import CellState
+from app.modules.figures import Point
+
+
+def test_find_growth():
+    """Steady growth after warm-up is caught, noise within tolerance is not"""
+    flat = [{'time': i, 'items': 10 + i % 3} for i in range(40)]
+    growing = [{'time': i, 'items': i * 10} for i in range(40)]
+    tolerances = {'items': (5, 0.0)}
+    assert not soak.find_growth(flat, tolerances)
+    assert list(soak.find_growth(growing, tolerances)) == ['items']
+
+
+def test_canvas_model():
+    """Cell painted twice without clearing leaves an item"""
+    gui = soak.CanvasModelGUI()
+    gui.apply_field_change(OrderedDict({CellState.FALLING: {Point(0, 0), Point(1, 0)}}))
+    gui.apply_field_change(OrderedDict({CellState.EMPTY: {Point(0, 0), Point(1, 0)},
+                                        CellState.FILLED: {Point(0, 0)}}))
+    assert gui.canvas_items == 1
+    gui.apply_field_change(OrderedDict({CellState.FILLED: {Point(0, 0)}}))
+    assert gui.canvas_items == 2
+
+
+def test_soak_run():
+    """Twenty minutes of virtual play passes, a leaking metric fails the run"""
+    runner = soak.SoakRunner(seed=1, sample_interval=30, trace_allocations=False)
+    leak = []
+    runner.sample_hooks.append(lambda _: leak.append(bytes(1000)))
+    runner.probes['leak'] = lambda: len(leak)
+    result = runner.run(20 * 60)
+    assert result.games_played > 0
+    assert list(result.growing) == ['leak']
+    assert 'GROWS: leak' in result.format_report()
@@ -0,0 +1,102 @@
+"""Tests for spectator stream"""
+import random
+import threading
+
+import pytest
+
+import app.modules.field as fld
+import app.modules.spectator as sp
+
+
+def _play(field: fld.Field, stream: sp.SpectatorStream, steps: int, rng: random.Random):
+    """Random moves, every field event goes to the stream"""
+    for _ in range(steps):
+        rng.choice([field.tick, field.move_left, field.move_right, field.rotate, field.tick])()
+        for event in field.events_q.drain(timeout=0):
+            stream.on_field_event(event)
+
+
+def _visible_rows(field: fld.Field) -> list[bytes]:
+    return [bytes(field._get(x, y) for x in range(field.width))  # pylint: disable=protected-access
+            for y in range(fld.FIELD_HIDDEN_TOP_ROWS_NUMBER, field.height)]
+
+
+def test_rle():
+    """RLE round trip, long runs are split"""
+    data = bytes(300) + b'\x01\x02\x02'
+    encoded = sp.rle_encode(data)
+    assert len(encoded) == 8
+    assert sp.rle_decode(encoded + b'tail', 0, len(data)) == (data, len(encoded))
+
+
+def test_decoder_follows_field():
+    """Subscribers joined at start and in the middle see the same board as the field has"""
+    rng = random.Random(7)
+    field = fld.Field(10, 24, random.Random(7))
+    stream = sp.SpectatorStream(10, 20)
+    early, late = sp.SpectatorDecoder(), sp.SpectatorDecoder()
+    stream.subscribe(early.feed)
+    _play(field, stream, 300, rng)
+    stream.subscribe(late.feed)
+    _play(field, stream, 300, rng)
+    stream.close()  # all frames are written
+
+    rows = _visible_rows(field)
+    for decoder in (early, late):
+        assert [bytes(row) for row in decoder.rows] == rows
+        assert decoder.rows_removed == early.rows_removed
+
+
+def test_chunked_input_and_broken_subscriber():
+    """Decoder accepts frames split anywhere, failing subscriber is dropped"""
+    field = fld.Field(10, 24, random.Random(1))
+    stream = sp.SpectatorStream(10, 20)
+    frames = []
+    stream.subscribe(frames.append)
+
+    def broken(_):
+        raise OSError('closed')
+    stream.subscribe(broken)
+
+    _play(field, stream, 50, random.Random(1))
+    stream.close()
+    assert stream.dropped_subscribers == 1
+    data = b''.join(frames)
+    decoder = sp.SpectatorDecoder()
+    for i in range(0, len(data), 3):
+        decoder.feed(data[i:i + 3])
+    assert [bytes(row) for row in decoder.rows] == _visible_rows(field)
+    assert len(decoder.render().splitlines()) == 20
+
+
+def test_field_size_limit():
+    """Fields whose frames could overflow uint16 length are rejected, the biggest accepted one works"""
+    for width, height in ((0, 10), (256, 1), (255, 129), (129, 255)):
+        with pytest.raises(ValueError):
+            sp.SpectatorStream(width, height)
+
+    stream = sp.SpectatorStream(255, 128)
+    frames = []
+    stream.subscribe(frames.append)
+    checkerboard = tuple(index for index in range(255 * 128) if (index % 255 + index // 255) % 2)
+    stream.on_field_event(fld.FieldEvent(fld.FieldEventType.CELL_STATE_CHANGE,
+                                         ((fld.CellState.FILLED, checkerboard),)))
+    stream.subscribe(frames.append)
+    stream.close()
+    decoder = sp.SpectatorDecoder()
+    decoder.feed(b''.join(frames))
+    assert decoder.cell(1, 0) == fld.CellState.FILLED
+    assert decoder.cell(1, 1) == fld.CellState.EMPTY
+
+
+def test_slow_subscriber_is_dropped():
+    """Subscriber which doesn't keep up is dropped, the game thread never waits for it"""
+    stream = sp.SpectatorStream(10, 20)
+    release = threading.Event()
+    stream.subscribe(lambda frame: release.wait())
+    for _ in range(sp.SUBSCRIBER_QUEUE_FRAMES + 2):  # the first frame is being written, the rest fill the queue
+        stream.on_field_event(fld.FieldEvent(fld.FieldEventType.ROW_REMOVED))
+    assert stream.subscribers_count == 0
+    assert stream.dropped_subscribers == 1
+    release.set()
+    stream.close()
@@ -0,0 +1,83 @@
+"""Tests for terminal front end"""
+import io
+import os
+import pathlib
+import subprocess
+import sys
+import time
+from collections import OrderedDict
+
+import app.modules.controls_handler as ch
+import app.modules.terminal_ui as tui
+from app.modules.field import CellState
+from app.modules.figures import Point
+
+
+def test_only_dirty_cells_are_written():
+    """One frame contains the last state of changed cells only"""
+    out = io.StringIO()
+    gui = tui.TerminalGUI(10, 20, out=out, frame_interval=3600)
+    gui.close()  # stops frame thread, everything else is flushed by hand
+    out.seek(0)
+    out.truncate()
+
+    gui.apply_field_change(OrderedDict({CellState.FALLING: {Point(1, 0)}}))
+    gui.apply_field_change(OrderedDict({CellState.EMPTY: {Point(1, 0)}, CellState.FILLED: {Point(2, 3)}}))
+    gui._flush()  # pylint: disable=protected-access
+    assert out.getvalue() == '\x1b[2;4H .\x1b[5;6H[]'
+
+    out.seek(0)
+    out.truncate()
+    gui._flush()  # pylint: disable=protected-access
+    assert out.getvalue() == ''  # nothing changed - nothing written
+
+
+
+def test_trace_ends_when_written(monkeypatch):
+    """Latency trace of a change is finished by the frame which writes the change, not when it's queued"""
+    monkeypatch.setattr(tui.latency_tracker, 'enabled', True)
+    gui = tui.TerminalGUI(10, 20, out=io.StringIO(), frame_interval=3600)
+    gui.close()
+    trace = [0.0, 0.0, 0.0, 0.0]
+    gui.apply_field_change(OrderedDict({CellState.FALLING: {Point(1, 0)}}), trace)
+    assert len(trace) == 4
+    gui._flush()  # pylint: disable=protected-access
+    assert len(trace) == 5
+    assert tui.latency_tracker.last_total_sec == trace[-1]
+
+def test_split_keys():
+    """Arrow escape sequences are not split"""
+    assert list(tui.TerminalKeyReader._split(b'\x1b[D \x1b[Aq')) == [  # pylint: disable=protected-access
+        b'\x1b[D', b' ', b'\x1b[A', b'q']
+
+
+def test_split_sequences_with_parameters():
+    """CSI sequences with parameters are kept whole, so they don't turn into other keys"""
+    assert list(tui.TerminalKeyReader._split(b'\x1b[1;5C\x1b[3~\x1b[D')) == [  # pylint: disable=protected-access
+        b'\x1b[1;5C', b'\x1b[3~', b'\x1b[D']
+    assert list(tui.TerminalKeyReader._split(b'\x1b[')) == [b'\x1b[']  # pylint: disable=protected-access
+
+
+def test_held_key_waits_for_terminal_repeat():
+    """The first press lasts longer than terminal repeat delay, repeats keep the key held for a short time"""
+    read_fd, write_fd = os.pipe()
+    controls_handler = ch.ControlsHandler(das_sec=3600)
+    with os.fdopen(read_fd, 'rb', buffering=0) as stdin:
+        reader = tui.TerminalKeyReader(controls_handler, stdin, release_timeout=0.1, first_release_timeout=0.6)
+        os.write(write_fd, b'\x1b[B')
+        reader._read_once()  # pylint: disable=protected-access
+        assert reader._release_deadlines[40] - time.monotonic() > 0.3  # pylint: disable=protected-access
+        os.write(write_fd, b'\x1b[B')
+        reader._read_once()  # pylint: disable=protected-access
+        assert reader._release_deadlines[40] - time.monotonic() <= 0.1  # pylint: disable=protected-access
+    os.close(write_fd)
+    commands = []
+    while not controls_handler.events_q.empty():
+        commands.append(controls_handler.events_q.get().payload)
+    assert commands == [ch.Commands.FORCE_DOWN]  # no cancel between the press and the repeat
+
+
+def test_works_without_tkinter():
+    """Terminal front end is for Python builds without Tk, so nothing it imports may need tkinter"""
+    code = "import sys; sys.modules['tkinter'] = None; import app.modules.terminal_ui, app.modules.game"
+    subprocess.run([sys.executable, '-c', code], cwd=pathlib.Path(__file__).parent.parent, check=True)